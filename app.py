@@ -1,5 +1,7 @@
 import os
-import json
+import threading
+import time
+import uuid
 import streamlit as st
 
 # 🔐 Inject Streamlit secrets into environment BEFORE any OpenAI imports
@@ -10,15 +12,30 @@ if "GEMINI_API_KEY" in st.secrets:
     os.environ["GEMINI_API_KEY"] = st.secrets["GEMINI_API_KEY"]
 
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import Dict, Any, List, Optional, Tuple
+
+_IMPORT_T0 = time.perf_counter()
 
 from src.ui import apply_enterprise_ui, render_topbar
+from src.align import AlignedPair, align_texts, render_aligned_html
 from src.text_utils import safe_decode
-from src.config import AppSettings
-from src.translate import run_translation
-from src.editor import copyedit_and_generate_titles
+from src.archive import archive_dir, open_archive, record_failure
+from src.config import STAGE_PROFILE_PRESETS, AppSettings
+from src.translate import new_run_context, run_segment_translation, run_translation
+from src.run_context import RunCancelled, RunContext
+from src.segments import is_structured_filename, parse_segments, render_segments
+from src.store import TextHandle, get_result_store
+from src.profiling import RunProfiler, profiling_enabled, span
+from src.pipeline import copyedit_results, direction_to_language, store_outputs
+from src.providers import health_snapshot, new_usage, routing_snapshot
+from src.warmup import warm_up
+
+# App module imports only; provider SDKs are imported lazily (warm-up or first call)
+APP_IMPORT_S = round(time.perf_counter() - _IMPORT_T0, 4)
 
 APP_TITLE = "YTALI Translator (IT ↔ EN) — Gemini 2.5 Flash vs GPT-5.2"
+# Review: aligned sentence pairs per page (text views page by stored paragraphs, see src/store.py)
+ALIGNED_ROWS_PER_PAGE = 60
 
 
 # -------------------------
@@ -31,135 +48,273 @@ def _get_secrets_safe() -> dict:
         return {}
 
 
+@st.cache_resource(show_spinner=False)
+def _start_warm_up() -> Dict[str, Any]:
+    """Once per server process: warm up in the background so the page renders immediately."""
+    status: Dict[str, Any] = {"app_import_s": APP_IMPORT_S, "done": False}
+
+    def _run() -> None:
+        status.update(
+            warm_up(
+                openai_key=os.getenv("OPENAI_API_KEY"),
+                gemini_key=os.getenv("GEMINI_API_KEY"),
+            )
+        )
+        status["done"] = True
+
+    threading.Thread(target=_run, name="ytali-warmup", daemon=True).start()
+    return status
+
+
 def _load_input_text(uploaded) -> str:
     if uploaded is None:
         return ""
     return safe_decode(uploaded.read()).strip()
 
 
-def _strip_json_fence(s: str) -> str:
-    s = (s or "").strip()
-    if s.startswith("```"):
-        lines = s.splitlines()
-        if lines and lines[0].startswith("```"):
-            lines = lines[1:]
-        if lines and lines[-1].strip() == "```":
-            lines = lines[:-1]
-        s = "\n".join(lines).strip()
-    return s
+def _start_run(cfg: AppSettings) -> RunContext:
+    """Create this session's run context, cancelling any run it supersedes.
 
-
-def _try_parse_json_obj(s: str):
-    s2 = _strip_json_fence(s).strip()
-    if s2.startswith("{") and s2.endswith("}"):
-        try:
-            return json.loads(s2)
-        except json.JSONDecodeError:
-            return None
-    return None
-
-
-def _coerce_editor_result(result: Any) -> Dict[str, Any]:
-    """
-    Normalize editor output to a dict:
-    - Accept dict OR JSON-string (possibly fenced)
-    - If edited_text is itself JSON (possibly fenced), unwrap it
-    - Ensure edited_text is a string
-    - Ensure title_suggestions is a list[str]
+    The heartbeat refreshes a status line while provider calls are in flight;
+    each refresh is also where Streamlit can interrupt a superseded script run.
     """
-    # If editor returned a JSON-ish string, parse it
-    if isinstance(result, str):
-        parsed = _try_parse_json_obj(result)
-        if parsed is None:
-            raise ValueError("Editor returned non-JSON string")
-        result = parsed
+    previous = st.session_state.get("active_run")
+    if isinstance(previous, RunContext):
+        previous.cancel("superseded by a new run")
 
-    if not isinstance(result, dict):
-        raise ValueError(f"Editor returned non-dict: {type(result)}")
+    status = st.empty()
 
-    edited_text = result.get("edited_text", "")
-    titles = result.get("title_suggestions", [])
+    def _heartbeat(ctx: RunContext) -> None:
+        remaining = ctx.remaining()
+        budget = f" · deadline in {remaining:.0f}s" if remaining is not None else ""
+        status.caption(f"⏱ {ctx.elapsed():.0f}s elapsed{budget}")
 
-    # If edited_text accidentally contains the full JSON object as a string, unwrap it
-    if isinstance(edited_text, str):
-        inner = _try_parse_json_obj(edited_text)
-        if isinstance(inner, dict) and ("edited_text" in inner or "title_suggestions" in inner):
-            edited_text = inner.get("edited_text", edited_text)
-            inner_titles = inner.get("title_suggestions", None)
-            if isinstance(inner_titles, list):
-                titles = inner_titles
+    ctx = new_run_context(cfg, heartbeat=_heartbeat)
+    st.session_state["active_run"] = ctx
+    return ctx
 
-    if isinstance(edited_text, dict):
-        edited_text = edited_text.get("edited_text") or json.dumps(edited_text, ensure_ascii=False)
 
-    if not isinstance(edited_text, str):
-        edited_text = str(edited_text)
+def _store_outputs(meta: Dict[str, Any], edited_outputs: Dict[str, Dict[str, Any]], paged: bool = True) -> None:
+    """Move output texts to the disk-backed store; session state keeps handles + _meta.
 
-    if not isinstance(titles, list):
-        titles = []
-    titles = [t.strip() for t in titles if isinstance(t, str) and t.strip()]
+    The session's previous run is dropped from the store first.
+    """
+    session = st.session_state.setdefault("store_session", uuid.uuid4().hex)
+    st.session_state["results_meta"] = meta
+    st.session_state["edited_outputs"] = store_outputs(session, edited_outputs, paged=paged)
 
-    return {"edited_text": edited_text, "title_suggestions": titles}
 
+def _load_output(handle: TextHandle) -> str:
+    text = get_result_store().get(handle)
+    if text is None:
+        st.warning("This output was evicted from the result store — please run again.")
+        return ""
+    return text
 
-def safe_copyedit(text: str, target_language: str, debug: bool = False) -> dict:
-    """
-    Runs copyediting safely.
-    Never crashes if the model returns invalid / empty JSON.
-    Shows exception details when debug is enabled.
-    """
-    try:
-        raw = copyedit_and_generate_titles(
-            text=text,
-            target_language=target_language,
-        )
-        return _coerce_editor_result(raw)
-    except Exception as e:
-        if debug:
-            st.exception(e)
-        return {
-            "edited_text": text,
-            "title_suggestions": [],
-        }
 
+def _load_page(handle: TextHandle, page: Optional[int]) -> str:
+    """One page of paragraphs from the store (`None`: the whole text)."""
+    if page is None:
+        return _load_output(handle)
+    paras = get_result_store().get_page(handle, page)
+    if paras is None:
+        st.warning("This output was evicted from the result store — please run again.")
+        return ""
+    return "\n\n".join(paras)
+
+
+def _turn_page(key: str, delta: int, pages: int) -> None:
+    st.session_state[key] = max(0, min(st.session_state.get(key, 0) + delta, pages - 1))
+
+
+def _pager(key: str, pages: int) -> int:
+    """Previous / next controls; the current page is kept in session state under `key`."""
+    page = max(0, min(st.session_state.get(key, 0), pages - 1))
+    if pages <= 1:
+        return 0
+    prev_col, info_col, next_col = st.columns([1, 3, 1])
+    prev_col.button("← Previous", key=f"{key}_prev", on_click=_turn_page, args=(key, -1, pages), disabled=page == 0)
+    next_col.button("Next →", key=f"{key}_next", on_click=_turn_page, args=(key, 1, pages), disabled=page >= pages - 1)
+    info_col.caption(f"Page {page + 1} of {pages}")
+    return page
+
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def _aligned_pairs(left: TextHandle, right: TextHandle) -> Optional[List[AlignedPair]]:
+    store = get_result_store()
+    left_text, right_text = store.get(left), store.get(right)
+    if left_text is None or right_text is None:
+        return None
+    with span("align"):
+        return align_texts(left_text, right_text)
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def _aligned_page_html(
+    left: TextHandle,
+    right: TextHandle,
+    left_label: str,
+    right_label: str,
+    only_differences: bool,
+    page: int,
+) -> Tuple[str, int]:
+    """(HTML table for one page of aligned pairs, page count)."""
+    pairs = _aligned_pairs(left, right)
+    if pairs is None:
+        return "", 0
+    if only_differences:
+        pairs = [p for p in pairs if p.left != p.right]
+    pages = max(1, -(-len(pairs) // ALIGNED_ROWS_PER_PAGE))
+    start = page * ALIGNED_ROWS_PER_PAGE
+    return render_aligned_html(pairs[start : start + ALIGNED_ROWS_PER_PAGE], left_label, right_label), pages
+
+
+def _run_id(handle: TextHandle) -> str:
+    return handle.key.split("/", 1)[0]
+
+
+def _render_titles(edited_outputs: Dict[str, Dict[str, Any]], first_only: bool = False) -> None:
+    for col, label in zip(st.columns(len(edited_outputs)), edited_outputs):
+        with col:
+            titles = edited_outputs[label]["titles"]
+            if first_only:
+                st.markdown(f"**Title suggestion ({label}):**")
+                st.write(titles[0] if titles else "No title suggestions could be generated.")
+                continue
+            st.markdown("**Title suggestions:**")
+            if titles:
+                for i, t in enumerate(titles, 1):
+                    st.write(f"{i}. {t}")
+            else:
+                st.caption("No title suggestions could be generated.")
 
-def generate_titles_only(text: str, target_language: str, debug: bool = False) -> List[str]:
-    """
-    Best-effort title generation retry.
-    Never crashes.
-    Shows exception details when debug is enabled.
-    """
-    try:
-        raw = copyedit_and_generate_titles(
-            text=text,
-            target_language=target_language,
-        )
-        data = _coerce_editor_result(raw)
-        return data.get("title_suggestions", [])
-    except Exception as e:
-        if debug:
-            st.exception(e)
-        return []
 
+@st.fragment
+def _render_paged_stage(title: str, key: str, edited_outputs: Dict[str, Dict[str, Any]], show_titles: bool = False) -> None:
+    """One review stage, one page of paragraphs per label.
 
-def direction_to_language(direction: str) -> str:
-    """
-    Convert direction labels (e.g. 'IT→EN', 'it_to_en') into a language name
-    for the editor prompts (e.g. 'English', 'Italian').
+    A fragment: turning pages reruns only this stage, and only the visible
+    page is read from the store and sent to the browser.
     """
-    d = (direction or "").strip().lower()
-
-    if ("to_en" in d) or ("->en" in d) or ("→en" in d) or d.endswith("en"):
-        return "English"
-    if ("to_it" in d) or ("->it" in d) or ("→it" in d) or d.endswith("it"):
-        return "Italian"
+    st.markdown(f"### {title}")
+    labels = list(edited_outputs)
+    handles = [edited_outputs[label][key] for label in labels]
+    state_key = f"page_{_run_id(handles[0])}_{key}"
+
+    whole = st.toggle("Whole document", False, key=f"{state_key}_whole")
+    page = None if whole else _pager(state_key, max(h.pages or 1 for h in handles))
+
+    for col, label in zip(st.columns(len(labels)), labels):
+        with col:
+            st.markdown(f"### 🤖 {label}")
+            st.text_area(
+                f"{label}_{key}",
+                _load_page(edited_outputs[label][key], page),
+                height=360,
+                label_visibility="collapsed",
+            )
+
+    if show_titles:
+        _render_titles(edited_outputs)
+
+
+@st.fragment
+def _render_aligned_stage(title: str, key: str, edited_outputs: Dict[str, Dict[str, Any]], show_titles: bool = False) -> None:
+    st.markdown(f"### {title}")
+    left, right = list(edited_outputs)
+    handles = (edited_outputs[left][key], edited_outputs[right][key])
+    state_key = f"aligned_{_run_id(handles[0])}_{key}"
+    only_diffs = st.checkbox("Only show differences", False, key=f"only_diffs_{key}")
+    if only_diffs != st.session_state.get(f"{state_key}_diffs", False):
+        st.session_state[f"{state_key}_diffs"] = only_diffs
+        st.session_state[state_key] = 0
+
+    page = st.session_state.get(state_key, 0)
+    html, pages = _aligned_page_html(*handles, f"🤖 {left}", f"🤖 {right}", only_diffs, page)
+    if not pages:
+        st.warning("This output was evicted from the result store — please run again.")
+        return
+    if page >= pages:
+        page = pages - 1
+        html, _ = _aligned_page_html(*handles, f"🤖 {left}", f"🤖 {right}", only_diffs, page)
+    _pager(state_key, pages)
+    with st.container(height=520):
+        st.markdown(html, unsafe_allow_html=True)
+
+    if show_titles:
+        _render_titles(edited_outputs, first_only=True)
+
+
+def _warn_failover(meta: Dict[str, Any]) -> None:
+    entries = meta.get("failover") or []
+    substitutions = [e for e in entries if e.get("to")]
+    skipped = [e for e in entries if not e.get("to")]
+    if substitutions:
+        first = substitutions[0]
+        st.warning(
+            f"{first['label']}: {len(substitutions)} call(s) were served by **{first['to']}** "
+            f"because {first['from']} is unavailable."
+        )
+    if skipped:
+        st.warning(
+            f"{len(skipped)} {skipped[0]['stage']} call(s) were skipped because {skipped[0]['from']} "
+            "is unavailable; the affected outputs are shown unedited."
+        )
 
-    if "english" in d:
-        return "English"
-    if "italian" in d:
-        return "Italian"
 
-    return direction
+def _routing_summary(meta: Dict[str, Any]) -> str:
+    """Auto mode: how many requests each provider served."""
+    served: Dict[str, int] = {}
+    for decision in meta.get("routing") or []:
+        who = decision.get("served_by")
+        if who:
+            served[who] = served.get(who, 0) + 1
+    if not served:
+        return ""
+    return "Auto routing: " + " · ".join(f"{who} ×{n}" for who, n in sorted(served.items()))
+
+
+def _chunking_summary(meta: Dict[str, Any]) -> str:
+    """Chunk plan per model (count, concurrency, estimated vs actual time), repeated paragraphs, output checks."""
+    plans = meta.get("chunk_plan") or {}
+    parts = []
+    if any(p.get("chunks", 0) > 1 for p in plans.values()):
+        parts.append(
+            "Chunking: "
+            + " · ".join(
+                f"{label} {p['chunks']} chunks, {p['parallel']} parallel, "
+                f"est. {p['estimated_s']}s / took {p.get('elapsed_s', '?')}s"
+                for label, p in plans.items()
+            )
+        )
+    deduplicated = (meta.get("dedup") or {}).get("deduplicated", 0)
+    if deduplicated:
+        parts.append(f"{deduplicated} repeated paragraph(s) translated once")
+    checks = (meta.get("output_checks") or {}).values()
+    failed = sum(c.get("failed", 0) for c in checks)
+    if failed:
+        retried = sum(c.get("retried", 0) for c in checks)
+        unresolved = sum(c.get("unresolved", 0) for c in checks)
+        note = f", {unresolved} still failing (see debug info)" if unresolved else ""
+        parts.append(f"{failed} chunk output(s) failed a check, {retried} re-request(s){note}")
+    return " — ".join(parts)
+
+
+def _usage_summary(usage_by_stage: Dict[str, Dict[str, int]]) -> str:
+    """One-line token summary across stages, highlighting cached input tokens."""
+    total_in = sum(u.get("input_tokens", 0) for u in usage_by_stage.values())
+    cached = sum(u.get("cached_tokens", 0) for u in usage_by_stage.values())
+    total_out = sum(u.get("output_tokens", 0) for u in usage_by_stage.values())
+    reasoning = sum(u.get("reasoning_tokens", 0) for u in usage_by_stage.values())
+    truncated = sum(u.get("truncated", 0) for u in usage_by_stage.values())
+    calls = sum(u.get("calls", 0) for u in usage_by_stage.values())
+    share = f" ({cached / total_in:.0%})" if total_in else ""
+    line = f"{calls} calls · input {total_in} tokens, cached {cached}{share} · output {total_out} tokens"
+    if reasoning:
+        line += f" ({reasoning} reasoning)"
+    if truncated:
+        line += f" · {truncated} truncated at the output cap"
+    return line
 
 
 # -------------------------
@@ -202,13 +357,56 @@ def sidebar_settings() -> AppSettings:
 
     mode = st.radio(
         "Run mode",
-        ["Compare (Gemini vs OpenAI)", "Gemini only", "OpenAI only"],
+        ["Compare (Gemini vs OpenAI)", "Gemini only", "OpenAI only", "Auto (fastest)"],
         index=0,
     )
 
     st.divider()
 
     with st.expander("Advanced", expanded=False):
+        use_tm = st.toggle(
+            "Use translation memory",
+            True,
+            help="Reuse past sentence translations: exact matches skip the model call, similar ones are sent as hints.",
+        )
+        glossary_path = st.text_input(
+            "Glossary file (CSV/TSV with it,en columns)",
+            value=os.getenv("YTALI_GLOSSARY", ""),
+        )
+        shared_context = st.text_area(
+            "Shared context (style notes / background sent with every request)",
+            value="",
+            height=100,
+            help="Kept at the start of every prompt so provider prompt caching can reuse it.",
+        )
+        prefer = st.selectbox(
+            "Auto mode: preferred provider",
+            ["(none)", "openai", "gemini"],
+            index=0,
+            help="Used unless the other provider is currently expected to be clearly faster.",
+        )
+        prefer_margin = st.slider("Auto mode: preference margin", 0.0, 1.0, 0.25, 0.05)
+        max_parallel = st.slider(
+            "Parallel requests per model",
+            1,
+            8,
+            4,
+            help="Long texts are split on paragraph boundaries into chunks translated concurrently.",
+        )
+        latency_profile = st.selectbox(
+            "Latency profile",
+            list(STAGE_PROFILE_PRESETS),
+            index=0,
+            help="Reasoning effort, output cap and service tier per stage (translation, copyedit, titles). "
+            "Compare presets with `python -m src.benchmark`.",
+        )
+        save_local = st.toggle(
+            "Archive runs on disk",
+            False,
+            help=f"Each chunk's source, translation and copyedit is appended to a compressed run archive in "
+            f"{archive_dir()} as soon as it finishes, so partial work survives a crash. Old archives are "
+            "pruned by age and total size.",
+        )
         debug = st.toggle("Show debug info", False)
 
     return AppSettings(
@@ -223,8 +421,15 @@ def sidebar_settings() -> AppSettings:
 
         run_mode=mode,
         chunk_chars=9000,
+        max_parallel_requests=max_parallel,
         compare_first_n_chunks=None,
-        save_local=False,
+        save_local=save_local,
+        translation_memory=use_tm,
+        glossary_path=glossary_path.strip() or None,
+        shared_context=shared_context,
+        auto_prefer_provider=None if prefer == "(none)" else prefer,
+        auto_prefer_margin=prefer_margin,
+        stage_profiles=dict(STAGE_PROFILE_PRESETS[latency_profile]),
         debug=debug,
     )
 
@@ -234,10 +439,43 @@ def sidebar_settings() -> AppSettings:
 # -------------------------
 def main():
     st.set_page_config(page_title=APP_TITLE, layout="wide")
+    warmup_status = _start_warm_up()
 
     with st.sidebar:
         cfg = sidebar_settings()
 
+    profiler = RunProfiler().start() if profiling_enabled(cfg.debug) else None
+    try:
+        ran = _main_body(cfg)
+    finally:
+        if profiler is not None:
+            profiler.stop()
+
+    if profiler is not None and ran:
+        st.session_state["last_profile"] = {
+            "path": profiler.write(),
+            "summary": profiler.flame_summary(),
+        }
+
+    if cfg.debug:
+        st.markdown("### Debug (_meta)")
+        st.json(st.session_state.get("results_meta", {}))
+        st.markdown("### Debug (provider health)")
+        st.json(health_snapshot())
+        st.markdown("### Debug (provider latency, EWMA)")
+        st.json(routing_snapshot())
+        st.markdown("### Debug (startup / warm-up)")
+        st.json(dict(warmup_status))
+
+        last_profile = st.session_state.get("last_profile")
+        if last_profile:
+            st.markdown("### Debug (profile of last run)")
+            st.caption(f"Profile files: `{last_profile['path']}.prof` / `.spans.json`")
+            st.code(last_profile["summary"], language=None)
+
+
+def _main_body(cfg: AppSettings) -> bool:
+    """Form, run and review. Returns True when a run happened in this script run."""
     apply_enterprise_ui(
         watermark_logo_path=cfg.watermark_logo_path,
         watermark_size_px=cfg.watermark_size_px,
@@ -249,9 +487,8 @@ def main():
         """
 ### IT ↔ EN auto-translate (single-pass)
 
-- Designed for **short articles**
-- **No chunking**
-- One request per model
+- Short articles go out in **one request per model**
+- Long texts are split on **paragraph boundaries** and translated **in parallel**
 - Outputs are **copyedited**
 - Title suggestions are **guaranteed or explicitly retried**
 """
@@ -259,7 +496,10 @@ def main():
 
     # -------- FORM --------
     with st.form("input_form", clear_on_submit=False):
-        uploaded = st.file_uploader("Upload a text file (.txt)", type=["txt"])
+        uploaded = st.file_uploader(
+            "Upload a text file (.txt) or segments (.srt / .json / .csv)",
+            type=["txt", "srt", "json", "csv"],
+        )
         pasted = st.text_area(
             "Or paste text here",
             value=st.session_state.get("pasted_text", ""),
@@ -269,11 +509,66 @@ def main():
             "Generate outputs", type="primary", use_container_width=True
         )
 
-    if not submitted and "results" not in st.session_state:
+    if not submitted and "edited_outputs" not in st.session_state:
         st.stop()
 
     # -------- RUN --------
-    if submitted:
+    if submitted and not pasted.strip() and uploaded is not None and is_structured_filename(uploaded.name):
+        # Subtitles / CMS segment lists: pack many small segments per request, no copyedit
+        try:
+            doc = parse_segments(uploaded.name, _load_input_text(uploaded))
+        except ValueError as e:
+            st.error(f"Could not read {uploaded.name}: {e}")
+            st.stop()
+
+        if not doc.segments:
+            st.error("No segments found in the uploaded file.")
+            st.stop()
+
+        if "OPENAI_API_KEY" in st.secrets:
+            cfg.openai_api_key = st.secrets["OPENAI_API_KEY"]
+        if "GEMINI_API_KEY" in st.secrets:
+            cfg.gemini_api_key = st.secrets["GEMINI_API_KEY"]
+
+        progress = st.progress(0, text="Translating segments…")
+        run_ctx = _start_run(cfg)
+        t0 = time.perf_counter()
+        try:
+            with span("run_segment_translation"):
+                results = run_segment_translation(
+                    settings=cfg,
+                    texts=[seg.text for seg in doc.segments],
+                    progress=progress,
+                    ctx=run_ctx,
+                )
+        except RunCancelled as e:
+            st.error(f"Run stopped: {e}")
+            st.stop()
+
+        edited_outputs = {}
+        for label, out in results.items():
+            if label == "_meta":
+                continue
+            edited_outputs[label] = {
+                "literal": render_segments(doc, out["literal"]),
+                "neutral": render_segments(doc, out["neutral"]),
+                "titles": [],
+            }
+
+        _store_outputs(results["_meta"], edited_outputs, paged=False)
+        st.session_state["structured_file"] = {"name": uploaded.name, "kind": doc.kind}
+        archive = open_archive(results["_meta"].get("archive"))
+        if archive is not None:
+            archive.finish(results["_meta"], translate_s=round(time.perf_counter() - t0, 2))
+
+        meta = results["_meta"]
+        st.success(f"Done. {meta['segment_count']} segments translated in {meta['batch_count']} batches per style.")
+        st.caption(_usage_summary(meta["usage"]))
+        _warn_failover(meta)
+        if _routing_summary(meta):
+            st.caption(_routing_summary(meta))
+
+    elif submitted:
         input_text = pasted.strip() if pasted.strip() else _load_input_text(uploaded)
         if not input_text:
             st.error("Please upload a .txt file or paste some text.")
@@ -288,102 +583,128 @@ def main():
         if "GEMINI_API_KEY" in st.secrets:
             cfg.gemini_api_key = st.secrets["GEMINI_API_KEY"]
 
-        results = run_translation(
-            settings=cfg,
-            chunks=[input_text],  # NO CHUNKING
-            progress=progress,
-        )
+        run_ctx = _start_run(cfg)
+        t0 = time.perf_counter()
+        try:
+            with span("run_translation"):
+                results = run_translation(
+                    settings=cfg,
+                    text=input_text,
+                    progress=progress,
+                    ctx=run_ctx,
+                )
+        except RunCancelled as e:
+            st.error(f"Run stopped: {e}")
+            st.stop()
 
         detected = results.get("_meta", {}).get("detected_language")
         direction = results.get("_meta", {}).get("direction") or ""
         target_lang = direction_to_language(direction)
 
-        edited_outputs = {}
+        copyedit_usage = new_usage()
+        archive = open_archive(results["_meta"].get("archive"))
+        t1 = time.perf_counter()
 
-        for label, out in results.items():
-            if label == "_meta":
-                continue
-
-            edited_literal = safe_copyedit(out["literal"], target_lang, debug=cfg.debug)
-            edited_neutral = safe_copyedit(out["neutral"], target_lang, debug=cfg.debug)
-
-            titles = edited_neutral.get("title_suggestions", [])
+        def _debug_label(label: str, entry: Dict[str, Any], edited_neutral: Dict[str, Any]) -> None:
+            with st.expander(f"DEBUG editor output ({label})", expanded=False):
+                st.write("direction:", direction)
+                st.write("target_lang:", target_lang)
+                st.write("titles:", entry["titles"])
+                st.write("edited_neutral keys:", list(edited_neutral.keys()))
+                st.write("edited_neutral title_suggestions:", edited_neutral.get("title_suggestions"))
+                st.write("edited_neutral edited_text preview:", edited_neutral.get("edited_text", "")[:200])
 
-            # Retry titles explicitly if missing
-            if not titles:
-                titles = generate_titles_only(
-                    text=edited_neutral["edited_text"],
-                    target_language=target_lang,
-                    debug=cfg.debug,
+        try:
+            with record_failure(archive):
+                edited_outputs = copyedit_results(
+                    results,
+                    target_lang,
+                    usage=copyedit_usage,
+                    ctx=run_ctx,
+                    on_error=st.exception if cfg.debug else None,
+                    on_label=_debug_label if cfg.debug else None,
+                    profiles=cfg.stage_profiles,
+                    archive=archive,
                 )
+        except RunCancelled as e:
+            st.error(f"Run stopped during copyedit: {e}")
+            st.stop()
 
-            # Only one title
-            titles = titles[:1]
-
-            edited_outputs[label] = {
-                "literal": edited_literal["edited_text"],
-                "neutral": edited_neutral["edited_text"],
-                "titles": titles,
-            }
-
-            if cfg.debug:
-                with st.expander(f"DEBUG editor output ({label})", expanded=False):
-                    st.write("direction:", direction)
-                    st.write("target_lang:", target_lang)
-                    st.write("titles:", titles)
-                    st.write("edited_neutral keys:", list(edited_neutral.keys()))
-                    st.write("edited_neutral title_suggestions:", edited_neutral.get("title_suggestions"))
-                    st.write("edited_neutral edited_text preview:", edited_neutral.get("edited_text", "")[:200])
+        results["_meta"].setdefault("usage", {})["copyedit"] = copyedit_usage
 
-        st.session_state["results"] = results
-        st.session_state["edited_outputs"] = edited_outputs
+        _store_outputs(results["_meta"], edited_outputs)
+        st.session_state.pop("structured_file", None)
+        if archive is not None:
+            archive.finish(
+                results["_meta"],
+                translate_s=round(t1 - t0, 2),
+                copyedit_s=round(time.perf_counter() - t1, 2),
+            )
 
         st.success("Done. Outputs are ready.")
+        st.caption(_usage_summary(results["_meta"]["usage"]))
+        _warn_failover(results["_meta"])
+        if _routing_summary(results["_meta"]):
+            st.caption(_routing_summary(results["_meta"]))
+        if _chunking_summary(results["_meta"]):
+            st.caption(_chunking_summary(results["_meta"]))
         if detected and direction:
             st.info(f"Detected: **{detected}** → Translating: **{direction}**")
 
     # -------- RENDER --------
-    results = st.session_state["results"]
     edited_outputs = st.session_state["edited_outputs"]
-    labels = [k for k in results.keys() if k != "_meta"]
+    structured_file = st.session_state.get("structured_file")
+    labels = list(edited_outputs.keys())
 
     tab_review, _ = st.tabs(["Review", ""])
 
     with tab_review:
         st.markdown("## 📝 Review outputs (side-by-side)")
 
-        def render_stage(title, key, show_titles=False):
+        aligned = False
+        if len(labels) == 2 and not structured_file:
+            view = st.radio("View", ["Side by side", "Aligned sentences"], horizontal=True)
+            aligned = view == "Aligned sentences"
+
+        def render_segments_stage(title, key):
+            # Structured files are kept whole: the download needs the rendered file
             st.markdown(f"### {title}")
             cols = st.columns(len(labels))
 
             for col, label in zip(cols, labels):
                 with col:
                     st.markdown(f"### 🤖 {label}")
+                    text = _load_output(edited_outputs[label][key])
                     st.text_area(
                         f"{label}_{key}",
-                        edited_outputs[label][key],
+                        text,
                         height=360,
                         label_visibility="collapsed",
                     )
 
-                    if show_titles:
-                        st.markdown("**Title suggestions:**")
-                        if edited_outputs[label]["titles"]:
-                            for i, t in enumerate(edited_outputs[label]["titles"], 1):
-                                st.write(f"{i}. {t}")
-                        else:
-                            st.caption("No title suggestions could be generated.")
-
-        render_stage("📘 Literal + cultural notes (copyedited)", "literal")
-        render_stage(
-            "📗 Neutral reader-friendly (copyedited)",
-            "neutral",
-            show_titles=True,
-        )
+                    base, ext = os.path.splitext(structured_file["name"])
+                    st.download_button(
+                        f"Download .{structured_file['kind']}",
+                        text,
+                        file_name=f"{base}.{key}.{label.replace(' ', '_')}{ext}",
+                        key=f"dl_{label}_{key}",
+                    )
 
-    if cfg.debug:
-        st.markdown("### Debug (_meta)")
-        st.json(results.get("_meta", {}))
+        with span("render"):
+            if structured_file:
+                render_segments_stage("📘 Literal + cultural notes (segments)", "literal")
+                render_segments_stage("📗 Neutral reader-friendly (segments)", "neutral")
+            else:
+                stage = _render_aligned_stage if aligned else _render_paged_stage
+                stage("📘 Literal + cultural notes (copyedited)", "literal", edited_outputs)
+                stage(
+                    "📗 Neutral reader-friendly (copyedited)",
+                    "neutral",
+                    edited_outputs,
+                    show_titles=True,
+                )
+
+    return bool(submitted)
 
 
 if __name__ == "__main__":
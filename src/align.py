@@ -0,0 +1,244 @@
+from __future__ import annotations
+
+import difflib
+import html
+import re
+from dataclasses import dataclass
+from typing import FrozenSet, List, Optional, Sequence, Tuple
+
+from .memory import split_sentences
+
+# Half-width (in sentences) of the band the alignment DP explores around the
+# expected path. Two translations of one text rarely drift further than this.
+DEFAULT_BAND = 12
+
+_GAP = 0.8  # sentence present on one side only
+_MERGE_PENALTY = 0.15  # 2:1 / 1:2, so genuine 1:1 pairs win ties
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+_TOKEN_RE = re.compile(r"\S+")
+
+
+@dataclass(frozen=True)
+class AlignedPair:
+    left: str  # one or two sentences, "" for a gap
+    right: str
+    score: float  # similarity in [0, 1]; 0 for gaps
+
+
+def _words(sentence: str) -> FrozenSet[str]:
+    return frozenset(w.casefold() for w in _WORD_RE.findall(sentence))
+
+
+def _score(inter: int, size_a: int, size_b: int, len_a: int, len_b: int) -> float:
+    """Similarity in [0, 1]: word-set Jaccard, blended with the length ratio."""
+    inter = min(inter, size_a, size_b)  # merged sides sum their intersections: may overcount
+    union = size_a + size_b - inter
+    jaccard = inter / union if union else 1.0
+    ratio = min(len_a, len_b) / max(len_a, len_b, 1)
+    return 0.8 * jaccard + 0.2 * ratio
+
+
+def _centers(left: Sequence[str], right: Sequence[str]) -> List[int]:
+    """For each left boundary i, the right boundary at the same relative character offset.
+
+    Character offsets drift far less than sentence counts when one side
+    splits or merges sentences, so the band can stay narrow around them.
+    """
+    total_l = sum(len(s) + 1 for s in left) or 1
+    total_r = sum(len(s) + 1 for s in right) or 1
+    right_starts = []
+    pos = 0
+    for s in right:
+        right_starts.append(pos / total_r)
+        pos += len(s) + 1
+
+    centers = [0]
+    pos, j = 0, 0
+    for s in left:
+        pos += len(s) + 1
+        frac = pos / total_l
+        while j < len(right) and right_starts[j] < frac:
+            j += 1
+        centers.append(j)
+    centers[-1] = len(right)
+    return centers
+
+
+def align_sentences(left: Sequence[str], right: Sequence[str], band: int = DEFAULT_BAND) -> List[AlignedPair]:
+    """Monotone sentence alignment (1:1, 1:0, 0:1, 2:1, 1:2) by banded dynamic programming.
+
+    Only cells within `band` sentences of the expected path (matching
+    character offsets) are filled, so cost is O((n + m) * band) rather than
+    O(n * m). Each cell computes one word-set intersection; the 2:1 and 1:2
+    moves reuse their neighbours' intersections.
+    """
+    n, m = len(left), len(right)
+    if n == 0 or m == 0:
+        return [AlignedPair(s, "", 0.0) for s in left] + [AlignedPair("", s, 0.0) for s in right]
+
+    lw = [_words(s) for s in left]
+    rw = [_words(s) for s in right]
+    ls = [len(w) for w in lw]
+    rs = [len(w) for w in rw]
+    ll = [len(s) for s in left]
+    rl = [len(s) for s in right]
+
+    centers = _centers(left, right)
+    inf = float("inf")
+
+    # Per row i: first column lo[i], then per cell the path cost, the back
+    # pointer (di, dj, similarity) and |words(left[i-1]) & words(right[j-1])|
+    lo: List[int] = []
+    cost: List[List[float]] = []
+    back: List[List[Tuple[int, int, float]]] = []
+    inter: List[List[int]] = []
+
+    def cell(table: List[list], i: int, j: int, default):
+        k = j - lo[i]
+        row = table[i]
+        return row[k] if 0 <= k < len(row) else default
+
+    for i in range(n + 1):
+        # Windows of consecutive rows overlap even where the expected path jumps
+        a = max(0, min(centers[max(i - 1, 0)], centers[i]) - band)
+        b = min(m, max(centers[i], centers[min(i + 1, n)]) + band)
+        if i == n:
+            b = m
+        lo.append(a)
+        width = b - a + 1
+        row_cost = [inf] * width
+        row_back: List[Tuple[int, int, float]] = [(0, 0, 0.0)] * width
+        row_inter = [0] * width
+        wa = lw[i - 1] if i >= 1 else None
+
+        for k in range(width):
+            j = a + k
+            if i == 0 and j == 0:
+                row_cost[0] = 0.0
+                continue
+
+            best, step = inf, (0, 0, 0.0)
+
+            if i >= 1:  # left sentence alone
+                c = cell(cost, i - 1, j, inf) + _GAP
+                if c < best:
+                    best, step = c, (1, 0, 0.0)
+            if k >= 1:  # right sentence alone
+                c = row_cost[k - 1] + _GAP
+                if c < best:
+                    best, step = c, (0, 1, 0.0)
+
+            if i >= 1 and j >= 1:
+                x = len(wa & rw[j - 1])
+                row_inter[k] = x
+
+                prev = cell(cost, i - 1, j - 1, inf)
+                if prev < inf:
+                    sim = _score(x, ls[i - 1], rs[j - 1], ll[i - 1], rl[j - 1])
+                    c = prev + 1.0 - sim
+                    if c < best:
+                        best, step = c, (1, 1, sim)
+
+                if i >= 2:  # left[i-2] + left[i-1] : right[j-1]
+                    prev = cell(cost, i - 2, j - 1, inf)
+                    if prev < inf:
+                        x2 = x + cell(inter, i - 1, j, 0)
+                        sim = _score(x2, ls[i - 2] + ls[i - 1], rs[j - 1], ll[i - 2] + ll[i - 1], rl[j - 1])
+                        c = prev + 1.0 - sim + _MERGE_PENALTY
+                        if c < best:
+                            best, step = c, (2, 1, sim)
+
+                if j >= 2 and k >= 1:  # left[i-1] : right[j-2] + right[j-1]
+                    prev = cell(cost, i - 1, j - 2, inf)
+                    if prev < inf:
+                        x2 = x + row_inter[k - 1]
+                        sim = _score(x2, ls[i - 1], rs[j - 2] + rs[j - 1], ll[i - 1], rl[j - 2] + rl[j - 1])
+                        c = prev + 1.0 - sim + _MERGE_PENALTY
+                        if c < best:
+                            best, step = c, (1, 2, sim)
+
+            row_cost[k] = best
+            row_back[k] = step
+
+        cost.append(row_cost)
+        back.append(row_back)
+        inter.append(row_inter)
+
+    pairs: List[AlignedPair] = []
+    i, j = n, m
+    while i > 0 or j > 0:
+        di, dj, sim = back[i][j - lo[i]]
+        if di == 0 and dj == 0:
+            raise RuntimeError("Alignment path left the band.")
+        pairs.append(AlignedPair(" ".join(left[i - di : i]), " ".join(right[j - dj : j]), round(min(sim, 1.0), 3)))
+        i, j = i - di, j - dj
+
+    pairs.reverse()
+    return pairs
+
+
+def align_texts(left_text: str, right_text: str, band: int = DEFAULT_BAND) -> List[AlignedPair]:
+    return align_sentences(split_sentences(left_text), split_sentences(right_text), band=band)
+
+
+def word_diff(left: str, right: str) -> Tuple[List[Tuple[str, bool]], List[Tuple[str, bool]]]:
+    """Word-level diff of one aligned pair: (token, changed) lists for each side."""
+    a, b = _TOKEN_RE.findall(left), _TOKEN_RE.findall(right)
+    a_cmp = [t.casefold() for t in a]
+    b_cmp = [t.casefold() for t in b]
+    out_a = [(t, True) for t in a]
+    out_b = [(t, True) for t in b]
+    for block in difflib.SequenceMatcher(None, a_cmp, b_cmp, autojunk=False).get_matching_blocks():
+        for k in range(block.size):
+            out_a[block.a + k] = (a[block.a + k], False)
+            out_b[block.b + k] = (b[block.b + k], False)
+    return out_a, out_b
+
+
+def _marked(tokens: List[Tuple[str, bool]], cls: str) -> str:
+    return " ".join(f'<span class="{cls}">{html.escape(t)}</span>' if changed else html.escape(t) for t, changed in tokens)
+
+
+_CSS = """
+<style>
+.ytali-align { width: 100%; border-collapse: collapse; font-size: 0.92rem; }
+.ytali-align th { text-align: left; padding: 6px 8px; border-bottom: 2px solid #ddd; }
+.ytali-align td { vertical-align: top; padding: 6px 8px; border-bottom: 1px solid #eee; width: 50%; }
+.ytali-align tr.same td { color: #666; }
+.ytali-align tr.gap td { background: #fff8e6; }
+.ytali-align .l { background: #ffe3e3; border-radius: 3px; }
+.ytali-align .r { background: #dcf5e3; border-radius: 3px; }
+</style>
+"""
+
+
+def render_aligned_html(
+    pairs: List[AlignedPair],
+    left_label: str,
+    right_label: str,
+    only_differences: bool = False,
+    limit: Optional[int] = None,
+) -> str:
+    """Two-column table, one aligned pair per row, differing words highlighted."""
+    rows = []
+    for pair in pairs:
+        if pair.left == pair.right:
+            if only_differences:
+                continue
+            cells, cls = (html.escape(pair.left), html.escape(pair.right)), "same"
+        elif not pair.left or not pair.right:
+            cells, cls = (html.escape(pair.left), html.escape(pair.right)), "gap"
+        else:
+            a, b = word_diff(pair.left, pair.right)
+            cells, cls = (_marked(a, "l"), _marked(b, "r")), "diff"
+        rows.append(f'<tr class="{cls}"><td>{cells[0]}</td><td>{cells[1]}</td></tr>')
+        if limit is not None and len(rows) >= limit:
+            break
+
+    return (
+        _CSS
+        + '<table class="ytali-align">'
+        + f"<tr><th>{html.escape(left_label)}</th><th>{html.escape(right_label)}</th></tr>"
+        + "".join(rows)
+        + "</table>"
+    )
@@ -0,0 +1,487 @@
+"""HTTP API for the translation pipeline (for other newsroom systems).
+
+    python -m src.api --port 8600            # real providers (OPENAI_API_KEY / GEMINI_API_KEY)
+    python -m src.api --port 8600 --standin  # local stand-in providers, no keys or network
+
+Endpoints (JSON in, JSON or NDJSON out):
+  POST   /v1/translate        {"text", "run_mode"?, "copyedit"?, "translation_memory"?, "shared_context"?}
+  POST   /v1/copyedit         {"text", "target_language"}
+  GET    /v1/jobs/{id}        status, progress and (when done) the result
+  GET    /v1/jobs/{id}/events progress events as NDJSON, until the job ends
+  DELETE /v1/jobs/{id}        cancel
+  GET    /healthz             provider circuit breakers and latency estimates
+
+POST endpoints run the job and answer with the final JSON; `?stream=1`
+streams NDJSON progress events instead (the last line is the result), and
+`?async=1` answers 202 with the job id right away. Work runs on a bounded
+thread pool, so many requests can be in flight at once.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import hmac
+import json
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Deque, Dict, List, Optional, Tuple
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+from .config import AppSettings
+from .pipeline import copyedit_results, direction_to_language, safe_copyedit, store_outputs
+from .providers import StandInProfile, health_snapshot, new_usage, routing_snapshot, use_standin
+from .run_context import RunCancelled, RunContext
+from .store import get_result_store
+from .translate import new_run_context, run_translation
+
+DEFAULT_MAX_BODY_BYTES = 2 * 1024 * 1024
+DEFAULT_MAX_CHARS = 200_000
+DEFAULT_WORKERS = 8
+DEFAULT_MAX_PENDING = 64
+JOB_TTL_S = 3600.0
+EXPIRE_EVERY_S = 60.0
+MAX_JOB_EVENTS = 500  # per job; older events are dropped (the final status event is always last)
+_POLL_S = 0.2
+
+RUN_MODES = ("Compare (Gemini vs OpenAI)", "Gemini only", "OpenAI only", "Auto (fastest)")
+
+
+class ApiError(Exception):
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+class Job:
+    """One translate / copyedit request; events are appended by the worker thread."""
+
+    def __init__(self, kind: str) -> None:
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.status = "queued"
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.progress = 0
+        self.events: Deque[Dict[str, Any]] = deque(maxlen=MAX_JOB_EVENTS)
+        self.event_count = 0  # events emitted so far, including dropped ones
+        self._events_lock = threading.Lock()
+        self.error: Optional[str] = None
+        self.meta: Dict[str, Any] = {}
+        self.outputs: Dict[str, Dict[str, Any]] = {}
+        self.ctx: Optional[RunContext] = None
+
+    @property
+    def store_session(self) -> str:
+        return f"api-{self.id}"
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "failed", "cancelled")
+
+    def emit(self, event: str, **data: Any) -> None:
+        record = {"event": event, "t": round(time.time() - self.created_at, 3), **data}
+        with self._events_lock:
+            self.events.append(record)
+            self.event_count += 1
+
+    def events_since(self, seq: int) -> Tuple[int, List[Dict[str, Any]]]:
+        """Events from number `seq` on: (number of the first one returned, events).
+
+        The first number is above `seq` when older events were already dropped.
+        """
+        with self._events_lock:
+            first = self.event_count - len(self.events)
+            start = max(seq, first)
+            return start, list(self.events)[start - first :]
+
+    def progress_sink(self) -> "_JobProgress":
+        return _JobProgress(self)
+
+    def to_dict(self, with_result: bool = True) -> Dict[str, Any]:
+        out: Dict[str, Any] = {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "progress": self.progress,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+        if self.error:
+            out["error"] = self.error
+        if with_result and self.status == "done":
+            store = get_result_store()
+            outputs: Dict[str, Any] = {}
+            for label, handles in self.outputs.items():
+                outputs[label] = {
+                    "literal": store.get(handles["literal"]) if handles.get("literal") else None,
+                    "neutral": store.get(handles["neutral"]) if handles.get("neutral") else None,
+                    "titles": handles.get("titles", []),
+                }
+            if self.kind == "copyedit":
+                edited = outputs.get("editor", {})
+                out["result"] = {"meta": self.meta, "edited_text": edited.get("neutral"), "titles": edited.get("titles", [])}
+            else:
+                out["result"] = {"meta": self.meta, "outputs": outputs}
+        return out
+
+
+class _JobProgress:
+    """Stands in for st.progress: run_translation reports through it."""
+
+    def __init__(self, job: Job) -> None:
+        self.job = job
+
+    def progress(self, value: int, text: str = "") -> None:
+        self.job.progress = int(value)
+        self.job.emit("progress", value=int(value), text=text)
+
+
+class JobManager:
+    """Runs jobs on a bounded thread pool and keeps them (and their stored outputs) for JOB_TTL_S."""
+
+    def __init__(self, workers: int = DEFAULT_WORKERS, max_pending: int = DEFAULT_MAX_PENDING) -> None:
+        self.max_pending = max_pending
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ytali-api")
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+
+    def get(self, job_id: str) -> Job:
+        self.expire()
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None:
+            raise ApiError(404, f"Unknown job: {job_id}")
+        return job
+
+    def submit(self, job: Job, work: Callable[[Job], None]) -> "asyncio.Future[None]":
+        self.expire()
+        with self._lock:
+            pending = sum(1 for j in self._jobs.values() if not j.finished)
+            if pending >= self.max_pending:
+                raise ApiError(503, "Too many jobs in progress, retry later.")
+            self._jobs[job.id] = job
+        return asyncio.get_running_loop().run_in_executor(self._pool, self._run, job, work)
+
+    def cancel(self, job: Job) -> None:
+        if job.ctx is not None:
+            job.ctx.cancel("cancelled via API")
+        if job.status == "queued":
+            job.finished_at = time.time()
+            job.emit("cancelled")
+            job.status = "cancelled"
+
+    def _run(self, job: Job, work: Callable[[Job], None]) -> None:
+        if job.status == "cancelled":
+            return
+        job.status = "running"
+        job.started_at = time.time()
+        job.emit("started")
+        try:
+            work(job)
+        except RunCancelled as e:
+            status = "cancelled"
+            job.error = str(e)
+        except Exception as e:
+            status = "failed"
+            job.error = f"{type(e).__name__}: {e}"
+        else:
+            status = "done"
+            job.progress = 100
+        job.finished_at = time.time()
+        # Final event before the status flips, so a reader that sees `finished` already has it
+        job.emit(status, **({"error": job.error} if job.error else {}))
+        job.status = status
+
+    def expire(self) -> None:
+        """Drop jobs (and their stored outputs) finished more than JOB_TTL_S ago."""
+        cutoff = time.time() - JOB_TTL_S
+        with self._lock:
+            expired = [j for j in self._jobs.values() if j.finished and (j.finished_at or 0) < cutoff]
+            for j in expired:
+                del self._jobs[j.id]
+        for j in expired:
+            get_result_store().drop_session(j.store_session)
+
+
+# -------------------------
+# Work
+# -------------------------
+def _settings(body: Dict[str, Any]) -> AppSettings:
+    settings = AppSettings(
+        header_logo_path=None,
+        watermark_logo_path=None,
+        watermark_size_px=0,
+        watermark_opacity=0.0,
+        openai_api_key=os.getenv("OPENAI_API_KEY", ""),
+        gemini_api_key=os.getenv("GEMINI_API_KEY", ""),
+        run_mode=str(body.get("run_mode") or os.getenv("YTALI_API_RUN_MODE") or RUN_MODES[0]),
+        save_local=False,
+        translation_memory=bool(body.get("translation_memory", True)),
+        shared_context=str(body.get("shared_context") or ""),
+    )
+    settings.validate()
+    return settings
+
+
+def _translate_work(settings: AppSettings, text: str, copyedit: bool) -> Callable[[Job], None]:
+    def work(job: Job) -> None:
+        job.ctx = ctx = new_run_context(settings)
+        results = run_translation(settings, text=text, progress=job.progress_sink(), ctx=ctx)
+
+        if copyedit:
+            job.emit("copyedit")
+            target_lang = direction_to_language(results["_meta"].get("direction") or "")
+            copyedit_usage = new_usage()
+            edited = copyedit_results(
+                results, target_lang, usage=copyedit_usage, ctx=ctx, profiles=settings.stage_profiles
+            )
+            results["_meta"]["usage"]["copyedit"] = copyedit_usage
+        else:
+            edited = {
+                label: {"literal": out["literal"], "neutral": out["neutral"], "titles": []}
+                for label, out in results.items()
+                if label != "_meta"
+            }
+
+        job.meta = results["_meta"]
+        job.outputs = store_outputs(job.store_session, edited)
+
+    return work
+
+
+def _copyedit_work(settings: AppSettings, text: str, target_language: str) -> Callable[[Job], None]:
+    def work(job: Job) -> None:
+        job.ctx = ctx = new_run_context(settings)
+        usage = new_usage()
+        errors: List[str] = []
+        edited = safe_copyedit(
+            text,
+            target_language,
+            usage=usage,
+            ctx=ctx,
+            on_error=lambda e: errors.append(str(e)),
+            profiles=settings.stage_profiles,
+        )
+        if errors:
+            raise RuntimeError(errors[0])
+        job.meta = {"target_language": target_language, "usage": {"copyedit": usage}}
+        job.outputs = store_outputs(
+            job.store_session,
+            {"editor": {"literal": "", "neutral": edited["edited_text"], "titles": edited["title_suggestions"][:1]}},
+        )
+
+    return work
+
+
+# -------------------------
+# HTTP
+# -------------------------
+def _error(status: int, message: str) -> JSONResponse:
+    return JSONResponse({"error": message}, status_code=status)
+
+
+async def _read_json(request: Request, max_body_bytes: int) -> Dict[str, Any]:
+    declared = request.headers.get("content-length")
+    if declared and declared.isdigit() and int(declared) > max_body_bytes:
+        raise ApiError(413, f"Request body over {max_body_bytes} bytes.")
+
+    chunks, size = [], 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > max_body_bytes:
+            raise ApiError(413, f"Request body over {max_body_bytes} bytes.")
+        chunks.append(chunk)
+
+    try:
+        body = json.loads(b"".join(chunks) or b"{}")
+    except ValueError:
+        raise ApiError(400, "Body must be JSON.")
+    if not isinstance(body, dict):
+        raise ApiError(400, "Body must be a JSON object.")
+    return body
+
+
+def _text_field(body: Dict[str, Any], max_chars: int) -> str:
+    text = body.get("text")
+    if not isinstance(text, str) or not text.strip():
+        raise ApiError(400, "Field 'text' is required.")
+    if len(text) > max_chars:
+        raise ApiError(413, f"Field 'text' is over {max_chars} characters.")
+    return text.strip()
+
+
+def _flag(request: Request, name: str) -> bool:
+    return request.query_params.get(name, "").lower() in ("1", "true", "yes")
+
+
+async def _expire_periodically(jobs: JobManager) -> None:
+    # Lookups and submits expire jobs too; this covers an API nobody calls for a while
+    while True:
+        await asyncio.sleep(EXPIRE_EVERY_S)
+        jobs.expire()
+
+
+async def _job_events(job: Job, request: Optional[Request] = None) -> AsyncIterator[bytes]:
+    sent = 0
+    while True:
+        finished = job.finished  # read before the events, so the final event is in this batch
+        start, events = job.events_since(sent)
+        if start > sent:
+            yield (json.dumps({"event": "dropped", "count": start - sent}) + "\n").encode("utf-8")
+        for event in events:
+            yield (json.dumps(event, ensure_ascii=False) + "\n").encode("utf-8")
+        sent = start + len(events)
+        if finished and sent >= job.event_count:
+            return
+        if request is not None and await request.is_disconnected():
+            return
+        await asyncio.sleep(_POLL_S)
+
+
+def create_app(
+    jobs: Optional[JobManager] = None,
+    max_body_bytes: int = DEFAULT_MAX_BODY_BYTES,
+    max_chars: int = DEFAULT_MAX_CHARS,
+    token: Optional[str] = None,
+) -> Starlette:
+    """Build the ASGI app. `token`, when set, is required as `Authorization: Bearer <token>`."""
+    jobs = jobs or JobManager()
+
+    expected_auth = f"Bearer {token}".encode("utf-8") if token else None
+
+    def guarded(handler: Callable[[Request], Any]) -> Callable[[Request], Any]:
+        async def endpoint(request: Request) -> Response:
+            if expected_auth is not None and not hmac.compare_digest(
+                request.headers.get("authorization", "").encode("utf-8"), expected_auth
+            ):
+                return _error(401, "Missing or invalid bearer token.")
+            try:
+                return await handler(request)
+            except ApiError as e:
+                return _error(e.status, str(e))
+            except ValueError as e:  # settings validation
+                return _error(400, str(e))
+
+        return endpoint
+
+    async def start(request: Request, job: Job, work: Callable[[Job], None]) -> Response:
+        future = jobs.submit(job, work)
+
+        if _flag(request, "async"):
+            return JSONResponse(job.to_dict(with_result=False), status_code=202, headers={"Location": f"/v1/jobs/{job.id}"})
+
+        if _flag(request, "stream"):
+
+            async def body() -> AsyncIterator[bytes]:
+                try:
+                    async for line in _job_events(job, request):
+                        yield line
+                    if job.finished:
+                        yield (json.dumps({"event": "result", "job": job.to_dict()}, ensure_ascii=False) + "\n").encode("utf-8")
+                finally:
+                    # Client went away: either seen by _job_events, or Starlette closed this generator
+                    if not job.finished:
+                        jobs.cancel(job)
+
+            return StreamingResponse(body(), media_type="application/x-ndjson")
+
+        while not future.done():
+            await asyncio.wait({future}, timeout=_POLL_S)
+            if not future.done() and await request.is_disconnected():
+                jobs.cancel(job)  # nobody is left to read the result
+                return Response(status_code=499)
+        return JSONResponse(job.to_dict(), status_code=200 if job.status == "done" else 500)
+
+    async def translate(request: Request) -> Response:
+        body = await _read_json(request, max_body_bytes)
+        text = _text_field(body, max_chars)
+        if body.get("run_mode") is not None and body["run_mode"] not in RUN_MODES:
+            raise ApiError(400, f"run_mode must be one of: {', '.join(RUN_MODES)}")
+        settings = _settings(body)
+        return await start(request, Job("translate"), _translate_work(settings, text, bool(body.get("copyedit", True))))
+
+    async def copyedit(request: Request) -> Response:
+        body = await _read_json(request, max_body_bytes)
+        text = _text_field(body, max_chars)
+        target_language = body.get("target_language")
+        if target_language not in ("English", "Italian"):
+            raise ApiError(400, "Field 'target_language' must be 'English' or 'Italian'.")
+        settings = _settings({"run_mode": "OpenAI only"})
+        return await start(request, Job("copyedit"), _copyedit_work(settings, text, target_language))
+
+    async def job_status(request: Request) -> Response:
+        return JSONResponse(jobs.get(request.path_params["job_id"]).to_dict())
+
+    async def job_events(request: Request) -> Response:
+        job = jobs.get(request.path_params["job_id"])
+        return StreamingResponse(_job_events(job, request), media_type="application/x-ndjson")
+
+    async def job_cancel(request: Request) -> Response:
+        job = jobs.get(request.path_params["job_id"])
+        jobs.cancel(job)
+        return JSONResponse(job.to_dict(with_result=False), status_code=202)
+
+    async def healthz(request: Request) -> Response:
+        return JSONResponse({"providers": health_snapshot(), "latency": routing_snapshot()})
+
+    @contextlib.asynccontextmanager
+    async def lifespan(app: Starlette) -> AsyncIterator[None]:
+        task = asyncio.create_task(_expire_periodically(jobs))
+        try:
+            yield
+        finally:
+            task.cancel()
+
+    return Starlette(
+        lifespan=lifespan,
+        routes=[
+            Route("/v1/translate", guarded(translate), methods=["POST"]),
+            Route("/v1/copyedit", guarded(copyedit), methods=["POST"]),
+            Route("/v1/jobs/{job_id}", guarded(job_status), methods=["GET"]),
+            Route("/v1/jobs/{job_id}/events", guarded(job_events), methods=["GET"]),
+            Route("/v1/jobs/{job_id}", guarded(job_cancel), methods=["DELETE"]),
+            Route("/healthz", healthz, methods=["GET"]),
+        ]
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(prog="python -m src.api", description="YTALI translation HTTP API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8600)
+    parser.add_argument("--workers", type=int, default=int(os.getenv("YTALI_API_WORKERS", DEFAULT_WORKERS)))
+    parser.add_argument("--max-body-bytes", type=int, default=DEFAULT_MAX_BODY_BYTES)
+    parser.add_argument("--max-chars", type=int, default=DEFAULT_MAX_CHARS)
+    parser.add_argument("--standin", action="store_true", help="use local stand-in providers (no keys, no network)")
+    args = parser.parse_args(argv)
+
+    if args.standin:
+        use_standin(StandInProfile.from_env())
+        os.environ.setdefault("OPENAI_API_KEY", "standin")
+        os.environ.setdefault("GEMINI_API_KEY", "standin")
+
+    app = create_app(
+        JobManager(workers=args.workers),
+        max_body_bytes=args.max_body_bytes,
+        max_chars=args.max_chars,
+        token=os.getenv("YTALI_API_TOKEN") or None,
+    )
+    uvicorn.run(app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
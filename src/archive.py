@@ -0,0 +1,221 @@
+"""Append-only on-disk run archive (AppSettings.save_local).
+
+Every run gets one `<started>-<run id>.ndjson.gz` file under
+$YTALI_ARCHIVE_DIR (default: ./runs); older archives are pruned by age and
+total size when a run starts (`prune_archives`). Records are written as soon as the
+work they describe finishes, one JSON object per line:
+
+    {"kind": "run", ...}        direction, run mode, models, stage profiles
+    {"kind": "plan", ...}       per model: chunk count and the dedup order
+    {"kind": "chunk", ...}      per (model, chunk, style): source, output, time, failed checks
+    {"kind": "segments", ...}   per model of a segment run: both styles
+    {"kind": "copyedit", ...}   per model: edited literal / neutral, title, time
+    {"kind": "end", ...}        status, final _meta, timings
+
+Each append is its own gzip member, so the file is valid after every write
+and a crash loses at most the record being written; `read_archive` stops
+quietly at a torn tail. The archive is written in addition to the run's
+in-memory results, not instead of them: it adds durability, not a lower peak
+memory. The archive can rebuild a run's translations
+(`restore_results`), seed the translation memory (`seed_translation_memory`)
+and feed the benchmark its source texts (`archived_sources`).
+"""
+
+from __future__ import annotations
+
+import glob
+import gzip
+import json
+import os
+import threading
+import time
+import uuid
+import zlib
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from .memory import TranslationMemory, get_translation_memory, tm_namespace
+from .pruning import env_limits, prune_files
+from .run_context import RunCancelled
+
+ARCHIVE_SUFFIX = ".ndjson.gz"
+DEFAULT_MAX_AGE_DAYS = 14.0
+DEFAULT_MAX_MB = 500.0
+
+
+def archive_dir() -> str:
+    return os.getenv("YTALI_ARCHIVE_DIR") or os.path.join(os.getcwd(), "runs")
+
+
+def prune_archives(
+    directory: Optional[str] = None,
+    max_age_days: Optional[float] = None,
+    max_bytes: Optional[int] = None,
+) -> List[str]:
+    """Delete archives older than `max_age_days`, then the oldest until the rest fit in `max_bytes`.
+
+    Limits default to YTALI_ARCHIVE_MAX_AGE_DAYS / YTALI_ARCHIVE_MAX_MB (0 disables one).
+    Returns the deleted paths.
+    """
+    env_age_days, env_bytes = env_limits("YTALI_ARCHIVE", DEFAULT_MAX_AGE_DAYS, DEFAULT_MAX_MB)
+    return prune_files(
+        list_archives(directory),
+        env_age_days if max_age_days is None else max_age_days,
+        env_bytes if max_bytes is None else max_bytes,
+    )
+
+
+class RunArchive:
+    """One run's archive file; `append` is thread-safe (chunk requests finish on worker threads)."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+
+    @classmethod
+    def create(cls, directory: Optional[str] = None) -> "RunArchive":
+        directory = directory or archive_dir()
+        os.makedirs(directory, exist_ok=True)
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}{ARCHIVE_SUFFIX}"
+        prune_archives(directory)
+        return cls(os.path.join(directory, name))
+
+    def append(self, kind: str, **fields: Any) -> None:
+        record = {"kind": kind, "t": round(time.time(), 3), **fields}
+        line = json.dumps(record, ensure_ascii=False, default=str) + "\n"
+        member = gzip.compress(line.encode("utf-8"), compresslevel=6)
+        with self._lock:
+            with open(self.path, "ab") as f:
+                f.write(member)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def finish(self, meta: Dict[str, Any], status: str = "ok", **timings: float) -> None:
+        """Close the run: its final `_meta` and stage timings (seconds)."""
+        self.append("end", status=status, meta=meta, timings=timings)
+
+
+def open_archive(path: Optional[str]) -> Optional[RunArchive]:
+    """The archive a run's `_meta["archive"]` points to, to keep appending (e.g. copyedit)."""
+    return RunArchive(path) if path else None
+
+
+@contextmanager
+def record_failure(archive: Optional[RunArchive]) -> Iterator[None]:
+    """If the block raises (cancel, deadline, provider error), close the archive with that status."""
+    try:
+        yield
+    except BaseException as e:
+        if archive is not None:
+            status = "cancelled" if isinstance(e, RunCancelled) else "failed"
+            archive.append("end", status=status, error=f"{type(e).__name__}: {e}"[:500])
+        raise
+
+
+def read_archive(path: str) -> Iterator[Dict[str, Any]]:
+    """Records in write order; a record torn by a crash (and anything after it) is skipped."""
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return
+    while data:
+        member = zlib.decompressobj(wbits=31)  # one gzip member per append
+        try:
+            raw = member.decompress(data)
+        except zlib.error:
+            return
+        if not member.eof:
+            return
+        for line in raw.decode("utf-8").splitlines():
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                return
+        data = member.unused_data
+
+
+def list_archives(directory: Optional[str] = None) -> List[str]:
+    """Archive files, oldest first."""
+    return sorted(glob.glob(os.path.join(directory or archive_dir(), "*" + ARCHIVE_SUFFIX)))
+
+
+def restore_results(path: str) -> Dict[str, Any]:
+    """Rebuild run_translation's result shape from an archive, complete or not.
+
+    Chunks that never finished are left empty. Copyedited text, when
+    archived, is under each model's "edited" key.
+    """
+    run: Dict[str, Any] = {}
+    plans: Dict[str, Dict[str, Any]] = {}
+    chunks: Dict[str, Dict[str, Dict[int, str]]] = {}
+    results: Dict[str, Any] = {"_meta": {}}
+
+    for record in read_archive(path):
+        kind = record["kind"]
+        if kind == "run":
+            run = record
+        elif kind == "plan":
+            plans[record["label"]] = record
+        elif kind == "chunk":
+            by_style = chunks.setdefault(record["label"], {"literal": {}, "neutral": {}})
+            by_style[record["style"]][record["chunk"]] = record["output"]
+        elif kind == "segments":
+            results[record["label"]] = {"literal": record["literal"], "neutral": record["neutral"]}
+        elif kind == "copyedit":
+            results.setdefault(record["label"], {})["edited"] = {
+                "literal": record["literal"],
+                "neutral": record["neutral"],
+                "titles": record["titles"],
+            }
+        elif kind == "end":
+            results["_meta"] = record.get("meta") or {}
+            results["_meta"]["status"] = record.get("status")
+
+    results["_meta"].setdefault("direction", run.get("direction"))
+    results["_meta"].setdefault("status", "incomplete")
+
+    for label, by_style in chunks.items():
+        plan = plans.get(label, {})
+        n = plan.get("chunks") or max((max(parts, default=0) for parts in by_style.values()), default=0)
+        entry = results.setdefault(label, {})
+        for style, parts in by_style.items():
+            paras = [parts.get(i, "") for i in range(1, n + 1)]
+            order = plan.get("dedup_order")
+            if order:
+                unique = [p.strip() for part in paras for p in part.split("\n\n") if p.strip()]
+                if len(unique) == max(order) + 1:
+                    paras = [unique[i] for i in order]
+            entry[style] = "\n\n".join(p for p in paras if p)
+    return results
+
+
+def seed_translation_memory(paths: List[str], tm: Optional[TranslationMemory] = None) -> int:
+    """Learn sentence pairs from archived chunks that passed their output checks; returns pairs added."""
+    tm = tm or get_translation_memory()
+    added = 0
+    for path in paths:
+        source_lang = target_lang = ""
+        for record in read_archive(path):
+            if record["kind"] == "run":
+                source_lang, _, target_lang = (record.get("direction") or "").partition(" → ")
+            elif record["kind"] == "chunk" and source_lang and not record.get("unresolved"):
+                namespace = tm_namespace(source_lang, target_lang, record["style"], record["model"])
+                src = [p for p in record["source"].split("\n\n") if p.strip()]
+                out = [p for p in record["output"].split("\n\n") if p.strip()]
+                if len(src) == len(out):
+                    for sp, op in zip(src, out):
+                        added += tm.add_aligned(namespace, sp, op)
+    return added
+
+
+def archived_sources(paths: List[str], limit: Optional[int] = None) -> List[str]:
+    """Distinct source chunks from archives (e.g. realistic inputs for src/benchmark.py)."""
+    seen: Dict[str, None] = {}
+    for path in paths:
+        for record in read_archive(path):
+            if record["kind"] == "chunk":
+                seen.setdefault(record["source"], None)
+                if limit and len(seen) >= limit:
+                    return list(seen)
+    return list(seen)
@@ -0,0 +1,167 @@
+"""Latency / token benchmark of the per-stage latency profiles.
+
+Sends the same article through each stage's model call (literal and neutral
+translation, copyedit, title) once per latency profile preset and reports the
+latency and token trade-off:
+
+    python -m src.benchmark --provider openai --runs 3
+    python -m src.benchmark --standin --presets Balanced,Careful --time-scale 0.1
+    python -m src.benchmark --archive runs/ --runs 5   # source chunks of archived runs
+
+Real runs use OPENAI_API_KEY / GEMINI_API_KEY and cost tokens. Copyedit and
+title calls always go to OpenAI (the editor model); `--provider` picks the
+translation provider.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import time
+from typing import Any, Dict, List, Optional
+
+from .archive import archived_sources, list_archives
+from .config import STAGE_PROFILE_PRESETS, STAGES, AppSettings
+from .editor import _call_titles_only, copyedit_and_generate_titles, get_openai_client
+from .lang import decide_direction
+from .loadtest import _percentile, synthetic_article
+from .pipeline import direction_to_language
+from .prompts import literal_prompt, neutral_prompt
+from .providers import ModelConfig, StageProfile, StandInProfile, new_usage, translate_any, use_standin
+
+
+def _run_stage(
+    stage: str,
+    cfg: ModelConfig,
+    text: str,
+    profile: Optional[StageProfile],
+    usage: Dict[str, int],
+) -> str:
+    """One call of `stage`, as the pipeline makes it."""
+    lang = decide_direction(text)
+    if stage in ("literal", "neutral"):
+        prompt = literal_prompt if stage == "literal" else neutral_prompt
+        return translate_any(cfg, prompt(lang.source, lang.target), text, usage=usage, profile=profile)
+
+    target = direction_to_language(f"{lang.source} → {lang.target}")
+    if stage == "copyedit":
+        data = copyedit_and_generate_titles(text, target, usage=usage, copyedit_profile=profile)
+        return data["edited_text"]
+    return "\n".join(_call_titles_only(get_openai_client(), text, target, usage=usage, profile=profile))
+
+
+def bench_stage(
+    stage: str,
+    preset: str,
+    cfg: ModelConfig,
+    texts: List[str],
+) -> Dict[str, Any]:
+    """Run `stage` once per text with `preset`'s profile and summarize."""
+    profile = STAGE_PROFILE_PRESETS[preset].get(stage)
+    usage = new_usage()
+    latencies: List[float] = []
+    errors: List[str] = []
+
+    for text in texts:
+        t0 = time.perf_counter()
+        try:
+            _run_stage(stage, cfg, text, profile, usage)
+        except Exception as e:
+            errors.append(f"{type(e).__name__}: {e}".splitlines()[0][:200])
+            continue
+        latencies.append(time.perf_counter() - t0)
+
+    calls = max(usage["calls"], 1)
+    return {
+        "stage": stage,
+        "preset": preset,
+        "runs_ok": len(latencies),
+        "latency_p50_s": round(_percentile(latencies, 0.5), 3),
+        "latency_p95_s": round(_percentile(latencies, 0.95), 3),
+        "input_tokens_per_call": usage["input_tokens"] // calls,
+        "output_tokens_per_call": usage["output_tokens"] // calls,
+        "reasoning_tokens_per_call": usage["reasoning_tokens"] // calls,
+        "truncated": usage["truncated"],
+        "sample_errors": sorted(set(errors))[:3],
+    }
+
+
+def _print_table(rows: List[Dict[str, Any]]) -> None:
+    columns = [
+        ("stage", "stage"),
+        ("preset", "preset"),
+        ("runs_ok", "ok"),
+        ("latency_p50_s", "p50 s"),
+        ("latency_p95_s", "p95 s"),
+        ("input_tokens_per_call", "in tok"),
+        ("output_tokens_per_call", "out tok"),
+        ("reasoning_tokens_per_call", "reason tok"),
+        ("truncated", "truncated"),
+    ]
+    print("  ".join(f"{title:>17}" for _, title in columns))
+    for row in rows:
+        print("  ".join(f"{row[key]:>17}" for key, _ in columns))
+    for row in rows:
+        for err in row["sample_errors"]:
+            print(f"  [{row['stage']} / {row['preset']}] {err}")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m src.benchmark", description=__doc__.splitlines()[0])
+    parser.add_argument("--provider", choices=("openai", "gemini"), default="openai", help="translation provider")
+    parser.add_argument("--stages", default=",".join(STAGES), help="comma-separated stages")
+    parser.add_argument("--presets", default=",".join(STAGE_PROFILE_PRESETS), help="comma-separated presets")
+    parser.add_argument("--runs", type=int, default=3, help="calls per stage and preset")
+    parser.add_argument("--chars", type=int, default=3000, help="article length")
+    parser.add_argument("--standin", action="store_true", help="simulated provider, no API keys or network")
+    parser.add_argument("--time-scale", type=float, default=1.0, help="stand-in: multiply simulated latencies")
+    parser.add_argument("--archive", help="run archive file or directory: benchmark on its source chunks")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    stages = [s.strip() for s in args.stages.split(",") if s.strip()]
+    presets = [p.strip() for p in args.presets.split(",") if p.strip()]
+    for stage in stages:
+        if stage not in STAGES:
+            parser.error(f"unknown stage: {stage}")
+    for preset in presets:
+        if preset not in STAGE_PROFILE_PRESETS:
+            parser.error(f"unknown preset: {preset}")
+
+    if args.standin:
+        use_standin(StandInProfile(time_scale=args.time_scale))
+        api_key = "standin"
+    else:
+        api_key = os.getenv("OPENAI_API_KEY" if args.provider == "openai" else "GEMINI_API_KEY", "")
+        if not api_key:
+            parser.error(f"{args.provider} API key not set")
+    defaults = AppSettings(None, None, 190, 0.1, api_key, api_key, "OpenAI only")
+    cfg = ModelConfig(
+        provider=args.provider,
+        model=defaults.openai_model if args.provider == "openai" else defaults.gemini_model,
+        api_key=api_key,
+        label=args.provider,
+    )
+
+    # Same articles for every preset, so the rows differ only by profile
+    if args.archive:
+        paths = list_archives(args.archive) if os.path.isdir(args.archive) else [args.archive]
+        texts = archived_sources(paths, limit=args.runs)
+        if not texts:
+            parser.error(f"no archived chunks in {args.archive}")
+    else:
+        rng = random.Random(args.seed)
+        texts = [synthetic_article(args.chars, rng) for _ in range(args.runs)]
+
+    rows = []
+    for stage in stages:
+        for preset in presets:
+            rows.append(bench_stage(stage, preset, cfg, texts))
+            print(f"... {stage} / {preset} done", flush=True)
+
+    _print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
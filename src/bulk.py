@@ -0,0 +1,376 @@
+"""Offline bulk translation through the providers' batch endpoints.
+
+For archive backfills: every chunk request of every document goes into
+OpenAI Batch / Gemini batch jobs instead of live calls, which run against a
+separate, much larger quota. Batches are submitted, polled until done, and
+the results mapped back to documents and styles:
+
+    python -m src.bulk articles/ --out translated.jsonl --mode "OpenAI only"
+    python -m src.bulk articles.jsonl --out translated.jsonl --standin --time-scale 0.01
+
+Input is a directory of .txt files, one .txt file, or JSONL with {"id", "text"}.
+Output is JSONL, one line per document:
+    {"id", "detected_language", "direction", "outputs": {label: {"literal", "neutral"}}, "errors": [...]}
+
+Batch ids are kept in `<out>.manifest.json` until the output is written, so an
+interrupted run resumes polling instead of submitting again.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .config import AppSettings
+from .glossary import get_glossary
+from .lang import decide_direction
+from .prompts import glossary_block, literal_prompt, neutral_prompt, shared_context_block
+from .providers import ModelConfig, StandInProfile, new_usage, translate_any, use_standin
+from .providers.batch import COMPLETED, BatchBackend, BatchRequest, BatchResult, get_batch_backend
+from .text_utils import chunk_text, join_parts
+from .translate import AUTO_MODE, model_tasks
+
+DEFAULT_POLL_S = 30.0
+STYLES = ("literal", "neutral")
+
+
+@dataclass(frozen=True)
+class BulkDocument:
+    id: str
+    text: str
+
+
+def load_documents(path: str) -> List[BulkDocument]:
+    """A directory of .txt files, a single .txt file, or JSONL with {"id", "text"} per line."""
+    if os.path.isdir(path):
+        names = sorted(n for n in os.listdir(path) if n.lower().endswith(".txt"))
+        docs = []
+        for name in names:
+            with open(os.path.join(path, name), encoding="utf-8") as f:
+                docs.append(BulkDocument(os.path.splitext(name)[0], f.read()))
+        return docs
+
+    with open(path, encoding="utf-8") as f:
+        if not path.lower().endswith((".jsonl", ".ndjson")):
+            return [BulkDocument(os.path.splitext(os.path.basename(path))[0], f.read())]
+        docs = []
+        for n, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            if not isinstance(row.get("text"), str):
+                raise ValueError(f"{path}:{n}: missing \"text\".")
+            docs.append(BulkDocument(str(row.get("id", n)), row["text"]))
+        return docs
+
+
+@dataclass
+class _Prepared:
+    """Documents split into chunks, plus the request for every (document, chunk, style)."""
+
+    directions: List[Tuple[str, str, str]]  # (detected, source, target) per document
+    chunk_counts: List[int]
+    requests: List[BatchRequest]
+    fingerprint: str
+
+
+def _key(doc: int, chunk: int, style: str) -> str:
+    return f"{doc}|{chunk}|{style}"
+
+
+def _prepare(settings: AppSettings, documents: List[BulkDocument]) -> _Prepared:
+    glossary = get_glossary(settings.glossary_path or os.getenv("YTALI_GLOSSARY"))
+    instructions: Dict[Tuple[str, str], Dict[str, str]] = {}
+    directions: List[Tuple[str, str, str]] = []
+    chunk_counts: List[int] = []
+    requests: List[BatchRequest] = []
+    digest = hashlib.sha1()
+
+    for d, doc in enumerate(documents):
+        decision = decide_direction(doc.text)
+        directions.append((decision.detected, decision.source, decision.target))
+        pair = (decision.source, decision.target)
+        if pair not in instructions:
+            inst = {"literal": literal_prompt(*pair), "neutral": neutral_prompt(*pair)}
+            if settings.shared_context.strip():
+                inst = {style: text + shared_context_block(settings.shared_context) for style, text in inst.items()}
+            instructions[pair] = inst
+
+        chunks = chunk_text(doc.text, settings.chunk_chars)
+        chunk_counts.append(len(chunks))
+        for c, chunk in enumerate(chunks):
+            hits = glossary.find_terms(chunk, decision.source) if glossary is not None else []
+            for style in STYLES:
+                request = BatchRequest(
+                    key=_key(d, c, style),
+                    instructions=instructions[pair][style],
+                    text=chunk,
+                    context=glossary_block(hits) if hits else "",
+                    profile=settings.stage_profiles.get(style),
+                )
+                requests.append(request)
+                digest.update(f"{request.key}\0{request.instructions}\0{request.context}\0{request.text}\0{request.profile!r}\0".encode("utf-8"))
+
+    return _Prepared(directions, chunk_counts, requests, digest.hexdigest())
+
+
+def _split(requests: List[BatchRequest], backend: BatchBackend, max_requests: Optional[int]) -> List[List[BatchRequest]]:
+    """Group requests under the backend's per-batch request count and payload size limits."""
+    limit = min(max_requests or backend.max_requests, backend.max_requests)
+    groups: List[List[BatchRequest]] = [[]]
+    size = 0
+    for r in requests:
+        r_size = len(r.instructions.encode("utf-8")) + len(r.context.encode("utf-8")) + len(r.text.encode("utf-8")) + 512
+        if groups[-1] and (len(groups[-1]) >= limit or size + r_size > backend.max_bytes):
+            groups.append([])
+            size = 0
+        groups[-1].append(r)
+        size += r_size
+    return [g for g in groups if g]
+
+
+def _load_manifest(path: str, fingerprint: str) -> Optional[Dict[str, Any]]:
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        manifest = json.load(f)
+    return manifest if manifest.get("fingerprint") == fingerprint else None
+
+
+def _save_json(path: str, data: Any) -> None:
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def run_bulk(
+    settings: AppSettings,
+    documents: List[BulkDocument],
+    out_path: str,
+    poll_s: float = DEFAULT_POLL_S,
+    max_requests_per_batch: Optional[int] = None,
+    retry_failed: bool = True,
+    log: Callable[[str], None] = print,
+) -> Dict[str, Any]:
+    """Translate `documents` through batch jobs and write one JSONL line per document to `out_path`.
+
+    Requests the batch could not serve are re-sent as live calls when
+    `retry_failed`, otherwise reported in the document's "errors".
+    Returns a summary (requests, batches, API calls, elapsed time, usage).
+    """
+    settings.validate()
+    if settings.run_mode == AUTO_MODE:
+        raise ValueError("Bulk mode needs a fixed provider: use a Compare or single-provider run mode.")
+
+    t0 = time.perf_counter()
+    tasks = model_tasks(settings)
+    prepared = _prepare(settings, documents)
+    by_key = {r.key: r for r in prepared.requests}
+    backends = {cfg.label: get_batch_backend(cfg.provider) for cfg in tasks}
+
+    fingerprint = hashlib.sha1(
+        (prepared.fingerprint + "".join(f"|{c.label}:{c.provider}:{c.model}" for c in tasks)).encode("utf-8")
+    ).hexdigest()
+    manifest_path = out_path + ".manifest.json"
+    manifest = _load_manifest(manifest_path, fingerprint)
+    if manifest is not None:
+        log(f"Resuming {len(manifest['batches'])} batch(es) from {manifest_path}")
+    else:
+        manifest = {"fingerprint": fingerprint, "created_at": time.time(), "batches": []}
+
+    for cfg in tasks:
+        # Everything on a fresh run; after an interrupted submit, what was not sent yet
+        submitted = {key for batch in manifest["batches"] if batch["label"] == cfg.label for key in batch["keys"]}
+        backend = backends[cfg.label]
+        groups = _split([r for r in prepared.requests if r.key not in submitted], backend, max_requests_per_batch)
+        for n, group in enumerate(groups, start=1):
+            batch_id = backend.submit(group, cfg.model, cfg.api_key, name=f"ytali-bulk-{fingerprint[:8]}-{cfg.provider}-{len(manifest['batches']) + 1}")
+            manifest["batches"].append(
+                {"label": cfg.label, "provider": cfg.provider, "model": cfg.model, "id": batch_id, "keys": [r.key for r in group]}
+            )
+            # Saved after every submit: a crash must not lose (and pay again for) a batch
+            _save_json(manifest_path, manifest)
+            log(f"Submitted {cfg.label} batch {n}/{len(groups)}: {batch_id} ({len(group)} requests)")
+
+    keys_by_label = {cfg.label: cfg for cfg in tasks}
+    pending = list(manifest["batches"])
+    states: Dict[str, str] = {}
+    while pending:
+        still = []
+        for batch in pending:
+            cfg = keys_by_label[batch["label"]]
+            status = backends[batch["label"]].status(batch["id"], cfg.api_key)
+            if status.done:
+                states[batch["id"]] = status.state
+                log(f"{batch['label']} batch {batch['id']}: {status.state} ({status.completed} ok, {status.failed} failed)")
+            else:
+                still.append(batch)
+        pending = still
+        if pending:
+            log(f"{len(pending)} batch(es) still running; next check in {poll_s:g}s")
+            time.sleep(poll_s)
+
+    results: Dict[str, Dict[str, BatchResult]] = {cfg.label: {} for cfg in tasks}
+    usage = {cfg.label: new_usage() for cfg in tasks}
+    for batch in manifest["batches"]:
+        cfg = keys_by_label[batch["label"]]
+        try:
+            fetched = backends[batch["label"]].results(batch["id"], cfg.api_key, batch["keys"])
+        except Exception as e:
+            if states[batch["id"]] == COMPLETED:
+                raise
+            # Failed / expired / cancelled: partial output, if any, was not retrievable
+            fetched = [BatchResult(k, None, f"batch {states[batch['id']]}: {e}") for k in batch["keys"]]
+        for r in fetched:
+            results[batch["label"]][r.key] = r
+            for field_name, value in r.usage.items():
+                usage[batch["label"]][field_name] += value
+
+    failed = [(cfg, key) for cfg in tasks for key, r in results[cfg.label].items() if r.text is None]
+    retried = 0
+    if failed and retry_failed:
+        log(f"Re-sending {len(failed)} failed request(s) as live calls")
+        retried = _retry_live(failed, by_key, results, usage, workers=settings.max_parallel_requests)
+
+    written = _write_output(out_path, documents, prepared, tasks, results)
+    if os.path.exists(manifest_path):
+        os.remove(manifest_path)
+
+    sync_calls = len(prepared.requests) * len(tasks)
+    api_calls = sum(b.api_calls for b in backends.values()) + retried
+    return {
+        "documents": len(documents),
+        "documents_with_errors": written,
+        "chunks": sum(prepared.chunk_counts),
+        "requests": sync_calls,
+        "batches": len(manifest["batches"]),
+        "api_calls": api_calls,
+        "api_calls_saved": sync_calls - api_calls,
+        "failed_in_batch": len(failed),
+        "retried_live": retried,
+        "elapsed_s": round(time.perf_counter() - t0, 2),
+        "usage": usage,
+    }
+
+
+def _retry_live(
+    failed: List[Tuple[ModelConfig, str]],
+    by_key: Dict[str, BatchRequest],
+    results: Dict[str, Dict[str, BatchResult]],
+    usage: Dict[str, Dict[str, int]],
+    workers: int = 4,
+) -> int:
+    """Send failed batch requests one by one; returns how many were attempted."""
+
+    def _one(item: Tuple[ModelConfig, str]) -> None:
+        cfg, key = item
+        request = by_key[key]
+        try:
+            text = translate_any(
+                cfg,
+                request.instructions,
+                request.text,
+                context=request.context,
+                usage=usage[cfg.label],
+                profile=request.profile,
+            )
+        except Exception as e:
+            results[cfg.label][key] = BatchResult(key, None, f"{results[cfg.label][key].error}; live retry: {type(e).__name__}: {str(e)[:200]}")
+            return
+        results[cfg.label][key] = BatchResult(key, text)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="ytali-bulk-retry") as pool:
+        list(pool.map(_one, failed))
+    return len(failed)
+
+
+def _write_output(
+    out_path: str,
+    documents: List[BulkDocument],
+    prepared: _Prepared,
+    tasks: List[ModelConfig],
+    results: Dict[str, Dict[str, BatchResult]],
+) -> int:
+    """One JSONL line per document, chunks joined back per model and style; returns documents with errors."""
+    with_errors = 0
+    tmp = out_path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        for d, doc in enumerate(documents):
+            detected, source, target = prepared.directions[d]
+            outputs: Dict[str, Dict[str, str]] = {}
+            errors: List[Dict[str, Any]] = []
+            for cfg in tasks:
+                outputs[cfg.label] = {}
+                for style in STYLES:
+                    parts = []
+                    for c in range(prepared.chunk_counts[d]):
+                        r = results[cfg.label].get(_key(d, c, style))
+                        if r is None or r.text is None:
+                            errors.append({"label": cfg.label, "chunk": c + 1, "style": style, "error": r.error if r else "missing"})
+                        else:
+                            parts.append(r.text)
+                    outputs[cfg.label][style] = join_parts(parts)
+            with_errors += bool(errors)
+            row = {
+                "id": doc.id,
+                "detected_language": detected,
+                "direction": f"{source} → {target}",
+                "outputs": outputs,
+                "errors": errors,
+            }
+            f.write(json.dumps(row, ensure_ascii=False) + "\n")
+    os.replace(tmp, out_path)
+    return with_errors
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m src.bulk", description=__doc__.splitlines()[0])
+    parser.add_argument("input", help="directory of .txt files, a .txt file, or JSONL with {id, text}")
+    parser.add_argument("--out", required=True, help="output JSONL")
+    parser.add_argument("--mode", default="OpenAI only", help="run mode (not Auto)")
+    parser.add_argument("--poll-s", type=float, default=DEFAULT_POLL_S, help="seconds between status checks")
+    parser.add_argument("--max-requests", type=int, default=None, help="cap on requests per batch")
+    parser.add_argument("--chunk-chars", type=int, default=9000)
+    parser.add_argument("--no-retry", action="store_true", help="report failed requests instead of re-sending them live")
+    parser.add_argument("--standin", action="store_true", help="use the local stand-in batch endpoint (no keys, no network)")
+    parser.add_argument("--time-scale", type=float, default=1.0, help="stand-in: multiply simulated latencies")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="stand-in: injected failure rate per request")
+    args = parser.parse_args(argv)
+
+    if args.standin:
+        use_standin(StandInProfile(time_scale=args.time_scale, error_rate=args.error_rate))
+        os.environ.setdefault("OPENAI_API_KEY", "standin")
+        os.environ.setdefault("GEMINI_API_KEY", "standin")
+
+    settings = AppSettings(
+        header_logo_path=None,
+        watermark_logo_path=None,
+        watermark_size_px=190,
+        watermark_opacity=0.1,
+        openai_api_key=os.getenv("OPENAI_API_KEY", ""),
+        gemini_api_key=os.getenv("GEMINI_API_KEY", ""),
+        run_mode=args.mode,
+        chunk_chars=args.chunk_chars,
+        min_chunk_chars=min(1500, args.chunk_chars),
+        save_local=False,
+    )
+    summary = run_bulk(
+        settings,
+        load_documents(args.input),
+        args.out,
+        poll_s=args.poll_s,
+        max_requests_per_batch=args.max_requests,
+        retry_failed=not args.no_retry,
+    )
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
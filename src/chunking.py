@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+import hashlib
+import heapq
+import re
+import unicodedata
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+# Chunks smaller than this lose too much context for a faithful translation
+DEFAULT_MIN_CHUNK_CHARS = 1500
+_MAX_CHUNKS = 64
+_TIE = 0.02  # plans within 2% of the best: take the one with fewer chunks (fewer calls)
+
+
+@dataclass(frozen=True)
+class ChunkPlan:
+    chunks: List[str]
+    parallel: int
+    estimated_s: float
+    overhead_s: float
+    s_per_kchar: float
+    sizes: List[int] = field(default_factory=list)
+
+    def to_meta(self) -> dict:
+        return {
+            "chunks": len(self.chunks),
+            "parallel": self.parallel,
+            "estimated_s": round(self.estimated_s, 2),
+            "overhead_s": round(self.overhead_s, 3),
+            "s_per_kchar": round(self.s_per_kchar, 3),
+            "sizes": self.sizes,
+        }
+
+
+def paragraphs(text: str) -> List[str]:
+    return [p.strip() for p in re.split(r"\n{2,}", text or "") if p.strip()]
+
+
+def normalize_paragraph(paragraph: str) -> str:
+    """Comparison form of a paragraph: NFC, whitespace runs collapsed."""
+    return unicodedata.normalize("NFC", " ".join(paragraph.split()))
+
+
+@dataclass(frozen=True)
+class ParagraphDedup:
+    unique: List[str]  # first occurrence of each distinct paragraph, in document order
+    order: List[int]  # for every paragraph of the document, its index in `unique`
+
+    @property
+    def duplicates(self) -> int:
+        return len(self.order) - len(self.unique)
+
+    def text(self) -> str:
+        return "\n\n".join(self.unique)
+
+    def rebuild(self, translated: List[str]) -> str:
+        """Document order from one translation per unique paragraph."""
+        if len(translated) != len(self.unique):
+            raise ValueError(f"Expected {len(self.unique)} paragraphs, got {len(translated)}.")
+        return "\n\n".join(translated[i] for i in self.order)
+
+
+def dedupe_paragraphs(text: str) -> ParagraphDedup:
+    """Collapse repeated paragraphs (bylines, disclaimers, "Leggi anche" blocks) to one copy each."""
+    seen: Dict[bytes, int] = {}
+    unique: List[str] = []
+    order: List[int] = []
+    for p in paragraphs(text):
+        key = hashlib.blake2b(normalize_paragraph(p).encode("utf-8"), digest_size=16).digest()
+        if key not in seen:
+            seen[key] = len(unique)
+            unique.append(p)
+        order.append(seen[key])
+    return ParagraphDedup(unique=unique, order=order)
+
+
+def _chunks_needed(cum: List[int], max_chars: int) -> List[int]:
+    """For every start index b, the fewest chunks of at most `max_chars` that hold paras[b:].
+
+    Greedy packing is optimal here; a paragraph longer than `max_chars` gets a chunk of its own.
+    """
+    n = len(cum) - 1
+    need = [0] * (n + 1)
+    for b in range(n - 1, -1, -1):
+        end = b + 1
+        while end < n and cum[end + 1] - cum[b] - 2 <= max_chars:
+            end += 1
+        need[b] = 1 + need[end]
+    return need
+
+
+def split_balanced(paras: List[str], k: int, max_chars: Optional[int] = None) -> List[str]:
+    """Group consecutive paragraphs into at most `k` chunks of near-equal length.
+
+    Cuts go at the paragraph boundary closest to each i/k of the text, so the
+    largest chunk (which bounds wall time) is as small as the paragraphs allow.
+    With `max_chars`, a cut is only taken where the chunk it closes stays under
+    the cap and the rest still fits in the remaining chunks, whenever `k` allows it.
+    """
+    if not paras:
+        return []
+    k = max(1, min(k, len(paras)))
+
+    cum = [0]
+    for p in paras:
+        cum.append(cum[-1] + len(p) + 2)
+    total = cum[-1]
+    need = _chunks_needed(cum, max_chars) if max_chars else None
+
+    cuts = [0]
+    for i in range(1, k):
+        target = total * i / k
+        candidates = range(cuts[-1] + 1, len(paras))
+        if need is not None:
+            a = cuts[-1]
+            fitting = [
+                b
+                for b in candidates
+                if (cum[b] - cum[a] - 2 <= max_chars or b == a + 1) and need[b] <= k - i
+            ]
+            candidates = fitting or candidates
+        # Boundary b (between paras[b-1] and paras[b]) closest to target, after the previous cut
+        b = min(candidates, key=lambda x: abs(cum[x] - target), default=None)
+        if b is None:
+            break
+        cuts.append(b)
+    cuts.append(len(paras))
+
+    return ["\n\n".join(paras[a:b]) for a, b in zip(cuts, cuts[1:]) if b > a]
+
+
+def makespan(durations: List[float], workers: int) -> float:
+    """Wall time of running `durations` on `workers` slots, longest first."""
+    slots = [0.0] * max(1, workers)
+    for d in sorted(durations, reverse=True):
+        heapq.heapreplace(slots, slots[0] + d)
+    return max(slots)
+
+
+def plan_chunks(
+    text: str,
+    overhead_s: float,
+    s_per_kchar: float,
+    max_parallel: int,
+    max_chunk_chars: int = 9000,
+    min_chunk_chars: int = DEFAULT_MIN_CHUNK_CHARS,
+    requests_per_chunk: int = 2,
+) -> ChunkPlan:
+    """Pick the paragraph-aligned split with the lowest estimated wall time.
+
+    A request for c characters is modelled as `overhead_s + c / 1000 *
+    s_per_kchar` (from measured provider latency). Every chunk needs
+    `requests_per_chunk` requests (literal + neutral), and at most
+    `max_parallel` run at once. More chunks shorten each request but add
+    fixed overhead per request and, past the concurrency limit, extra waves.
+    """
+    paras = paragraphs(text)
+    if not paras:
+        return ChunkPlan([], max_parallel, 0.0, overhead_s, s_per_kchar)
+
+    cum = [0]
+    for p in paras:
+        cum.append(cum[-1] + len(p) + 2)
+    total = cum[-1]
+    # Fewest chunks that keep every one under max_chunk_chars (by size alone that bound can be too low)
+    k_min = max(1, _chunks_needed(cum, max(1, max_chunk_chars))[0])
+    k_max = max(k_min, min(len(paras), total // max(1, min_chunk_chars), _MAX_CHUNKS))
+
+    best = None
+    for k in range(k_min, k_max + 1):
+        chunks = split_balanced(paras, k, max_chunk_chars)
+        durations = [overhead_s + len(c) / 1000 * s_per_kchar for c in chunks] * requests_per_chunk
+        wall = makespan(durations, max_parallel)
+        if best is None or wall < best[0] * (1 - _TIE):
+            best = (wall, chunks)
+
+    wall, chunks = best
+    return ChunkPlan(
+        chunks=chunks,
+        parallel=max_parallel,
+        estimated_s=wall,
+        overhead_s=overhead_s,
+        s_per_kchar=s_per_kchar,
+        sizes=[len(c) for c in chunks],
+    )
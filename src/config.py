@@ -1,8 +1,44 @@
 from __future__ import annotations
 
 import os
-from dataclasses import dataclass
-from typing import Optional
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+from .providers.types import StageProfile
+
+# Model calls with their own latency profile
+STAGES = ("literal", "neutral", "copyedit", "title")
+
+
+def default_stage_profiles() -> Dict[str, StageProfile]:
+    """Translation and copyedit are close rewrites, so they get little or no reasoning;
+    output is capped at twice the input; titles are short."""
+    return {
+        "literal": StageProfile(reasoning_effort="none", max_output_tokens=32000, output_ratio=2.0),
+        "neutral": StageProfile(reasoning_effort="low", max_output_tokens=32000, output_ratio=2.0),
+        "copyedit": StageProfile(reasoning_effort="low", max_output_tokens=32000, output_ratio=2.0),
+        "title": StageProfile(reasoning_effort="none", max_output_tokens=1024),
+    }
+
+
+# Selectable in the app and compared by src/benchmark.py
+STAGE_PROFILE_PRESETS: Dict[str, Dict[str, StageProfile]] = {
+    "Balanced": default_stage_profiles(),
+    "Fastest": {
+        stage: StageProfile(
+            reasoning_effort="none",
+            max_output_tokens=1024 if stage == "title" else 32000,
+            output_ratio=None if stage == "title" else 1.6,
+            service_tier="priority",
+        )
+        for stage in STAGES
+    },
+    "Careful": {
+        stage: StageProfile(reasoning_effort="medium", max_output_tokens=2048 if stage == "title" else 64000)
+        for stage in STAGES
+    },
+    "Provider defaults": {},
+}
 
 
 @dataclass
@@ -15,12 +51,47 @@ class AppSettings:
     openai_api_key: str
     gemini_api_key: str
 
-    # "Compare (Gemini vs OpenAI)" | "Gemini only" | "OpenAI only"
+    # "Compare (Gemini vs OpenAI)" | "Gemini only" | "OpenAI only" | "Auto (fastest)"
     run_mode: str
 
+    # Long inputs are split on paragraph boundaries into chunks of at most `chunk_chars`
+    # (and, where possible, at least `min_chunk_chars`), sized from measured provider
+    # latency; up to `max_parallel_requests` chunk requests per model run at once.
     chunk_chars: int = 9000
+    min_chunk_chars: int = 1500
+    max_parallel_requests: int = 4
+    # Token budget per request when packing subtitle / CMS segments
+    segment_token_budget: int = 1500
     compare_first_n_chunks: Optional[int] = None
-    save_local: bool = True
+    # End-to-end budget for one run (translation + copyedit); per-call timeouts are capped by it
+    run_deadline_s: float = 900.0
+    call_timeout_s: float = 120.0
+    # Single-provider modes: send calls to the other provider while this one's breaker is open
+    failover: bool = True
+    # Auto (fastest): per-chunk routing on observed latency. Providers whose recent error
+    # rate is above the cap are avoided; `auto_prefer_provider` ("openai" / "gemini") wins
+    # unless another provider is expected to be more than `auto_prefer_margin` faster.
+    auto_max_error_rate: float = 0.25
+    auto_prefer_provider: Optional[str] = None
+    auto_prefer_margin: float = 0.25
+    # Opt-in: write each run (sources and translations) to the on-disk run archive, src/archive.py
+    save_local: bool = False
+    # Sentence-level translation memory: exact hits skip the call, near hits become hints
+    translation_memory: bool = True
+    tm_min_similarity: float = 0.75
+    # Local checks on each chunk's output (length ratio to the source, target language,
+    # cut off mid-sentence); a failing chunk/style is re-requested up to `output_check_retries` times
+    output_checks: bool = True
+    output_check_retries: int = 1
+    output_min_ratio: float = 0.5
+    output_max_ratio: float = 2.0
+    # House IT/EN glossary (CSV/TSV); falls back to $YTALI_GLOSSARY
+    glossary_path: Optional[str] = None
+    # Background shared by every request of a run; part of the cached prompt prefix
+    shared_context: str = ""
+    # Latency profile per stage ("literal", "neutral", "copyedit", "title"); a missing
+    # stage uses the provider defaults
+    stage_profiles: Dict[str, StageProfile] = field(default_factory=default_stage_profiles)
     debug: bool = False
 
     # Fixed models per user request
@@ -32,9 +103,23 @@ class AppSettings:
             "Compare (Gemini vs OpenAI)",
             "Gemini only",
             "OpenAI only",
+            "Auto (fastest)",
         ):
             raise ValueError(f"Invalid run mode: {self.run_mode}")
 
+        if self.max_parallel_requests < 1:
+            raise ValueError("max_parallel_requests must be at least 1.")
+        if not 0 < self.min_chunk_chars <= self.chunk_chars:
+            raise ValueError("min_chunk_chars must be positive and not above chunk_chars.")
+        if self.output_check_retries < 0:
+            raise ValueError("output_check_retries must not be negative.")
+        if not 0 < self.output_min_ratio < self.output_max_ratio:
+            raise ValueError("Output length ratio bounds must satisfy 0 < min < max.")
+        for stage, profile in self.stage_profiles.items():
+            if stage not in STAGES:
+                raise ValueError(f"Unknown stage in stage_profiles: {stage}")
+            profile.validate()
+
         # 🔐 Streamlit-safe: accept keys from config OR environment
         openai_key = self.openai_api_key or os.getenv("OPENAI_API_KEY", "")
         gemini_key = self.gemini_api_key or os.getenv("GEMINI_API_KEY", "")
@@ -46,3 +131,11 @@ class AppSettings:
         if self.run_mode in ("Compare (Gemini vs OpenAI)", "Gemini only"):
             if not gemini_key:
                 raise ValueError("Missing Gemini API key.")
+
+        if self.run_mode == "Auto (fastest)":
+            if not openai_key and not gemini_key:
+                raise ValueError("Auto mode needs at least one API key (OpenAI or Gemini).")
+            if self.auto_prefer_provider not in (None, "", "openai", "gemini"):
+                raise ValueError(f"Invalid preferred provider: {self.auto_prefer_provider}")
+            if not 0.0 <= self.auto_max_error_rate <= 1.0:
+                raise ValueError("auto_max_error_rate must be between 0 and 1.")
@@ -1,14 +1,79 @@
+from __future__ import annotations
+
 import os
 import json
-from typing import Any, Dict, List
-from openai import OpenAI
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+from .providers.health import get_breaker, is_timeout_error
+from .providers.openai_provider import (
+    create_with_params,
+    get_client,
+    profile_params,
+    prompt_cache_key,
+    record_response_usage,
+)
+from .providers.standin import StandInClient, standin_profile
+from .providers.types import StageProfile
+from .profiling import span
+from .run_context import RunCancelled, RunContext
+
+if TYPE_CHECKING:
+    from openai import OpenAI
 
 
 def get_openai_client() -> OpenAI:
+    if standin_profile() is not None:
+        return StandInClient()  # type: ignore[return-value]
     api_key = os.getenv("OPENAI_API_KEY")
     if not api_key:
         raise RuntimeError("OPENAI_API_KEY not set")
-    return OpenAI(api_key=api_key)
+    return get_client(api_key)
+
+
+EDITOR_MODEL = "gpt-5.2"
+EDITOR_BADGE = f"OpenAI {EDITOR_MODEL} (editor)"
+
+
+def _create_response(
+    client: OpenAI,
+    ctx: Optional[RunContext],
+    profile: Optional[StageProfile] = None,
+    input_chars: int = 0,
+    **kwargs: Any,
+) -> Any:
+    """responses.create with the stage profile's parameters, bounded by the run deadline and aborted on cancel.
+
+    Goes through OpenAI's circuit breaker like translation calls: while it is
+    open this raises ProviderUnavailable at once instead of waiting out
+    another timeout, and outage errors count towards opening it.
+    """
+    params = profile_params(profile, kwargs.get("model", ""), input_chars)
+    capped_by_deadline = ctx is not None and ctx.call_timeout() < ctx.call_timeout_s
+
+    def create(**kw: Any) -> Any:
+        if ctx is None:
+            return client.responses.create(**kw)
+        return ctx.run(client.responses.create, timeout=ctx.call_timeout(), **kw)
+
+    breaker = get_breaker("openai")
+    breaker.before_call()
+    try:
+        with span("editor_api_call"):
+            resp = create_with_params(create, params, **kwargs)
+    except RunCancelled:
+        breaker.release()
+        raise
+    except Exception as e:
+        if capped_by_deadline and is_timeout_error(e):
+            breaker.release()
+        else:
+            breaker.record_failure(e)
+        raise
+    except BaseException:
+        breaker.release()
+        raise
+    breaker.record_success()
+    return resp
 
 
 def _strip_json_fence(s: str) -> str:
@@ -54,7 +119,14 @@ def _parse_payload(raw_text: str) -> Dict[str, Any]:
     return {"edited_text": edited_text, "title_suggestions": titles}
 
 
-def _call_editor(client: OpenAI, text: str, target_language: str) -> Dict[str, Any]:
+def _call_editor(
+    client: OpenAI,
+    text: str,
+    target_language: str,
+    usage: Optional[Dict[str, int]] = None,
+    ctx: Optional[RunContext] = None,
+    profile: Optional[StageProfile] = None,
+) -> Dict[str, Any]:
     """
     Single call that *attempts* to enforce JSON schema, but still works if schema isn't applied.
     """
@@ -92,31 +164,55 @@ Return ONLY valid JSON with keys:
 No markdown fences. No extra text.
 """.strip()
 
+    # `system` only depends on the target language: keep it first so it is a cached prefix
+    cache_body = {"prompt_cache_key": prompt_cache_key(system)}
+
     # Try schema mode first; if the installed SDK/server rejects it, fallback to plain prompt.
     try:
-        resp = client.responses.create(
-            model="gpt-5.2",
+        resp = _create_response(
+            client,
+            ctx,
+            profile,
+            len(text),
+            model=EDITOR_MODEL,
             input=[
                 {"role": "system", "content": system},
                 {"role": "user", "content": text},
             ],
             response_format={"type": "json_schema", "json_schema": schema},
+            extra_body=cache_body,
         )
+    except RunCancelled:
+        raise
     except Exception:
         # Fallback: still ask for JSON, just without schema enforcement
-        resp = client.responses.create(
-            model="gpt-5.2",
+        resp = _create_response(
+            client,
+            ctx,
+            profile,
+            len(text),
+            model=EDITOR_MODEL,
             input=[
                 {"role": "system", "content": system},
                 {"role": "user", "content": text},
             ],
+            extra_body=cache_body,
         )
 
+    record_response_usage(resp, usage)
     raw = resp.output_text
-    return _parse_payload(raw)
-
-
-def _call_titles_only(client: OpenAI, edited_text: str, target_language: str) -> List[str]:
+    with span("parse_payload"):
+        return _parse_payload(raw)
+
+
+def _call_titles_only(
+    client: OpenAI,
+    edited_text: str,
+    target_language: str,
+    usage: Optional[Dict[str, int]] = None,
+    ctx: Optional[RunContext] = None,
+    profile: Optional[StageProfile] = None,
+) -> List[str]:
     """
     Backup call if titles are missing.
     """
@@ -131,32 +227,57 @@ Return ONLY valid JSON:
 No markdown fences. No extra text.
 """.strip()
 
-    resp = client.responses.create(
-        model="gpt-5.2",
+    resp = _create_response(
+        client,
+        ctx,
+        profile,
+        len(edited_text),
+        model=EDITOR_MODEL,
         input=[
             {"role": "system", "content": system},
             {"role": "user", "content": edited_text},
         ],
+        extra_body={"prompt_cache_key": prompt_cache_key(system)},
     )
 
-    data = _parse_payload(resp.output_text)
+    record_response_usage(resp, usage)
+    with span("parse_payload"):
+        data = _parse_payload(resp.output_text)
     titles = data.get("title_suggestions", [])
     return titles if isinstance(titles, list) else []
 
 
-def copyedit_and_generate_titles(text: str, target_language: str) -> Dict[str, Any]:
+def copyedit_and_generate_titles(
+    text: str,
+    target_language: str,
+    usage: Optional[Dict[str, int]] = None,
+    ctx: Optional[RunContext] = None,
+    copyedit_profile: Optional[StageProfile] = None,
+    title_profile: Optional[StageProfile] = None,
+) -> Dict[str, Any]:
     """
     Guaranteed output:
       - edited_text: string
       - title_suggestions: list with 1 element
+
+    Token counts (including cached input tokens) are added to `usage` if given.
+    With a RunContext, each call is bounded by the run deadline and cancellable.
+    The copyedit call uses `copyedit_profile`, the title retry `title_profile`.
     """
     client = get_openai_client()
 
-    data = _call_editor(client, text=text, target_language=target_language)
+    data = _call_editor(client, text=text, target_language=target_language, usage=usage, ctx=ctx, profile=copyedit_profile)
 
     # Hard guarantee: if missing titles, try a second call
     if not data.get("title_suggestions"):
-        titles = _call_titles_only(client, edited_text=data["edited_text"], target_language=target_language)
+        titles = _call_titles_only(
+            client,
+            edited_text=data["edited_text"],
+            target_language=target_language,
+            usage=usage,
+            ctx=ctx,
+            profile=title_profile,
+        )
         data["title_suggestions"] = titles
 
     # Absolute last resort fallback
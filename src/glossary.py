@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import csv
+import os
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set, Tuple
+
+# Column names accepted in glossary files (first match wins)
+_IT_COLUMNS = ("it", "italian", "italiano", "source_it")
+_EN_COLUMNS = ("en", "english", "inglese", "source_en")
+
+
+@dataclass(frozen=True)
+class GlossaryHit:
+    source: str
+    target: str
+
+
+class TermMatcher:
+    """Aho-Corasick automaton over a set of terms (case-insensitive, whole words).
+
+    `find(text)` scans the text once, whatever the number of terms, and returns
+    the ids of all terms that occur with word boundaries on both sides and are
+    not nested inside a longer matched term.
+    """
+
+    def __init__(self, terms: List[str]) -> None:
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[Tuple[int, int]]] = [[]]  # (term_id, term_len)
+
+        for term_id, term in enumerate(terms):
+            key = term.strip().lower()
+            if not key:
+                continue
+            node = 0
+            for ch in key:
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                node = nxt
+            self._out[node].append((term_id, len(key)))
+
+        # BFS to build failure links
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                f = self._fail[node]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                cand = self._goto[f].get(ch, 0)
+                self._fail[nxt] = cand if cand != nxt else 0
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def find(self, text: str) -> Set[int]:
+        t = (text or "").lower()
+        spans: List[Tuple[int, int, int]] = []  # (start, end, term_id)
+        node = 0
+
+        for i, ch in enumerate(t):
+            while node and ch not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(ch, 0)
+
+            for term_id, length in self._out[node]:
+                start = i - length + 1
+                before_ok = start == 0 or not t[start - 1].isalnum()
+                after_ok = i + 1 == len(t) or not t[i + 1].isalnum()
+                if before_ok and after_ok:
+                    spans.append((start, i + 1, term_id))
+
+        # Leftmost-longest: a term only counts where it is not part of a longer match
+        spans.sort(key=lambda s: (s[0], -s[1]))
+        found: Set[int] = set()
+        covered_to = -1
+        for start, end, term_id in spans:
+            if end <= covered_to:
+                continue
+            found.add(term_id)
+            covered_to = max(covered_to, end)
+
+        return found
+
+
+class Glossary:
+    """House IT↔EN glossary with one matcher per side."""
+
+    def __init__(self, pairs: List[Tuple[str, str]]) -> None:
+        self.pairs = [(it.strip(), en.strip()) for it, en in pairs if it.strip() and en.strip()]
+        self._it = TermMatcher([it for it, _ in self.pairs])
+        self._en = TermMatcher([en for _, en in self.pairs])
+
+    def __len__(self) -> int:
+        return len(self.pairs)
+
+    def _sides(self, source_lang: str) -> Tuple[TermMatcher, TermMatcher, int, int]:
+        if source_lang == "English":
+            return self._en, self._it, 1, 0
+        return self._it, self._en, 0, 1
+
+    def find_terms(self, text: str, source_lang: str) -> List[GlossaryHit]:
+        """Glossary entries whose source-side term occurs in `text`."""
+        src_matcher, _, s, t = self._sides(source_lang)
+        return [
+            GlossaryHit(source=self.pairs[i][s], target=self.pairs[i][t])
+            for i in sorted(src_matcher.find(text))
+        ]
+
+    def violations(self, hits: List[GlossaryHit], output: str, source_lang: str) -> List[GlossaryHit]:
+        """Hits whose prescribed target term does not appear in the translation."""
+        if not hits:
+            return []
+        _, tgt_matcher, _, t = self._sides(source_lang)
+        present = {self.pairs[i][t].lower() for i in tgt_matcher.find(output)}
+        return [h for h in hits if h.target.lower() not in present]
+
+
+def load_glossary(path: str) -> Glossary:
+    """Load a CSV/TSV glossary with a header row naming the `it` and `en` columns.
+
+    Without a recognised header, the first two columns are read as IT, EN.
+    """
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        sample = f.read(4096)
+        f.seek(0)
+        delimiter = "\t" if sample.count("\t") > sample.count(",") else ","
+        rows = list(csv.reader(f, delimiter=delimiter))
+
+    if not rows:
+        return Glossary([])
+
+    header = [h.strip().lower() for h in rows[0]]
+    it_col = next((header.index(c) for c in _IT_COLUMNS if c in header), None)
+    en_col = next((header.index(c) for c in _EN_COLUMNS if c in header), None)
+
+    if it_col is None or en_col is None:
+        it_col, en_col = 0, 1
+    else:
+        rows = rows[1:]
+
+    pairs = [(r[it_col], r[en_col]) for r in rows if len(r) > max(it_col, en_col)]
+    return Glossary(pairs)
+
+
+_CACHE: Dict[str, Tuple[float, Glossary]] = {}
+
+
+def get_glossary(path: Optional[str]) -> Optional[Glossary]:
+    """Load (and cache by mtime) the glossary at `path`; None if unset or missing."""
+    if not path or not os.path.exists(path):
+        return None
+
+    mtime = os.path.getmtime(path)
+    cached = _CACHE.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+
+    glossary = load_glossary(path)
+    _CACHE[path] = (mtime, glossary)
+    return glossary
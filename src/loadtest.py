@@ -0,0 +1,287 @@
+"""Multi-session load generator for the Streamlit app.
+
+Runs N concurrent simulated sessions of the app's text flow (translate,
+copyedit, titles, result store) in one process, as one app instance would,
+against the stand-in provider, and reports how throughput, queueing delay,
+memory and errors change with concurrency:
+
+    python -m src.loadtest --sessions 1,4,16,32 --runs 2 --time-scale 0.1
+
+No API keys or network needed.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import statistics
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+from .config import AppSettings
+from .pipeline import copyedit_results, direction_to_language, store_outputs
+from .providers import StandInProfile, new_usage, standin_stats, use_standin
+from .store import get_result_store
+from .translate import new_run_context, run_translation
+from .warmup import warm_up
+
+_WORDS = (
+    "il governo ha approvato la legge di bilancio dopo un lungo dibattito in parlamento "
+    "secondo gli esperti le nuove misure avranno effetti sulla crescita economica del paese "
+    "i sindacati chiedono più investimenti nella scuola e nella sanità pubblica mentre "
+    "l'opposizione critica i tagli previsti per le regioni del sud e per i comuni"
+).split()
+
+
+def synthetic_article(chars: int, rng: random.Random) -> str:
+    """Italian-looking text of about `chars` characters, different per call (no memory hits)."""
+    paragraphs: List[str] = []
+    total = 0
+    while total < chars:
+        sentences = []
+        for _ in range(rng.randint(3, 6)):
+            words = rng.sample(_WORDS, rng.randint(8, 16))
+            sentences.append(" ".join(words).capitalize() + ".")
+        para = " ".join(sentences)
+        paragraphs.append(para)
+        total += len(para) + 2
+    return "\n\n".join(paragraphs)
+
+
+def _rss_bytes() -> int:
+    """Current resident set size (Linux /proc); 0 where unavailable."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+class _RssSampler:
+    def __init__(self, interval_s: float = 0.05) -> None:
+        self.interval_s = interval_s
+        self.peak = _rss_bytes()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name="ytali-rss-sampler", daemon=True)
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval_s):
+            self.peak = max(self.peak, _rss_bytes())
+
+    def __enter__(self) -> "_RssSampler":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self._stop.set()
+        self._thread.join()
+
+
+class _NullProgress:
+    def progress(self, value: int, text: str = "") -> None:
+        pass
+
+
+def _settings(run_mode: str) -> AppSettings:
+    """What the sidebar produces with default inputs and stand-in keys."""
+    return AppSettings(
+        header_logo_path=None,
+        watermark_logo_path=None,
+        watermark_size_px=190,
+        watermark_opacity=0.1,
+        openai_api_key="standin",
+        gemini_api_key="standin",
+        run_mode=run_mode,
+        save_local=False,
+    )
+
+
+def _run_session(
+    index: int,
+    runs: int,
+    chars: int,
+    run_mode: str,
+    seed: int,
+    out: Dict[str, Any],
+) -> None:
+    """One simulated session: the app's text flow (translate, copyedit, titles, store, render) `runs` times."""
+    rng = random.Random(seed * 1000 + index)
+    session = f"loadtest-{seed}-{index}-{uuid.uuid4().hex[:6]}"
+    latencies: List[float] = []
+    errors: List[str] = []
+    state: Dict[str, Any] = {}  # what st.session_state would hold
+
+    for _ in range(runs):
+        text = synthetic_article(chars, rng)
+        settings = _settings(run_mode)
+        t0 = time.perf_counter()
+        try:
+            ctx = new_run_context(settings)
+            results = run_translation(settings, text=text, progress=_NullProgress(), ctx=ctx)
+            target_lang = direction_to_language(results["_meta"].get("direction") or "")
+            copyedit_usage = new_usage()
+            edited = copyedit_results(
+                results, target_lang, usage=copyedit_usage, ctx=ctx, profiles=settings.stage_profiles
+            )
+            results["_meta"]["usage"]["copyedit"] = copyedit_usage
+
+            state["results_meta"] = results["_meta"]
+            state["edited_outputs"] = store_outputs(session, edited)
+            store = get_result_store()
+            for handles in state["edited_outputs"].values():
+                if store.get(handles["literal"]) is None or store.get(handles["neutral"]) is None:
+                    raise RuntimeError("output evicted from the result store")
+        except Exception as e:
+            errors.append(f"{type(e).__name__}: {e}".splitlines()[0][:200])
+            continue
+        latencies.append(time.perf_counter() - t0)
+
+    out["latencies"] = latencies
+    out["errors"] = errors
+    out["state"] = state
+    out["store_bytes"] = get_result_store().usage(session)
+    get_result_store().drop_session(session)
+
+
+def _percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def run_level(
+    sessions: int,
+    runs: int = 1,
+    chars: int = 3000,
+    run_mode: str = "Compare (Gemini vs OpenAI)",
+    seed: int = 0,
+) -> Dict[str, Any]:
+    """Run `sessions` concurrent sessions once and summarize."""
+    standin_stats(reset=True)
+    rss_before = _rss_bytes()
+    threads_before = threading.active_count()
+    results: List[Dict[str, Any]] = [{} for _ in range(sessions)]
+
+    t0 = time.perf_counter()
+    with _RssSampler() as sampler:
+        workers = [
+            threading.Thread(
+                target=_run_session,
+                args=(i, runs, chars, run_mode, seed, results[i]),
+                name=f"ytali-loadtest-session-{i}",
+                daemon=True,
+            )
+            for i in range(sessions)
+        ]
+        for w in workers:
+            w.start()
+        peak_threads = threading.active_count()
+        for w in workers:
+            while w.is_alive():
+                w.join(0.05)
+                peak_threads = max(peak_threads, threading.active_count())
+    wall_s = time.perf_counter() - t0
+
+    latencies = [x for r in results for x in r.get("latencies", [])]
+    errors = [x for r in results for x in r.get("errors", [])]
+    attempted = sessions * runs
+    provider = standin_stats()
+    calls = int(provider["calls"]) or 1
+    service_per_run = provider["service_s"] / max(1, len(latencies))
+
+    return {
+        "sessions": sessions,
+        "runs_ok": len(latencies),
+        "runs_failed": attempted - len(latencies),
+        "error_rate": round((attempted - len(latencies)) / attempted, 3) if attempted else 0.0,
+        "throughput_runs_per_min": round(len(latencies) / wall_s * 60, 2) if wall_s else 0.0,
+        "latency_p50_s": round(_percentile(latencies, 0.5), 3),
+        "latency_p95_s": round(_percentile(latencies, 0.95), 3),
+        # Time a run spent not being served by the provider: capacity waits, thread / GIL contention
+        "queue_delay_s": round(max(0.0, statistics.mean(latencies) - service_per_run), 3) if latencies else 0.0,
+        "provider_wait_ms_per_call": round(provider["wait_s"] / calls * 1000, 1),
+        "provider_peak_in_flight": int(provider["max_in_flight_seen"]),
+        "peak_threads": peak_threads - threads_before,
+        "rss_mb_per_session": round((sampler.peak - rss_before) / sessions / 2**20, 2),
+        "store_kb_per_session": round(sum(r.get("store_bytes", 0) for r in results) / sessions / 1024, 1),
+        "sample_errors": sorted(set(errors))[:3],
+    }
+
+
+def _print_table(rows: List[Dict[str, Any]]) -> None:
+    columns = [
+        ("sessions", "sess"),
+        ("runs_ok", "ok"),
+        ("error_rate", "err%"),
+        ("throughput_runs_per_min", "runs/min"),
+        ("latency_p50_s", "p50 s"),
+        ("latency_p95_s", "p95 s"),
+        ("queue_delay_s", "queue s"),
+        ("provider_wait_ms_per_call", "prov wait ms"),
+        ("peak_threads", "threads"),
+        ("rss_mb_per_session", "MB/sess"),
+        ("store_kb_per_session", "store KB/sess"),
+    ]
+    print("  ".join(f"{title:>13}" for _, title in columns))
+    for row in rows:
+        cells = []
+        for key, _ in columns:
+            value = row[key] * 100 if key == "error_rate" else row[key]
+            cells.append(f"{value:>13}")
+        print("  ".join(cells))
+    for row in rows:
+        for err in row["sample_errors"]:
+            print(f"  [{row['sessions']} sessions] {err}")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m src.loadtest", description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", default="1,2,4,8,16", help="comma-separated concurrency levels")
+    parser.add_argument("--runs", type=int, default=1, help="articles submitted per session")
+    parser.add_argument("--chars", type=int, default=3000, help="article length")
+    parser.add_argument("--mode", default="Compare (Gemini vs OpenAI)", help="sidebar run mode")
+    parser.add_argument("--time-scale", type=float, default=1.0, help="multiply simulated latencies")
+    parser.add_argument("--tokens-per-s", type=float, default=80.0)
+    parser.add_argument("--first-token-s", type=float, default=0.6)
+    parser.add_argument("--max-in-flight", type=int, default=32, help="stand-in provider concurrency limit")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="injected 503 rate per call")
+    parser.add_argument("--bad-output-rate", type=float, default=0.0, help="share of translations cut off mid-sentence")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    use_standin(
+        StandInProfile(
+            first_token_s=args.first_token_s,
+            tokens_per_s=args.tokens_per_s,
+            error_rate=args.error_rate,
+            bad_output_rate=args.bad_output_rate,
+            max_in_flight=args.max_in_flight,
+            time_scale=args.time_scale,
+        )
+    )
+
+    # One-off startup costs (detector profiles, caches) would otherwise land on the first level
+    warm_up(connect=False)
+
+    rows = []
+    for level in [int(x) for x in args.sessions.split(",") if x.strip()]:
+        rows.append(
+            run_level(
+                level,
+                runs=args.runs,
+                chars=args.chars,
+                run_mode=args.mode,
+                seed=args.seed,
+            )
+        )
+        print(f"... {level} sessions done", flush=True)
+
+    _print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+"""Post-translation steps of a text run: copyedit, titles, storing outputs.
+
+Shared by the Streamlit app and the load generator (src/loadtest.py), so both
+exercise the same code path.
+"""
+
+from __future__ import annotations
+
+import json
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+
+from .archive import RunArchive
+from .editor import EDITOR_BADGE, copyedit_and_generate_titles
+from .profiling import span
+from .providers.health import ProviderUnavailable
+from .providers.types import StageProfile
+from .run_context import RunCancelled, RunContext
+from .store import get_result_store
+
+ErrorHook = Callable[[Exception], None]
+# Stage name ("copyedit", "title", ...) -> latency profile, see AppSettings.stage_profiles
+StageProfiles = Optional[Dict[str, StageProfile]]
+
+
+def direction_to_language(direction: str) -> str:
+    """
+    Convert direction labels (e.g. 'IT→EN', 'it_to_en') into a language name
+    for the editor prompts (e.g. 'English', 'Italian').
+    """
+    d = (direction or "").strip().lower()
+
+    if ("to_en" in d) or ("->en" in d) or ("→en" in d) or d.endswith("en"):
+        return "English"
+    if ("to_it" in d) or ("->it" in d) or ("→it" in d) or d.endswith("it"):
+        return "Italian"
+
+    if "english" in d:
+        return "English"
+    if "italian" in d:
+        return "Italian"
+
+    return direction
+
+
+def _strip_json_fence(s: str) -> str:
+    s = (s or "").strip()
+    if s.startswith("```"):
+        lines = s.splitlines()
+        if lines and lines[0].startswith("```"):
+            lines = lines[1:]
+        if lines and lines[-1].strip() == "```":
+            lines = lines[:-1]
+        s = "\n".join(lines).strip()
+    return s
+
+
+def _try_parse_json_obj(s: str):
+    s2 = _strip_json_fence(s).strip()
+    if s2.startswith("{") and s2.endswith("}"):
+        try:
+            return json.loads(s2)
+        except json.JSONDecodeError:
+            return None
+    return None
+
+
+def _coerce_editor_result(result: Any) -> Dict[str, Any]:
+    """
+    Normalize editor output to a dict:
+    - Accept dict OR JSON-string (possibly fenced)
+    - If edited_text is itself JSON (possibly fenced), unwrap it
+    - Ensure edited_text is a string
+    - Ensure title_suggestions is a list[str]
+    """
+    # If editor returned a JSON-ish string, parse it
+    if isinstance(result, str):
+        parsed = _try_parse_json_obj(result)
+        if parsed is None:
+            raise ValueError("Editor returned non-JSON string")
+        result = parsed
+
+    if not isinstance(result, dict):
+        raise ValueError(f"Editor returned non-dict: {type(result)}")
+
+    edited_text = result.get("edited_text", "")
+    titles = result.get("title_suggestions", [])
+
+    # If edited_text accidentally contains the full JSON object as a string, unwrap it
+    if isinstance(edited_text, str):
+        inner = _try_parse_json_obj(edited_text)
+        if isinstance(inner, dict) and ("edited_text" in inner or "title_suggestions" in inner):
+            edited_text = inner.get("edited_text", edited_text)
+            inner_titles = inner.get("title_suggestions", None)
+            if isinstance(inner_titles, list):
+                titles = inner_titles
+
+    if isinstance(edited_text, dict):
+        edited_text = edited_text.get("edited_text") or json.dumps(edited_text, ensure_ascii=False)
+
+    if not isinstance(edited_text, str):
+        edited_text = str(edited_text)
+
+    if not isinstance(titles, list):
+        titles = []
+    titles = [t.strip() for t in titles if isinstance(t, str) and t.strip()]
+
+    return {"edited_text": edited_text, "title_suggestions": titles}
+
+
+def safe_copyedit(
+    text: str,
+    target_language: str,
+    usage: Optional[Dict[str, int]] = None,
+    ctx: Optional[RunContext] = None,
+    on_error: Optional[ErrorHook] = None,
+    profiles: StageProfiles = None,
+) -> Dict[str, Any]:
+    """
+    Runs copyediting safely.
+    Never crashes if the model returns invalid / empty JSON.
+    Errors are passed to `on_error` (e.g. shown in debug mode).
+    Cancellation / deadline errors are re-raised so the whole run stops.
+    """
+    try:
+        raw = copyedit_and_generate_titles(
+            text=text,
+            target_language=target_language,
+            usage=usage,
+            ctx=ctx,
+            copyedit_profile=(profiles or {}).get("copyedit"),
+            title_profile=(profiles or {}).get("title"),
+        )
+        with span("coerce_editor_result"):
+            return _coerce_editor_result(raw)
+    except RunCancelled:
+        raise
+    except Exception as e:
+        if on_error is not None:
+            on_error(e)
+        return {
+            "edited_text": text,
+            "title_suggestions": [],
+        }
+
+
+def generate_titles_only(
+    text: str,
+    target_language: str,
+    usage: Optional[Dict[str, int]] = None,
+    ctx: Optional[RunContext] = None,
+    on_error: Optional[ErrorHook] = None,
+    profiles: StageProfiles = None,
+) -> List[str]:
+    """
+    Best-effort title generation retry.
+    Never crashes (except on cancellation / deadline).
+    Errors are passed to `on_error` (e.g. shown in debug mode).
+    """
+    try:
+        raw = copyedit_and_generate_titles(
+            text=text,
+            target_language=target_language,
+            usage=usage,
+            ctx=ctx,
+            copyedit_profile=(profiles or {}).get("copyedit"),
+            title_profile=(profiles or {}).get("title"),
+        )
+        with span("coerce_editor_result"):
+            data = _coerce_editor_result(raw)
+        return data.get("title_suggestions", [])
+    except RunCancelled:
+        raise
+    except Exception as e:
+        if on_error is not None:
+            on_error(e)
+        return []
+
+
+def copyedit_results(
+    results: Dict[str, Any],
+    target_language: str,
+    usage: Optional[Dict[str, int]] = None,
+    ctx: Optional[RunContext] = None,
+    on_error: Optional[ErrorHook] = None,
+    on_label: Optional[Callable[[str, Dict[str, Any], Dict[str, Any]], None]] = None,
+    profiles: StageProfiles = None,
+    archive: Optional[RunArchive] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """Copyedit both styles of every model output and pick one title per model.
+
+    Returns {label: {"literal", "neutral", "titles"}}. `on_label(label, entry,
+    edited_neutral)` is called after each model (the app's debug view); with
+    an `archive`, each model's edited texts are appended to it as they finish.
+    Editor calls skipped because OpenAI's circuit breaker is open keep the
+    text unedited and are listed in `results["_meta"]["failover"]` (`to`: None).
+    """
+    edited_outputs: Dict[str, Dict[str, Any]] = {}
+    failover = results.setdefault("_meta", {}).setdefault("failover", [])
+
+    for label, out in results.items():
+        if label == "_meta":
+            continue
+
+        def on_label_error(e: Exception, label: str = label) -> None:
+            if isinstance(e, ProviderUnavailable):
+                # Editor breaker open: the text is kept unedited, without waiting for a timeout
+                failover.append({"label": label, "stage": "copyedit", "from": EDITOR_BADGE, "to": None, "reason": str(e)})
+            if on_error is not None:
+                on_error(e)
+
+        t0 = time.perf_counter()
+        with span(f"copyedit[{label}]"):
+            edited_literal = safe_copyedit(
+                out["literal"], target_language, usage=usage, ctx=ctx, on_error=on_label_error, profiles=profiles
+            )
+            edited_neutral = safe_copyedit(
+                out["neutral"], target_language, usage=usage, ctx=ctx, on_error=on_label_error, profiles=profiles
+            )
+
+            titles = edited_neutral.get("title_suggestions", [])
+
+            # Retry titles explicitly if missing
+            if not titles:
+                titles = generate_titles_only(
+                    text=edited_neutral["edited_text"],
+                    target_language=target_language,
+                    usage=usage,
+                    ctx=ctx,
+                    on_error=on_label_error,
+                    profiles=profiles,
+                )
+
+        edited_outputs[label] = {
+            "literal": edited_literal["edited_text"],
+            "neutral": edited_neutral["edited_text"],
+            # Only one title
+            "titles": titles[:1],
+        }
+        if archive is not None:
+            archive.append("copyedit", label=label, elapsed_s=round(time.perf_counter() - t0, 3), **edited_outputs[label])
+        if on_label is not None:
+            on_label(label, edited_outputs[label], edited_neutral)
+
+    return edited_outputs
+
+
+def store_outputs(session: str, edited_outputs: Dict[str, Dict[str, Any]], paged: bool = True) -> Dict[str, Dict[str, Any]]:
+    """Replace the session's stored run with these outputs; returns handles in the same shape.
+
+    Prose is stored `paged` so the review view loads one page of paragraphs
+    at a time; structured outputs (SRT / JSON / CSV) are stored verbatim.
+    """
+    store = get_result_store()
+    store.drop_session(session)
+    put = store.put_paged if paged else store.put
+
+    run_id = uuid.uuid4().hex[:8]
+    handles: Dict[str, Dict[str, Any]] = {}
+    for label, out in edited_outputs.items():
+        handles[label] = {
+            "literal": put(session, f"{run_id}/{label}/literal", out["literal"]),
+            "neutral": put(session, f"{run_id}/{label}/neutral", out["neutral"]),
+            "titles": out["titles"],
+        }
+    return handles
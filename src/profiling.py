@@ -0,0 +1,246 @@
+from __future__ import annotations
+
+import cProfile
+import functools
+import glob
+import json
+import os
+import pstats
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, TypeVar
+
+from .pruning import env_limits, prune_files
+
+# The run profiler of the thread (a Streamlit session's script thread, or a worker it handed work to)
+_ACTIVE = threading.local()
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+# Every profiled rerun writes a dump; keep the directory bounded
+DEFAULT_MAX_AGE_DAYS = 3.0
+DEFAULT_MAX_MB = 200.0
+
+
+def profiling_enabled(debug: bool = False) -> bool:
+    """Opt-in: the debug toggle, or YTALI_PROFILE=1 in the environment."""
+    return debug or os.getenv("YTALI_PROFILE", "").strip().lower() in ("1", "true", "yes", "on")
+
+
+class RunProfiler:
+    """Per-stage wall/CPU spans plus an optional deterministic (cProfile) profile.
+
+    Spans nest: `span("copyedit")` inside `span("run")` is recorded as
+    "run/copyedit". CPU time is the current thread's, so time spent waiting on
+    the network shows up as wall time with little CPU.
+
+    The profiler covers the thread that started it and every thread the run
+    hands work to through `propagate` (chunk workers, provider calls): their
+    spans nest under the span that was open when the work was handed over, and
+    each gets its own cProfile, merged into the report.
+    """
+
+    def __init__(self, deterministic: bool = True) -> None:
+        self.spans: List[Dict[str, Any]] = []
+        self._local = threading.local()  # per-thread span stack
+        self._lock = threading.Lock()
+        self._profile: Optional[cProfile.Profile] = cProfile.Profile() if deterministic else None
+        self._thread_profiles: List[cProfile.Profile] = []
+        self._started_at = 0.0
+        self.wall_s = 0.0
+        self.note = ""
+
+    # -------------------------
+    # Lifecycle
+    # -------------------------
+    def start(self) -> "RunProfiler":
+        self._started_at = time.perf_counter()
+        _ACTIVE.profiler = self
+        if self._profile is not None:
+            try:
+                self._profile.enable()
+            except ValueError:
+                # Another profiler is active in this process: keep spans only
+                self._profile = None
+                self.note = "deterministic profiler unavailable (another profiler active)"
+        return self
+
+    def stop(self) -> None:
+        if self._profile is not None:
+            self._profile.disable()
+        if getattr(_ACTIVE, "profiler", None) is self:
+            _ACTIVE.profiler = None
+        self.wall_s = time.perf_counter() - self._started_at
+
+    # -------------------------
+    # Spans
+    # -------------------------
+    @property
+    def _stack(self) -> List[str]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        stack = self._stack
+        stack.append(name)
+        path = "/".join(stack)
+        wall0, cpu0 = time.perf_counter(), time.thread_time()
+        try:
+            yield
+        finally:
+            record = {
+                "name": path,
+                "depth": len(stack) - 1,
+                "start_s": round(wall0 - self._started_at, 4),
+                "wall_s": round(time.perf_counter() - wall0, 4),
+                "cpu_s": round(time.thread_time() - cpu0, 4),
+                "thread": threading.current_thread().name,
+            }
+            with self._lock:
+                self.spans.append(record)
+            stack.pop()
+
+    @contextmanager
+    def thread(self, parent: List[str]) -> Iterator[None]:
+        """Make this profiler active on the current (worker) thread, below the `parent` span path."""
+        previous = getattr(_ACTIVE, "profiler", None)
+        _ACTIVE.profiler = self
+        self._local.stack = list(parent)
+        profile = cProfile.Profile() if self._profile is not None else None
+        if profile is not None:
+            try:
+                profile.enable()
+            except ValueError:
+                # Python 3.12+: the run's profile already sees every thread
+                profile = None
+        try:
+            yield
+        finally:
+            if profile is not None:
+                profile.disable()
+                with self._lock:
+                    self._thread_profiles.append(profile)
+            self._local.stack = []
+            _ACTIVE.profiler = previous
+
+    def _stats(self) -> Optional[pstats.Stats]:
+        """cProfile data of the run's thread plus its workers'."""
+        if self._profile is None:
+            return None
+        stats = pstats.Stats(self._profile)
+        with self._lock:
+            workers = list(self._thread_profiles)
+        for profile in workers:
+            try:
+                stats.add(profile)
+            except TypeError:  # nothing recorded on that thread
+                pass
+        return stats
+
+    def stage_totals(self) -> List[Dict[str, Any]]:
+        """Spans aggregated by path, in first-seen order."""
+        totals: Dict[str, Dict[str, Any]] = {}
+        for sp in sorted(self.spans, key=lambda s: s["start_s"]):
+            t = totals.setdefault(
+                sp["name"], {"name": sp["name"], "depth": sp["depth"], "count": 0, "wall_s": 0.0, "cpu_s": 0.0}
+            )
+            t["count"] += 1
+            t["wall_s"] = round(t["wall_s"] + sp["wall_s"], 4)
+            t["cpu_s"] = round(t["cpu_s"] + sp["cpu_s"], 4)
+        return list(totals.values())
+
+    # -------------------------
+    # Reporting
+    # -------------------------
+    def flame_summary(self, width: int = 30, top_functions: int = 15) -> str:
+        """Text flame view: the span tree as bars, then the hottest functions."""
+        total = self.wall_s or max((s["wall_s"] for s in self.spans), default=0.0) or 1e-9
+        lines = [f"total wall {self.wall_s:.3f}s"]
+
+        for t in self.stage_totals():
+            bar = "█" * max(1, int(round(t["wall_s"] / total * width)))
+            leaf = t["name"].rsplit("/", 1)[-1]
+            lines.append(
+                f"{'  ' * t['depth']}{leaf:<{28 - 2 * min(t['depth'], 6)}} {bar:<{width}} "
+                f"wall {t['wall_s']:.3f}s  cpu {t['cpu_s']:.3f}s  x{t['count']}"
+            )
+
+        stats = self._stats()
+        if stats is not None:
+            rows = sorted(stats.stats.items(), key=lambda kv: -kv[1][3])  # by cumulative time
+            lines.append("")
+            lines.append("hottest functions (cumulative, summed over the run's threads):")
+            for (filename, lineno, func), (_, ncalls, tottime, cumtime, _) in rows[:top_functions]:
+                where = f"{os.path.basename(filename)}:{lineno}({func})" if lineno else func
+                lines.append(f"  {cumtime:8.3f}s cum  {tottime:8.3f}s self  {ncalls:>7} calls  {where}")
+
+        if self.note:
+            lines.append(f"note: {self.note}")
+
+        return "\n".join(lines)
+
+    def write(self, directory: Optional[str] = None) -> str:
+        """Write `<run>.prof` (pstats, if deterministic) and `<run>.spans.json`; returns the base path.
+
+        Older profile files in the directory are pruned first (`prune_profiles`).
+        """
+        directory = directory or os.getenv("YTALI_PROFILE_DIR") or os.path.join(tempfile.gettempdir(), "ytali_profiles")
+        os.makedirs(directory, exist_ok=True)
+        prune_profiles(directory)
+        base = os.path.join(directory, time.strftime("run-%Y%m%d-%H%M%S") + f"-{os.getpid()}-{threading.get_ident() % 10000}")
+
+        stats = self._stats()
+        if stats is not None:
+            stats.dump_stats(base + ".prof")
+
+        with open(base + ".spans.json", "w", encoding="utf-8") as f:
+            json.dump(
+                {"wall_s": round(self.wall_s, 4), "spans": self.spans, "stages": self.stage_totals()},
+                f,
+                ensure_ascii=False,
+                indent=2,
+            )
+
+        return base
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """Record a span on this thread's active profiler; no-op when profiling is off."""
+    profiler: Optional[RunProfiler] = getattr(_ACTIVE, "profiler", None)
+    if profiler is None:
+        yield
+        return
+    with profiler.span(name):
+        yield
+
+
+def prune_profiles(directory: str) -> List[str]:
+    """Delete profile files older than YTALI_PROFILE_MAX_AGE_DAYS, then the oldest past YTALI_PROFILE_MAX_MB."""
+    max_age_days, max_bytes = env_limits("YTALI_PROFILE", DEFAULT_MAX_AGE_DAYS, DEFAULT_MAX_MB)
+    paths = glob.glob(os.path.join(directory, "run-*.prof")) + glob.glob(os.path.join(directory, "run-*.spans.json"))
+    return prune_files(paths, max_age_days, max_bytes)
+
+
+def propagate(fn: F) -> F:
+    """`fn` bound to this thread's active profiler, to run on another thread.
+
+    Use it where a run hands work to a pool or a worker thread, so spans and the
+    cProfile cover that work too. Returns `fn` itself when profiling is off.
+    """
+    profiler: Optional[RunProfiler] = getattr(_ACTIVE, "profiler", None)
+    if profiler is None:
+        return fn
+    parent = list(profiler._stack)
+
+    @functools.wraps(fn)
+    def bound(*args: Any, **kwargs: Any) -> Any:
+        with profiler.thread(parent):
+            return fn(*args, **kwargs)
+
+    return bound  # type: ignore[return-value]
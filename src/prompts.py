@@ -1,6 +1,28 @@
 from __future__ import annotations
 
 
+def shared_context_block(shared_context: str) -> str:
+    """Background shared by every request of a run (style guide, article context).
+
+    Appended to the stable instructions so it is part of the cached prompt prefix.
+    """
+    return f"""
+Background context (for reference only; do not translate it or repeat it in the output):
+{shared_context.strip()}
+"""
+
+
+def glossary_block(hits) -> str:
+    """House glossary terms found in the current text (GlossaryHit list)."""
+    lines = [
+        "",
+        "Glossary (house style; these renderings are mandatory):",
+    ]
+    for h in hits:
+        lines.append(f"- {h.source} => {h.target}")
+    return "\n".join(lines) + "\n"
+
+
 def literal_prompt(source_lang: str, target_lang: str) -> str:
     return f"""You are a professional translator.
 
@@ -28,3 +50,45 @@ Rules:
 
 Output: {target_lang} translation only.
 """
+
+
+def keep_paragraphs_rule() -> str:
+    return """
+Paragraphs: the input paragraphs are separated by blank lines. Keep exactly the same paragraphs in the same order,
+separated by blank lines; do not merge or split them.
+"""
+
+
+def packed_segments_rule() -> str:
+    return """
+Input format: the text is a list of independent segments. Each segment starts with a marker line like [[1]], [[2]], ...
+
+Segment rules:
+- Translate each segment on its own; do not merge, split, reorder, or drop segments.
+- Copy every marker line exactly as it appears, on its own line, before the segment's translation.
+- Keep line breaks inside a segment.
+"""
+
+
+def tm_hints_block(pairs) -> str:
+    """Reference translations from the translation memory, as (source, target, exact) tuples."""
+    lines = [
+        "",
+        "Translation memory (previously approved translations of the same or similar sentences):",
+        "- Reuse their wording where the source matches; adapt names, dates and numbers to the current text.",
+    ]
+    for source, target, exact in pairs:
+        tag = "exact" if exact else "similar"
+        lines.append(f"- [{tag}] Source: {source}\n  Translation: {target}")
+    return "\n".join(lines) + "\n"
+
+
+def output_retry_note(reason: str, target_lang: str) -> str:
+    """Sent with a chunk whose previous translation failed a local check (see src/validation.py)."""
+    notes = {
+        "too_short": "Your previous translation of this text was incomplete. Translate the whole text, to the end.",
+        "truncated": "Your previous translation stopped mid-sentence. Translate the whole text, to the end.",
+        "too_long": "Your previous translation was much longer than the text. Translate only; add no commentary and do not repeat text.",
+        "wrong_language": f"Your previous answer was not in {target_lang}. Translate the text into {target_lang}.",
+    }
+    return f"\nNote: {notes.get(reason, 'Your previous translation was rejected. Translate the text again.')}\n"
@@ -1,15 +1,123 @@
-from .types import ModelConfig, ProviderName
+import time
+from typing import Dict, Optional
+
+from ..run_context import RunCancelled, RunContext, call_with_context
+from .health import ProviderUnavailable, get_breaker, health_snapshot, is_outage_error, is_timeout_error
+from .types import ModelConfig, ProviderName, StageProfile, new_usage, record_usage
 from .openai_provider import translate_openai
 from .gemini_provider import translate_gemini
+from .routing import LatencyRouter, get_router, routing_snapshot
+from .standin import StandInProfile, standin_profile, standin_stats, translate_standin, use_standin
+
+
+DEFAULT_CALL_TIMEOUT_S = 120.0
+
+
+def translate_any(
+    cfg: ModelConfig,
+    instructions: str,
+    text: str,
+    context: str = "",
+    usage: Optional[Dict[str, int]] = None,
+    ctx: Optional[RunContext] = None,
+    profile: Optional[StageProfile] = None,
+) -> str:
+    """Dispatch to the provider.
 
+    `instructions` should be the stable, shared part of the prompt so provider
+    prompt caching can reuse it; request-specific additions go in `context`.
+    With a RunContext, the call gets a timeout capped by the run deadline and
+    is aborted as soon as the run is cancelled.
 
-def translate_any(cfg: ModelConfig, instructions: str, text: str) -> str:
+    Each provider has a circuit breaker: while it is open, this raises
+    ProviderUnavailable immediately instead of waiting for another timeout.
+    Latency and outage errors feed the process-wide router (Auto mode). A
+    timeout that only happened because the run deadline shortened the call's
+    timeout says nothing about the provider and is counted by neither.
+    `profile` is the calling stage's latency profile (reasoning effort, output
+    cap, temperature, service tier); None keeps the provider defaults.
+    """
     cfg.validate()
 
+    timeout = ctx.call_timeout() if ctx is not None else DEFAULT_CALL_TIMEOUT_S
+    capped_by_deadline = ctx is not None and timeout < ctx.call_timeout_s
+
+    breaker = get_breaker(cfg.provider)
+    breaker.before_call()
+    started = time.perf_counter()
+    try:
+        out = _dispatch(cfg, instructions, text, context, usage, ctx, timeout, profile)
+    except RunCancelled:
+        breaker.release()
+        raise
+    except Exception as e:
+        if capped_by_deadline and is_timeout_error(e):
+            breaker.release()
+            raise
+        breaker.record_failure(e)
+        if is_outage_error(e):
+            get_router().record(cfg.provider, cfg.model, time.perf_counter() - started, len(text), ok=False)
+        raise
+    except BaseException:
+        # Interrupted by the host (e.g. Streamlit stopping the script)
+        breaker.release()
+        raise
+    breaker.record_success()
+    get_router().record(cfg.provider, cfg.model, time.perf_counter() - started, len(text), ok=True)
+    return out
+
+
+def _dispatch(
+    cfg: ModelConfig,
+    instructions: str,
+    text: str,
+    context: str,
+    usage: Optional[Dict[str, int]],
+    ctx: Optional[RunContext],
+    timeout: float,
+    profile: Optional[StageProfile] = None,
+) -> str:
+    if standin_profile() is not None:
+        # Load testing: simulated latency, no network
+        return call_with_context(
+            ctx,
+            translate_standin,
+            cfg.api_key,
+            cfg.model,
+            instructions,
+            text,
+            context=context,
+            usage=usage,
+            timeout=timeout,
+            profile=profile,
+        )
+
     if cfg.provider == "openai":
-        return translate_openai(cfg.api_key, cfg.model, instructions, text)
+        return call_with_context(
+            ctx,
+            translate_openai,
+            cfg.api_key,
+            cfg.model,
+            instructions,
+            text,
+            context=context,
+            usage=usage,
+            timeout=timeout,
+            profile=profile,
+        )
 
     if cfg.provider == "gemini":
-        return translate_gemini(cfg.api_key, cfg.model, instructions, text)
+        return call_with_context(
+            ctx,
+            translate_gemini,
+            cfg.api_key,
+            cfg.model,
+            instructions,
+            text,
+            context=context,
+            usage=usage,
+            timeout=timeout,
+            profile=profile,
+        )
 
     raise ValueError(f"Unknown provider: {cfg.provider}")
@@ -0,0 +1,380 @@
+from __future__ import annotations
+
+import abc
+import json
+import random
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from .gemini_provider import _API_BASE, build_payload, get_session, record_response_usage as record_gemini_usage, response_text
+from .health import ProviderHTTPError
+from .openai_provider import build_input, get_client, profile_params, prompt_cache_key
+from .standin import standin_profile
+from .types import StageProfile, new_usage, record_usage
+
+# Batch states, normalized across providers
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+EXPIRED = "expired"
+CANCELLED = "cancelled"
+FINAL_STATES = (COMPLETED, FAILED, EXPIRED, CANCELLED)
+
+
+@dataclass(frozen=True)
+class BatchRequest:
+    key: str  # unique within the batch; results are matched back by it
+    instructions: str
+    text: str
+    context: str = ""
+    profile: Optional[StageProfile] = None
+
+
+@dataclass
+class BatchResult:
+    key: str
+    text: Optional[str]  # None when the request failed
+    error: str = ""
+    usage: Dict[str, int] = field(default_factory=new_usage)
+
+
+@dataclass(frozen=True)
+class BatchStatus:
+    state: str
+    total: int = 0
+    completed: int = 0
+    failed: int = 0
+
+    @property
+    def done(self) -> bool:
+        return self.state in FINAL_STATES
+
+
+class BatchBackend(abc.ABC):
+    """Submit / poll / fetch for one provider's asynchronous batch endpoint.
+
+    `api_calls` counts HTTP requests made, to compare against one request per
+    translated chunk in synchronous mode.
+    """
+
+    provider = ""
+    max_requests = 10_000
+    max_bytes = 100 * 2**20
+
+    def __init__(self) -> None:
+        self.api_calls = 0
+        self._lock = threading.Lock()
+
+    def _count(self, n: int = 1) -> None:
+        with self._lock:
+            self.api_calls += n
+
+    @abc.abstractmethod
+    def submit(self, requests: List[BatchRequest], model: str, api_key: str, name: str = "") -> str:
+        """Start a batch; returns its id."""
+
+    @abc.abstractmethod
+    def status(self, batch_id: str, api_key: str) -> BatchStatus:
+        """Current state and request counts."""
+
+    @abc.abstractmethod
+    def results(self, batch_id: str, api_key: str, keys: List[str]) -> List[BatchResult]:
+        """Every submitted key exactly once; requests without an answer come back as errors."""
+
+    @abc.abstractmethod
+    def cancel(self, batch_id: str, api_key: str) -> None:
+        """Ask the provider to stop the batch."""
+
+    @staticmethod
+    def _complete(found: Dict[str, BatchResult], keys: List[str]) -> List[BatchResult]:
+        return [found.get(k) or BatchResult(k, None, "no result returned for this request") for k in keys]
+
+
+# -------------------------
+# OpenAI Batch API (/v1/responses, 24h window)
+# -------------------------
+_OPENAI_STATES = {
+    "completed": COMPLETED,
+    "failed": FAILED,
+    "expired": EXPIRED,
+    "cancelled": CANCELLED,
+}
+
+
+def _openai_output_text(body: Dict[str, Any]) -> str:
+    """output_text of a raw Responses API body (the SDK property is not in the JSON)."""
+    if body.get("output_text"):
+        return str(body["output_text"]).strip()
+    parts = []
+    for item in body.get("output") or []:
+        if item.get("type") != "message":
+            continue
+        for content in item.get("content") or []:
+            if content.get("type") == "output_text":
+                parts.append(content.get("text") or "")
+    return "".join(parts).strip()
+
+
+class OpenAIBatch(BatchBackend):
+    provider = "openai"
+    max_requests = 50_000
+    max_bytes = 190 * 2**20  # input files are capped at 200 MB
+
+    def submit(self, requests: List[BatchRequest], model: str, api_key: str, name: str = "") -> str:
+        lines = []
+        for r in requests:
+            body = {
+                "model": model,
+                "instructions": r.instructions,
+                "input": build_input(r.text, r.context),
+                "prompt_cache_key": prompt_cache_key(r.instructions),
+            }
+            # Batches run at their own discounted tier: no service_tier
+            params = profile_params(r.profile, model, len(r.text) + len(r.context))
+            body.update({k: v for k, v in params.items() if k != "service_tier"})
+            lines.append(json.dumps({"custom_id": r.key, "method": "POST", "url": "/v1/responses", "body": body}, ensure_ascii=False))
+
+        client = get_client(api_key)
+        uploaded = client.files.create(
+            file=(f"{name or 'ytali-bulk'}.jsonl", ("\n".join(lines) + "\n").encode("utf-8")),
+            purpose="batch",
+        )
+        batch = client.batches.create(
+            input_file_id=uploaded.id,
+            endpoint="/v1/responses",
+            completion_window="24h",
+            metadata={"source": "ytali-bulk", "name": name[:200]},
+        )
+        self._count(2)
+        return batch.id
+
+    def status(self, batch_id: str, api_key: str) -> BatchStatus:
+        batch = get_client(api_key).batches.retrieve(batch_id)
+        self._count()
+        counts = getattr(batch, "request_counts", None)
+        return BatchStatus(
+            state=_OPENAI_STATES.get(batch.status, RUNNING),
+            total=getattr(counts, "total", 0) or 0,
+            completed=getattr(counts, "completed", 0) or 0,
+            failed=getattr(counts, "failed", 0) or 0,
+        )
+
+    def results(self, batch_id: str, api_key: str, keys: List[str]) -> List[BatchResult]:
+        client = get_client(api_key)
+        batch = client.batches.retrieve(batch_id)
+        self._count()
+
+        found: Dict[str, BatchResult] = {}
+        for file_id in (getattr(batch, "output_file_id", None), getattr(batch, "error_file_id", None)):
+            if not file_id:
+                continue
+            content = client.files.content(file_id).text
+            self._count()
+            for line in content.splitlines():
+                if not line.strip():
+                    continue
+                row = json.loads(line)
+                key = row.get("custom_id", "")
+                response = row.get("response") or {}
+                body = response.get("body") or {}
+                if row.get("error") or response.get("status_code") != 200:
+                    error = row.get("error") or body.get("error") or {}
+                    found[key] = BatchResult(key, None, f"{response.get('status_code', '')} {error.get('message', error)}".strip())
+                    continue
+                usage = new_usage()
+                u = body.get("usage") or {}
+                record_usage(
+                    usage,
+                    input_tokens=u.get("input_tokens", 0),
+                    cached_tokens=(u.get("input_tokens_details") or {}).get("cached_tokens", 0),
+                    output_tokens=u.get("output_tokens", 0),
+                )
+                found[key] = BatchResult(key, _openai_output_text(body), usage=usage)
+        return self._complete(found, keys)
+
+    def cancel(self, batch_id: str, api_key: str) -> None:
+        get_client(api_key).batches.cancel(batch_id)
+        self._count()
+
+
+# -------------------------
+# Gemini Batch Mode (batchGenerateContent, inline requests)
+# -------------------------
+_GEMINI_STATES = {
+    "BATCH_STATE_SUCCEEDED": COMPLETED,
+    "JOB_STATE_SUCCEEDED": COMPLETED,
+    "BATCH_STATE_FAILED": FAILED,
+    "JOB_STATE_FAILED": FAILED,
+    "BATCH_STATE_EXPIRED": EXPIRED,
+    "JOB_STATE_EXPIRED": EXPIRED,
+    "BATCH_STATE_CANCELLED": CANCELLED,
+    "JOB_STATE_CANCELLED": CANCELLED,
+}
+
+
+class GeminiBatch(BatchBackend):
+    provider = "gemini"
+    max_requests = 10_000
+    max_bytes = 18 * 2**20  # inline batch requests are capped at 20 MB
+
+    def _get(self, batch_id: str, api_key: str) -> Dict[str, Any]:
+        r = get_session().get(f"{_API_BASE}/{batch_id}", params={"key": api_key.strip()}, timeout=60)
+        self._count()
+        if r.status_code != 200:
+            raise ProviderHTTPError(f"Gemini batch API error {r.status_code}:\n{r.text}", r.status_code)
+        return r.json()
+
+    def submit(self, requests: List[BatchRequest], model: str, api_key: str, name: str = "") -> str:
+        inlined = []
+        for r in requests:
+            request = build_payload(r.text, r.context, r.profile)
+            request["systemInstruction"] = {"parts": [{"text": r.instructions}]}
+            inlined.append({"request": request, "metadata": {"key": r.key}})
+
+        payload = {
+            "batch": {
+                "display_name": name or "ytali-bulk",
+                "input_config": {"requests": {"requests": inlined}},
+            }
+        }
+        r = get_session().post(
+            f"{_API_BASE}/models/{model}:batchGenerateContent",
+            params={"key": api_key.strip()},
+            json=payload,
+            timeout=300,
+        )
+        self._count()
+        if r.status_code != 200:
+            raise ProviderHTTPError(f"Gemini batch API error {r.status_code}:\n{r.text}", r.status_code)
+        return r.json()["name"]
+
+    def status(self, batch_id: str, api_key: str) -> BatchStatus:
+        data = self._get(batch_id, api_key)
+        meta = data.get("metadata") or {}
+        stats = meta.get("batchStats") or {}
+        state = _GEMINI_STATES.get(meta.get("state") or data.get("state") or "", RUNNING)
+        if data.get("done") and state == RUNNING:
+            state = FAILED if data.get("error") else COMPLETED
+        return BatchStatus(
+            state=state,
+            total=int(stats.get("requestCount", 0) or 0),
+            completed=int(stats.get("successfulRequestCount", 0) or 0),
+            failed=int(stats.get("failedRequestCount", 0) or 0),
+        )
+
+    def results(self, batch_id: str, api_key: str, keys: List[str]) -> List[BatchResult]:
+        data = self._get(batch_id, api_key)
+        output = data.get("response") or (data.get("metadata") or {}).get("output") or {}
+        items = output.get("inlinedResponses") or []
+        if isinstance(items, dict):
+            items = items.get("inlinedResponses") or []
+
+        found: Dict[str, BatchResult] = {}
+        for n, item in enumerate(items):
+            # Responses come back in request order; the metadata key is echoed when present
+            key = (item.get("metadata") or {}).get("key") or (keys[n] if n < len(keys) else "")
+            if item.get("error"):
+                found[key] = BatchResult(key, None, str(item["error"].get("message", item["error"])))
+                continue
+            usage = new_usage()
+            response = item.get("response") or {}
+            record_gemini_usage(response, usage)
+            try:
+                found[key] = BatchResult(key, response_text(response), usage=usage)
+            except RuntimeError as e:
+                found[key] = BatchResult(key, None, str(e).splitlines()[0])
+        return self._complete(found, keys)
+
+    def cancel(self, batch_id: str, api_key: str) -> None:
+        r = get_session().post(f"{_API_BASE}/{batch_id}:cancel", params={"key": api_key.strip()}, timeout=60)
+        self._count()
+        if r.status_code != 200:
+            raise ProviderHTTPError(f"Gemini batch API error {r.status_code}:\n{r.text}", r.status_code)
+
+
+# -------------------------
+# Stand-in (no network; see standin.py)
+# -------------------------
+_STANDIN_BATCHES: Dict[str, Dict[str, Any]] = {}
+_STANDIN_LOCK = threading.Lock()
+
+
+class StandInBatch(BatchBackend):
+    """Simulated batch endpoint: the whole batch completes after a turnaround
+    that grows with its size, each request failing with the profile's error rate.
+    """
+
+    def __init__(self, provider: str) -> None:
+        super().__init__()
+        self.provider = provider
+
+    def submit(self, requests: List[BatchRequest], model: str, api_key: str, name: str = "") -> str:
+        profile = standin_profile()
+        if profile is None:
+            raise RuntimeError("Stand-in provider is not enabled.")
+        tokens = sum(len(r.text) // 4 for r in requests)
+        # Provider-side capacity is much larger for batches than for one client's live calls
+        turnaround = (5 * profile.first_token_s + tokens / (profile.tokens_per_s * profile.max_in_flight * 4)) * profile.time_scale
+        batch_id = f"standin-batch-{uuid.uuid4().hex[:12]}"
+        with _STANDIN_LOCK:
+            _STANDIN_BATCHES[batch_id] = {
+                "requests": list(requests),
+                "ready_at": time.monotonic() + turnaround,
+                "error_rate": profile.error_rate,
+                "cancelled": False,
+            }
+        self._count()
+        return batch_id
+
+    def _batch(self, batch_id: str) -> Dict[str, Any]:
+        with _STANDIN_LOCK:
+            batch = _STANDIN_BATCHES.get(batch_id)
+        if batch is None:
+            raise ProviderHTTPError(f"Stand-in batch not found: {batch_id}", 404)
+        return batch
+
+    def status(self, batch_id: str, api_key: str) -> BatchStatus:
+        batch = self._batch(batch_id)
+        self._count()
+        total = len(batch["requests"])
+        if batch["cancelled"]:
+            return BatchStatus(CANCELLED, total=total)
+        if time.monotonic() < batch["ready_at"]:
+            return BatchStatus(RUNNING, total=total)
+        return BatchStatus(COMPLETED, total=total, completed=total)
+
+    def results(self, batch_id: str, api_key: str, keys: List[str]) -> List[BatchResult]:
+        batch = self._batch(batch_id)
+        self._count()
+        found: Dict[str, BatchResult] = {}
+        for r in batch["requests"]:
+            if random.random() < batch["error_rate"]:
+                found[r.key] = BatchResult(r.key, None, "Stand-in provider: injected 503")
+                continue
+            usage = new_usage()
+            record_usage(
+                usage,
+                input_tokens=(len(r.instructions) + len(r.context) + len(r.text)) // 4,
+                cached_tokens=len(r.instructions) // 4,
+                output_tokens=len(r.text) // 4,
+            )
+            found[r.key] = BatchResult(r.key, r.text.strip(), usage=usage)
+        return self._complete(found, keys)
+
+    def cancel(self, batch_id: str, api_key: str) -> None:
+        self._batch(batch_id)["cancelled"] = True
+        self._count()
+
+
+def get_batch_backend(provider: str) -> BatchBackend:
+    """Batch backend for `provider`; the stand-in while it is enabled."""
+    if standin_profile() is not None:
+        return StandInBatch(provider)
+    if provider == "openai":
+        return OpenAIBatch()
+    if provider == "gemini":
+        return GeminiBatch()
+    raise ValueError(f"Unknown provider: {provider}")
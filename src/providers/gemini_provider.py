@@ -1,7 +1,173 @@
 from __future__ import annotations
 
+import hashlib
 import json
-import requests
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple
+
+from .health import ProviderHTTPError, UnexpectedResponse
+from .transport import abortable_session
+from .types import StageProfile, record_usage
+
+_API_BASE = "https://generativelanguage.googleapis.com/v1beta"
+
+# Explicit context caching only pays off (and is only accepted) for long prefixes.
+# Gemini 2.5 Flash needs >= 1024 tokens; estimate ~4 chars per token.
+CACHE_MIN_CHARS = 4096
+CACHE_TTL_S = 600
+
+# Gemini 2.5 thinking budget (tokens) per reasoning effort
+_THINKING_BUDGET = {"none": 0, "minimal": 0, "low": 1024, "medium": 8192, "high": 24576}
+
+# (api key hash, model, instructions hash) -> (cachedContents name, expires_at)
+_CACHES: Dict[Tuple[str, str, str], Tuple[str, float]] = {}
+# Keys whose cache creation was rejected: don't retry until the TTL would have run out
+_CACHE_FAILED: Dict[Tuple[str, str, str], float] = {}
+_CACHE_LOCK = threading.Lock()
+
+if TYPE_CHECKING:
+    import requests
+
+_SESSION: Optional["requests.Session"] = None
+_SESSION_LOCK = threading.Lock()
+
+
+def get_session() -> "requests.Session":
+    """Shared HTTP session (keep-alive pool); `requests` is imported on first use.
+
+    Requests sent from RunContext.run are aborted when the run is cancelled (see transport.py).
+    """
+    global _SESSION
+    with _SESSION_LOCK:
+        if _SESSION is None:
+            try:
+                _SESSION = abortable_session()
+            except Exception:
+                # Aborting on cancel is best-effort; a plain session still works
+                import requests
+
+                _SESSION = requests.Session()
+        return _SESSION
+
+
+def _sha(s: str) -> str:
+    return hashlib.sha1(s.encode("utf-8")).hexdigest()
+
+
+def _cached_instructions(api_key: str, model: str, instructions: str, timeout: float = 30) -> Optional[str]:
+    """Return a cachedContents name holding `instructions`, creating it if needed.
+
+    Returns None when the prefix is too short to cache or creation failed; the
+    caller then sends the instructions inline.
+    """
+    if len(instructions) < CACHE_MIN_CHARS:
+        return None
+
+    key = (_sha(api_key)[:12], model, _sha(instructions))
+    now = time.time()
+
+    with _CACHE_LOCK:
+        hit = _CACHES.get(key)
+        if hit and hit[1] > now + 30:
+            return hit[0]
+        if _CACHE_FAILED.get(key, 0) > now:
+            return None
+
+    payload = {
+        "model": f"models/{model}",
+        "systemInstruction": {"parts": [{"text": instructions}]},
+        "ttl": f"{CACHE_TTL_S}s",
+    }
+
+    import requests
+
+    try:
+        r = get_session().post(
+            f"{_API_BASE}/cachedContents",
+            params={"key": api_key},
+            json=payload,
+            timeout=min(timeout, 30),
+        )
+        name = r.json().get("name") if r.status_code == 200 else None
+    except (requests.RequestException, ValueError):
+        name = None
+
+    with _CACHE_LOCK:
+        if name:
+            _CACHES[key] = (name, now + CACHE_TTL_S)
+        else:
+            _CACHE_FAILED[key] = now + CACHE_TTL_S
+
+    return name
+
+
+def _forget_cache(name: str) -> None:
+    with _CACHE_LOCK:
+        for key, (cached_name, _) in list(_CACHES.items()):
+            if cached_name == name:
+                del _CACHES[key]
+
+
+def generation_config(profile: Optional[StageProfile], input_chars: int) -> Dict[str, Any]:
+    """generationConfig for a stage profile (reasoning effort becomes a thinking budget)."""
+    config: Dict[str, Any] = {"temperature": 0.2}
+    if profile is None:
+        return config
+    if profile.temperature is not None:
+        config["temperature"] = profile.temperature
+    cap = profile.output_cap(input_chars)
+    if cap:
+        config["maxOutputTokens"] = cap
+    if profile.reasoning_effort in _THINKING_BUDGET:
+        config["thinkingConfig"] = {"thinkingBudget": _THINKING_BUDGET[profile.reasoning_effort]}
+    return config
+
+
+def build_payload(text: str, context: str = "", profile: Optional[StageProfile] = None) -> Dict[str, Any]:
+    """generateContent body without the instructions (sent inline or as cachedContent)."""
+    parts = []
+    if context:
+        parts.append({"text": context})
+    parts.append({"text": text})
+    return {
+        "contents": [{"role": "user", "parts": parts}],
+        "generationConfig": generation_config(profile, len(text) + len(context)),
+    }
+
+
+def response_text(data: Dict[str, Any]) -> str:
+    """The first candidate's text.
+
+    A candidate cut off by maxOutputTokens (e.g. the thinking budget used up
+    the stage profile's cap) can come back without parts: that is an empty,
+    truncated output (see record_response_usage), left to the output checks.
+    """
+    candidate = (data.get("candidates") or [{}])[0]
+    if candidate.get("finishReason") == "MAX_TOKENS" and not (candidate.get("content") or {}).get("parts"):
+        return ""
+    try:
+        return (candidate["content"]["parts"][0]["text"] or "").strip()
+    except Exception:
+        raise UnexpectedResponse(
+            "Unexpected Gemini response shape:\n"
+            + json.dumps(data, ensure_ascii=False, indent=2)[:4000]
+        )
+
+
+def record_response_usage(data: Dict[str, Any], usage: Optional[Dict[str, int]]) -> None:
+    meta = data.get("usageMetadata") or {}
+    candidates = data.get("candidates") or [{}]
+    thoughts = meta.get("thoughtsTokenCount", 0) or 0
+    record_usage(
+        usage,
+        input_tokens=meta.get("promptTokenCount", 0),
+        cached_tokens=meta.get("cachedContentTokenCount", 0),
+        # Thinking tokens are billed as output but counted separately
+        output_tokens=(meta.get("candidatesTokenCount", 0) or 0) + thoughts,
+        reasoning_tokens=thoughts,
+        truncated=candidates[0].get("finishReason") == "MAX_TOKENS",
+    )
 
 
 def translate_gemini(
@@ -9,6 +175,10 @@ def translate_gemini(
     model: str,
     instructions: str,
     text: str,
+    context: str = "",
+    usage: Optional[Dict[str, int]] = None,
+    timeout: float = 120,
+    profile: Optional[StageProfile] = None,
 ) -> str:
     """Gemini REST call.
 
@@ -18,6 +188,9 @@ def translate_gemini(
     Notes:
       - model example: "gemini-2.5-flash"
       - uses systemInstruction + user content
+      - long instructions are stored once as cachedContents and referenced by name
+      - per-request `context` goes into the user turn, after the cached prefix
+      - `profile` sets temperature, output cap and thinking budget (no service tier)
     """
 
     if not api_key or not api_key.strip():
@@ -25,26 +198,30 @@ def translate_gemini(
     if not model or not model.strip():
         raise ValueError("Missing Gemini model name.")
 
-    url = f"https://generativelanguage.googleapis.com/v1beta/models/{model}:generateContent"
-    params = {"key": api_key.strip()}
+    api_key = api_key.strip()
+    url = f"{_API_BASE}/models/{model}:generateContent"
+    params = {"key": api_key}
 
-    payload = {
-        "systemInstruction": {"parts": [{"text": instructions}]},
-        "contents": [{"role": "user", "parts": [{"text": text}]}],
-        "generationConfig": {"temperature": 0.2},
-    }
+    payload = build_payload(text, context, profile)
+
+    cache_name = _cached_instructions(api_key, model, instructions, timeout=timeout)
+    if cache_name:
+        payload["cachedContent"] = cache_name
+    else:
+        payload["systemInstruction"] = {"parts": [{"text": instructions}]}
 
-    r = requests.post(url, params=params, json=payload, timeout=120)
+    r = get_session().post(url, params=params, json=payload, timeout=timeout)
+
+    if cache_name and r.status_code in (400, 403, 404):
+        # Cache evicted or rejected server-side: forget it and resend inline once
+        _forget_cache(cache_name)
+        payload.pop("cachedContent", None)
+        payload["systemInstruction"] = {"parts": [{"text": instructions}]}
+        r = get_session().post(url, params=params, json=payload, timeout=timeout)
 
     if r.status_code != 200:
-        raise RuntimeError(f"Gemini API error {r.status_code}:\n{r.text}")
+        raise ProviderHTTPError(f"Gemini API error {r.status_code}:\n{r.text}", r.status_code)
 
     data = r.json()
-
-    try:
-        return (data["candidates"][0]["content"]["parts"][0]["text"] or "").strip()
-    except Exception:
-        raise RuntimeError(
-            "Unexpected Gemini response shape:\n"
-            + json.dumps(data, ensure_ascii=False, indent=2)[:4000]
-        )
+    record_response_usage(data, usage)
+    return response_text(data)
@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Dict, Optional
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class ProviderUnavailable(RuntimeError):
+    """Raised without calling the provider because its circuit breaker is open."""
+
+    def __init__(self, provider: str, retry_in_s: float) -> None:
+        super().__init__(f"{provider} is unavailable (circuit open, retry in {retry_in_s:.0f}s)")
+        self.provider = provider
+        self.retry_in_s = retry_in_s
+
+
+class ProviderHTTPError(RuntimeError):
+    """Non-200 response from a provider REST endpoint."""
+
+    def __init__(self, message: str, status_code: int) -> None:
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class UnexpectedResponse(RuntimeError):
+    """The provider answered 200, but not in a shape we can read (e.g. no candidate text)."""
+
+
+def is_outage_error(exc: BaseException) -> bool:
+    """Whether a failure says something about provider health.
+
+    Timeouts, connection errors, 5xx, 408 and 429 count; other 4xx (bad request,
+    auth), unreadable 200 responses and local validation errors do not, since
+    retrying elsewhere or later would not fix them.
+    """
+    if isinstance(exc, (ValueError, UnexpectedResponse)):
+        return False
+    status = getattr(exc, "status_code", None)
+    if isinstance(status, int) and 400 <= status < 500 and status not in (408, 429):
+        return False
+    return True
+
+
+def is_timeout_error(exc: BaseException) -> bool:
+    """Timeout from any of the HTTP stacks (requests, httpx / openai, stand-in), matched by class name."""
+    return isinstance(exc, TimeoutError) or any("Timeout" in cls.__name__ for cls in type(exc).__mro__)
+
+
+class CircuitBreaker:
+    """Closed → open after `failure_threshold` consecutive outage errors.
+
+    While open, calls fail fast. After `cooldown_s` the breaker goes half-open
+    and lets a single probe through: success closes it, failure re-opens it.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 3, cooldown_s: float = 60.0) -> None:
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.cooldown_s = cooldown_s
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def retry_in(self) -> float:
+        return max(0.0, self.opened_at + self.cooldown_s - time.monotonic())
+
+    def is_open(self) -> bool:
+        """True while calls would be rejected (open and still cooling down)."""
+        with self._lock:
+            return self.state == OPEN and self.retry_in() > 0
+
+    def before_call(self) -> None:
+        """Raise ProviderUnavailable if the call must not go out."""
+        with self._lock:
+            if self.state == CLOSED:
+                return
+            if self.state == OPEN:
+                if self.retry_in() > 0:
+                    raise ProviderUnavailable(self.name, self.retry_in())
+                self.state = HALF_OPEN
+                self._probe_in_flight = False
+            # HALF_OPEN: exactly one probe at a time
+            if self._probe_in_flight:
+                raise ProviderUnavailable(self.name, self.cooldown_s)
+            self._probe_in_flight = True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self, exc: Optional[BaseException] = None) -> None:
+        with self._lock:
+            self._probe_in_flight = False
+            if exc is not None and not is_outage_error(exc):
+                # Not a health signal; a half-open probe simply gets another go
+                return
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+
+    def release(self) -> None:
+        """Call ended without a verdict (e.g. run cancelled): free the probe slot."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def snapshot(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "state": self.state,
+                "failures": self.failures,
+                "retry_in_s": round(self.retry_in(), 1) if self.state == OPEN else 0.0,
+            }
+
+
+_BREAKERS: Dict[str, CircuitBreaker] = {}
+_BREAKERS_LOCK = threading.Lock()
+
+
+def get_breaker(provider: str) -> CircuitBreaker:
+    """Process-wide breaker per provider, shared by all sessions."""
+    with _BREAKERS_LOCK:
+        breaker = _BREAKERS.get(provider)
+        if breaker is None:
+            breaker = _BREAKERS[provider] = CircuitBreaker(provider)
+        return breaker
+
+
+def health_snapshot() -> Dict[str, Dict[str, object]]:
+    with _BREAKERS_LOCK:
+        breakers = list(_BREAKERS.items())
+    return {name: b.snapshot() for name, b in breakers}
@@ -1,6 +1,104 @@
 from __future__ import annotations
 
-from openai import OpenAI
+import hashlib
+import threading
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Set
+
+from .transport import abortable_http_client
+from .types import StageProfile, record_usage
+
+if TYPE_CHECKING:  # the SDK is imported lazily: it is the slowest import in the app
+    from openai import OpenAI
+
+_CLIENTS: Dict[str, "OpenAI"] = {}
+_CLIENTS_LOCK = threading.Lock()
+# model -> profile parameters the API rejected for it (sent without them from then on)
+_REJECTED: Dict[str, Set[str]] = {}
+_REJECTED_LOCK = threading.Lock()
+
+
+def get_client(api_key: str) -> "OpenAI":
+    """Shared client per API key, so calls reuse pooled (already TLS-connected) connections.
+
+    Requests sent from RunContext.run are aborted when the run is cancelled (see transport.py).
+    """
+    with _CLIENTS_LOCK:
+        client = _CLIENTS.get(api_key)
+        if client is None:
+            from openai import OpenAI
+
+            try:
+                http_client = abortable_http_client()
+            except Exception:
+                # Aborting on cancel is best-effort; the SDK's own client still works
+                http_client = None
+            client = _CLIENTS[api_key] = OpenAI(api_key=api_key, http_client=http_client)
+        return client
+
+
+def prompt_cache_key(instructions: str) -> str:
+    """Stable cache routing key for a given instruction prefix."""
+    return "ytali-" + hashlib.sha1(instructions.encode("utf-8")).hexdigest()[:16]
+
+
+def build_input(text: str, context: str = "") -> List[Dict[str, str]]:
+    """Responses API input items: per-request context (developer), then the text (user)."""
+    items = []
+    if context:
+        items.append({"role": "developer", "content": context})
+    items.append({"role": "user", "content": text})
+    return items
+
+
+def profile_params(profile: Optional[StageProfile], model: str, input_chars: int) -> Dict[str, Any]:
+    """Responses API parameters for a stage profile, minus any this model rejected before."""
+    if profile is None:
+        return {}
+    params: Dict[str, Any] = {}
+    if profile.reasoning_effort:
+        params["reasoning"] = {"effort": profile.reasoning_effort}
+    cap = profile.output_cap(input_chars)
+    if cap:
+        params["max_output_tokens"] = cap
+    if profile.temperature is not None:
+        params["temperature"] = profile.temperature
+    if profile.service_tier:
+        params["service_tier"] = profile.service_tier
+    with _REJECTED_LOCK:
+        rejected = _REJECTED.get(model, set())
+    return {k: v for k, v in params.items() if k not in rejected}
+
+
+def create_with_params(create: Callable[..., Any], params: Dict[str, Any], **kwargs: Any) -> Any:
+    """`create(**kwargs, **params)`; if the API rejects one of `params` (HTTP 400), drop it, remember it, retry once."""
+    try:
+        return create(**kwargs, **params)
+    except Exception as e:
+        bad = str(getattr(e, "param", "") or "").split(".")[0]
+        if getattr(e, "status_code", None) != 400 or bad not in params:
+            raise
+        with _REJECTED_LOCK:
+            _REJECTED.setdefault(kwargs.get("model", ""), set()).add(bad)
+        return create(**kwargs, **{k: v for k, v in params.items() if k != bad})
+
+
+def record_response_usage(resp: Any, usage: Optional[Dict[str, int]]) -> None:
+    u = getattr(resp, "usage", None)
+    incomplete = getattr(resp, "incomplete_details", None)
+    truncated = getattr(resp, "status", "") == "incomplete" and getattr(incomplete, "reason", "") == "max_output_tokens"
+    if u is None:
+        record_usage(usage, truncated=truncated)
+        return
+    details = getattr(u, "input_tokens_details", None)
+    out_details = getattr(u, "output_tokens_details", None)
+    record_usage(
+        usage,
+        input_tokens=getattr(u, "input_tokens", 0),
+        cached_tokens=getattr(details, "cached_tokens", 0) if details is not None else 0,
+        output_tokens=getattr(u, "output_tokens", 0),
+        reasoning_tokens=getattr(out_details, "reasoning_tokens", 0) if out_details is not None else 0,
+        truncated=truncated,
+    )
 
 
 def translate_openai(
@@ -8,16 +106,33 @@ def translate_openai(
     model: str,
     instructions: str,
     text: str,
+    context: str = "",
+    usage: Optional[Dict[str, int]] = None,
+    timeout: float = 120,
+    profile: Optional[StageProfile] = None,
 ) -> str:
-    """Translate using OpenAI Responses API."""
+    """Translate using OpenAI Responses API.
 
-    client = OpenAI(api_key=api_key)
+    Layout for prompt caching: the stable `instructions` go first (and key the
+    cache via prompt_cache_key); per-request `context` (glossary terms, memory
+    hints) follows as a developer message, then the text. `profile` sets
+    reasoning effort, output cap, temperature and service tier.
+    """
 
-    resp = client.responses.create(
+    client = get_client(api_key)
+
+    resp = create_with_params(
+        client.responses.create,
+        profile_params(profile, model, len(text) + len(context)),
         model=model,
         instructions=instructions,
-        input=text,
+        input=build_input(text, context),
+        # Sent via extra_body so older SDKs without the named parameter still work
+        extra_body={"prompt_cache_key": prompt_cache_key(instructions)},
+        timeout=timeout,
     )
 
+    record_response_usage(resp, usage)
+
     out = getattr(resp, "output_text", "")
     return (out or "").strip()
@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from .health import get_breaker
+from .types import ModelConfig
+
+# Requests shorter than this still pay the fixed per-request overhead
+_MIN_CHARS = 500
+
+
+@dataclass
+class RouteStats:
+    s_per_kchar: Optional[float] = None  # EWMA of latency per 1000 input characters
+    error_rate: float = 0.0  # EWMA of outage errors (1) vs successes (0)
+    samples: int = 0
+    last_seen: float = 0.0
+    # Exponentially weighted moments of (kchars, seconds) for the fixed-cost / per-char split
+    mx: float = 0.0
+    my: float = 0.0
+    mxx: float = 0.0
+    mxy: float = 0.0
+
+
+class LatencyRouter:
+    """Tracks observed latency and error rate per provider/model and ranks them.
+
+    Every provider call in the process feeds it (all modes, all sessions), so
+    "Auto (fastest)" starts from what other runs have recently seen.
+    Models with no recent samples are tried first, once, to refresh their
+    estimate; otherwise the expected time is the latency EWMA scaled to the
+    request size and inflated by the error rate (time lost to retries).
+    """
+
+    def __init__(
+        self,
+        alpha: float = 0.3,
+        prior_s_per_kchar: float = 2.0,
+        stale_after_s: float = 600.0,
+        prior_overhead_s: float = 1.0,
+    ) -> None:
+        self.alpha = alpha
+        self.prior_s_per_kchar = prior_s_per_kchar
+        self.prior_overhead_s = prior_overhead_s
+        self.stale_after_s = stale_after_s
+        self._stats: Dict[Tuple[str, str], RouteStats] = {}
+        self._lock = threading.Lock()
+
+    def record(self, provider: str, model: str, latency_s: float, chars: int, ok: bool) -> None:
+        with self._lock:
+            st = self._stats.setdefault((provider, model), RouteStats())
+            st.error_rate += self.alpha * ((0.0 if ok else 1.0) - st.error_rate)
+            if ok:
+                # The first success initializes the averages
+                w = 1.0 if st.s_per_kchar is None else self.alpha
+                per_k = latency_s / (max(chars, _MIN_CHARS) / 1000)
+                st.s_per_kchar = per_k if st.s_per_kchar is None else st.s_per_kchar + w * (per_k - st.s_per_kchar)
+                x = chars / 1000
+                st.mx += w * (x - st.mx)
+                st.my += w * (latency_s - st.my)
+                st.mxx += w * (x * x - st.mxx)
+                st.mxy += w * (x * latency_s - st.mxy)
+            st.samples += 1
+            st.last_seen = time.monotonic()
+
+    def estimate(self, provider: str, model: str) -> Tuple[float, float]:
+        """(fixed overhead seconds, seconds per 1000 characters) for one request.
+
+        A weighted least-squares fit of recent latencies against request size;
+        with too few samples or too little size variation, the overhead prior
+        is kept and the per-character rate fitted around it.
+        """
+        with self._lock:
+            st = self._stats.get((provider, model))
+            if st is None or st.s_per_kchar is None:
+                return self.prior_overhead_s, self.prior_s_per_kchar
+            mx, my, mxx, mxy, samples = st.mx, st.my, st.mxx, st.mxy, st.samples
+
+        var = mxx - mx * mx
+        if samples >= 4 and var > 0.25:
+            slope = (mxy - mx * my) / var
+            intercept = my - slope * mx
+            if slope > 0 and intercept >= 0:
+                return intercept, slope
+
+        overhead = min(self.prior_overhead_s, 0.5 * my)
+        return overhead, max(0.05, (my - overhead) / max(mx, 0.1))
+
+    def _expected(self, st: Optional[RouteStats], chars: int) -> float:
+        per_k = st.s_per_kchar if st is not None and st.s_per_kchar is not None else self.prior_s_per_kchar
+        error_rate = st.error_rate if st is not None else 0.0
+        return per_k * max(chars, _MIN_CHARS) / 1000 / max(0.1, 1.0 - error_rate)
+
+    def rank(
+        self,
+        candidates: List[ModelConfig],
+        chars: int,
+        max_error_rate: float = 0.25,
+        prefer: Optional[str] = None,
+        prefer_margin: float = 0.0,
+    ) -> Tuple[List[ModelConfig], Dict[str, object]]:
+        """Order candidates for a request of `chars` characters; returns (ranked, decision).
+
+        Providers with an open circuit breaker, or an error-rate EWMA above
+        `max_error_rate`, go last. `prefer` (a provider name) wins whenever it
+        is expected to be at most `prefer_margin` (fraction) slower than the
+        fastest eligible candidate.
+        """
+        now = time.monotonic()
+        with self._lock:
+            stats = {(c.provider, c.model): self._stats.get((c.provider, c.model)) for c in candidates}
+
+        expected: Dict[str, float] = {}
+        excluded: Dict[str, str] = {}
+        stale: List[ModelConfig] = []
+        eligible: List[ModelConfig] = []
+        for c in candidates:
+            badge = f"{c.provider} | {c.model}"
+            st = stats[(c.provider, c.model)]
+            expected[badge] = round(self._expected(st, chars), 3)
+            if get_breaker(c.provider).is_open():
+                excluded[badge] = "circuit open"
+            elif st is None or now - st.last_seen > self.stale_after_s:
+                # Also how a provider excluded for errors gets re-measured
+                stale.append(c)
+            elif st.error_rate > max_error_rate:
+                excluded[badge] = f"error rate {st.error_rate:.2f} > {max_error_rate:.2f}"
+            else:
+                eligible.append(c)
+
+        eligible.sort(key=lambda c: expected[f"{c.provider} | {c.model}"])
+        reason = "fastest expected"
+
+        if stale:
+            reason = "no recent samples (exploring)"
+            eligible = stale[:1] + eligible + stale[1:]
+        elif prefer and eligible:
+            fastest = expected[f"{eligible[0].provider} | {eligible[0].model}"]
+            preferred = [c for c in eligible if c.provider == prefer]
+            if preferred and expected[f"{preferred[0].provider} | {preferred[0].model}"] <= fastest * (1 + prefer_margin):
+                if preferred[0] is not eligible[0]:
+                    reason = f"preferred provider within {prefer_margin:.0%} of fastest"
+                eligible.remove(preferred[0])
+                eligible.insert(0, preferred[0])
+
+        rest = [c for c in candidates if c not in eligible]
+        if not eligible:
+            reason = "all candidates constrained; least bad first"
+            rest.sort(key=lambda c: expected[f"{c.provider} | {c.model}"])
+
+        ranked = eligible + rest
+        decision: Dict[str, object] = {
+            "chars": chars,
+            "chosen": f"{ranked[0].provider} | {ranked[0].model}",
+            "reason": reason,
+            "expected_s": expected,
+        }
+        if excluded:
+            decision["excluded"] = excluded
+        return ranked, decision
+
+    def snapshot(self) -> Dict[str, Dict[str, object]]:
+        with self._lock:
+            items = list(self._stats.items())
+        now = time.monotonic()
+        return {
+            f"{provider} | {model}": {
+                "s_per_kchar": round(st.s_per_kchar, 3) if st.s_per_kchar is not None else None,
+                "error_rate": round(st.error_rate, 3),
+                "samples": st.samples,
+                "age_s": round(now - st.last_seen, 1),
+            }
+            for (provider, model), st in items
+        }
+
+
+_ROUTER: Optional[LatencyRouter] = None
+_ROUTER_LOCK = threading.Lock()
+
+
+def get_router() -> LatencyRouter:
+    """Process-wide router, shared by all sessions."""
+    global _ROUTER
+    with _ROUTER_LOCK:
+        if _ROUTER is None:
+            _ROUTER = LatencyRouter()
+        return _ROUTER
+
+
+def routing_snapshot() -> Dict[str, Dict[str, object]]:
+    return get_router().snapshot()
@@ -0,0 +1,218 @@
+from __future__ import annotations
+
+import json
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass
+from types import SimpleNamespace
+from typing import Any, Dict, Optional, Tuple
+
+from ..run_context import on_abort
+from .health import ProviderHTTPError
+from .types import StageProfile, record_usage
+
+
+@dataclass(frozen=True)
+class StandInProfile:
+    """Latency / capacity model of a provider, for load tests without real calls.
+
+    A call waits for one of `max_in_flight` slots (requests beyond that queue,
+    as they would behind a provider's concurrency limit), then takes
+    `first_token_s + output_tokens / tokens_per_s`, with log-normal jitter.
+    `time_scale` multiplies every delay, e.g. 0.1 for a quick run.
+    `bad_output_rate` is the share of translations cut off mid-sentence
+    (to exercise the output checks, src/validation.py).
+    """
+
+    first_token_s: float = 0.6
+    tokens_per_s: float = 80.0
+    jitter: float = 0.25
+    error_rate: float = 0.0
+    max_in_flight: int = 32
+    time_scale: float = 1.0
+    bad_output_rate: float = 0.0
+
+    @classmethod
+    def from_env(cls) -> "StandInProfile":
+        """YTALI_STANDIN=1 uses the defaults; YTALI_STANDIN_SCALE / _ERROR_RATE / _BAD_OUTPUT_RATE / _MAX_IN_FLIGHT tune it."""
+        return cls(
+            error_rate=float(os.getenv("YTALI_STANDIN_ERROR_RATE", "0") or 0),
+            bad_output_rate=float(os.getenv("YTALI_STANDIN_BAD_OUTPUT_RATE", "0") or 0),
+            max_in_flight=int(os.getenv("YTALI_STANDIN_MAX_IN_FLIGHT", "32") or 32),
+            time_scale=float(os.getenv("YTALI_STANDIN_SCALE", "1") or 1),
+        )
+
+
+_PROFILE: Optional[StandInProfile] = None
+_SLOTS: Optional[threading.BoundedSemaphore] = None
+_STATS: Dict[str, float] = {}
+_LOCK = threading.Lock()
+
+
+def _new_stats() -> Dict[str, float]:
+    return {"calls": 0, "errors": 0, "in_flight": 0, "max_in_flight_seen": 0, "wait_s": 0.0, "service_s": 0.0}
+
+
+def use_standin(profile: Optional[StandInProfile]) -> None:
+    """Route every provider call (translation and editor) to the stand-in; None turns it off."""
+    global _PROFILE, _SLOTS, _STATS
+    with _LOCK:
+        _PROFILE = profile
+        _SLOTS = threading.BoundedSemaphore(profile.max_in_flight) if profile is not None else None
+        _STATS = _new_stats()
+
+
+def standin_profile() -> Optional[StandInProfile]:
+    if _PROFILE is None and os.getenv("YTALI_STANDIN", "").strip().lower() in ("1", "true", "yes", "on"):
+        use_standin(StandInProfile.from_env())
+    return _PROFILE
+
+
+def standin_stats(reset: bool = False) -> Dict[str, float]:
+    global _STATS
+    with _LOCK:
+        stats = dict(_STATS) if _STATS else _new_stats()
+        if reset:
+            _STATS = _new_stats()
+    return stats
+
+
+# Simulated reasoning tokens per effort (None: the provider's default)
+_REASONING_TOKENS = {None: 600, "none": 0, "minimal": 60, "low": 250, "medium": 1200, "high": 4000}
+_TIER_FACTOR = {"priority": 0.7, "flex": 1.6}
+
+
+def _respond(text: str, timeout: float, tokens: Optional[int] = None, factor: float = 1.0) -> None:
+    """Wait for a slot and simulate the provider's response time for `text` (or `tokens` output tokens)."""
+    profile = standin_profile()
+    slots = _SLOTS
+    if profile is None or slots is None:
+        raise RuntimeError("Stand-in provider is not enabled.")
+
+    t0 = time.perf_counter()
+    if not slots.acquire(timeout=timeout):
+        raise TimeoutError("Stand-in provider: timed out waiting for capacity")
+    waited = time.perf_counter() - t0
+
+    with _LOCK:
+        _STATS["calls"] += 1
+        _STATS["wait_s"] += waited
+        _STATS["in_flight"] += 1
+        _STATS["max_in_flight_seen"] = max(_STATS["max_in_flight_seen"], _STATS["in_flight"])
+
+    try:
+        tokens = max(1, len(text) // 4 if tokens is None else tokens)
+        delay = (profile.first_token_s + tokens / profile.tokens_per_s) * profile.time_scale * factor
+        delay *= random.lognormvariate(0.0, profile.jitter) if profile.jitter > 0 else 1.0
+
+        fail = random.random() < profile.error_rate
+        if fail:
+            delay *= 0.3
+
+        # Aborted like a real request when its run is cancelled (run_context.on_abort)
+        aborted = threading.Event()
+        on_abort(("standin", id(aborted)), aborted.set)
+        if aborted.wait(min(delay, max(0.0, timeout - waited))):
+            raise ConnectionError("Stand-in provider: request aborted")
+        with _LOCK:
+            _STATS["service_s"] += delay
+
+        if fail:
+            with _LOCK:
+                _STATS["errors"] += 1
+            raise ProviderHTTPError("Stand-in provider: injected 503", 503)
+        if delay > timeout - waited:
+            raise TimeoutError("Stand-in provider: request timed out")
+    finally:
+        with _LOCK:
+            _STATS["in_flight"] -= 1
+        slots.release()
+
+
+def translate_standin(
+    api_key: str,
+    model: str,
+    instructions: str,
+    text: str,
+    context: str = "",
+    usage: Optional[Dict[str, int]] = None,
+    timeout: float = 120,
+    profile: Optional[StageProfile] = None,
+) -> str:
+    """Same signature as the real providers; echoes the text (segment markers intact).
+
+    A `profile` is simulated too: reasoning effort adds reasoning tokens
+    before the answer, the output cap truncates it, the service tier scales
+    the response time.
+    """
+    reasoning, answer, truncated = _simulated_tokens(profile, len(text) // 4, len(text) + len(context))
+    _respond(text, timeout, tokens=reasoning + answer, factor=_TIER_FACTOR.get(profile.service_tier if profile else None, 1.0))
+    record_usage(
+        usage,
+        input_tokens=(len(instructions) + len(context) + len(text)) // 4,
+        cached_tokens=len(instructions) // 4,
+        output_tokens=reasoning + answer,
+        reasoning_tokens=reasoning,
+        truncated=truncated,
+    )
+    if truncated:
+        return text.strip()[: answer * 4]
+    sim = standin_profile()
+    if sim is not None and random.random() < sim.bad_output_rate:
+        # Cut off mid-sentence, as a model stopping early would
+        return text.strip()[: max(1, len(text.strip()) * 2 // 5)].rstrip(" .!?")
+    return text.strip()
+
+
+def _simulated_tokens(profile: Optional[StageProfile], answer: int, input_chars: int) -> Tuple[int, int, bool]:
+    """(reasoning tokens, answer tokens, truncated) for a simulated response."""
+    reasoning = _REASONING_TOKENS.get(profile.reasoning_effort if profile else None, 600)
+    cap = profile.output_cap(input_chars) if profile else None
+    if cap is not None and reasoning + answer > cap:
+        reasoning = min(reasoning, cap)
+        return reasoning, cap - reasoning, True
+    return reasoning, answer, False
+
+
+class _StandInResponses:
+    def create(self, input: Any = None, timeout: Optional[float] = None, **kwargs: Any) -> Any:
+        items = input if isinstance(input, list) else [{"role": "user", "content": str(input or "")}]
+        text = next((i.get("content", "") for i in reversed(items) if i.get("role") == "user"), "")
+        system = next((i.get("content", "") for i in items if i.get("role") == "system"), "")
+        first_line = next((line.strip() for line in text.splitlines() if line.strip()), "Untitled")
+        payload: Dict[str, Any] = {"title_suggestions": [first_line[:80]]}
+        if "edited_text" in system or not system:
+            payload = {"edited_text": text, **payload}
+        output_text = json.dumps(payload, ensure_ascii=False)
+
+        profile = StageProfile(
+            reasoning_effort=(kwargs.get("reasoning") or {}).get("effort"),
+            max_output_tokens=kwargs.get("max_output_tokens"),
+            service_tier=kwargs.get("service_tier"),
+        )
+        reasoning, answer, truncated = _simulated_tokens(profile, len(output_text) // 4, len(text))
+        _respond(text, timeout or 120, tokens=reasoning + answer, factor=_TIER_FACTOR.get(profile.service_tier, 1.0))
+
+        usage = SimpleNamespace(
+            input_tokens=sum(len(str(i.get("content", ""))) for i in items) // 4,
+            input_tokens_details=SimpleNamespace(cached_tokens=0),
+            output_tokens=reasoning + answer,
+            output_tokens_details=SimpleNamespace(reasoning_tokens=reasoning),
+        )
+        if truncated:
+            return SimpleNamespace(
+                output_text=output_text[: answer * 4],
+                usage=usage,
+                status="incomplete",
+                incomplete_details=SimpleNamespace(reason="max_output_tokens"),
+            )
+        return SimpleNamespace(output_text=output_text, usage=usage, status="completed")
+
+
+class StandInClient:
+    """Duck-types the `client.responses.create` surface the editor uses."""
+
+    def __init__(self) -> None:
+        self.responses = _StandInResponses()
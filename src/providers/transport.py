@@ -0,0 +1,127 @@
+"""HTTP transports whose in-flight requests can be aborted.
+
+Closing a requests Session or an httpx Client does not interrupt a request
+already waiting for its response, so a cancelled run would keep the call
+(and the provider's billing) going until its timeout. The shared clients
+below are built on sockets that register with the provider call using them
+(run_context.on_abort); when RunContext.run abandons the call, its socket is
+shut down and the blocked read fails at once. Connections stay pooled and
+shared between runs; only the aborted connection is dropped. The httpx side
+relies on private httpcore attributes (no public hook exists); if they move,
+the OpenAI client falls back to the SDK's plain one and cancelled calls run
+to their timeout again, as before. requirements.txt bounds httpx for that.
+
+`requests` and `httpx` are imported on first use, like the SDKs themselves.
+"""
+
+from __future__ import annotations
+
+import socket
+import warnings
+from typing import TYPE_CHECKING, Any, Optional
+
+from ..run_context import on_abort
+
+if TYPE_CHECKING:
+    import httpx
+    import requests
+
+
+def _shutdown(sock: socket.socket) -> None:
+    try:
+        # The plain socket's shutdown, also for TLS sockets: it only needs the file descriptor
+        socket.socket.shutdown(sock, socket.SHUT_RDWR)
+    except OSError:
+        pass
+
+
+def _track(sock: Optional[socket.socket]) -> None:
+    """Make the current provider call's abort shut `sock` down."""
+    if sock is not None:
+        on_abort(("socket", id(sock)), lambda: _shutdown(sock))
+
+
+def abortable_session() -> "requests.Session":
+    """requests.Session whose requests are aborted with the provider call that sent them."""
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.connection import HTTPConnection, HTTPSConnection
+    from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+    class _HTTPConnection(HTTPConnection):
+        def request(self, *args: Any, **kwargs: Any) -> None:
+            super().request(*args, **kwargs)
+            _track(self.sock)  # before getresponse(), which is where a call waits
+
+    class _HTTPSConnection(HTTPSConnection):
+        def request(self, *args: Any, **kwargs: Any) -> None:
+            super().request(*args, **kwargs)
+            _track(self.sock)
+
+    class _HTTPPool(HTTPConnectionPool):
+        ConnectionCls = _HTTPConnection
+
+    class _HTTPSPool(HTTPSConnectionPool):
+        ConnectionCls = _HTTPSConnection
+
+    class _Adapter(HTTPAdapter):
+        def init_poolmanager(self, *args: Any, **kwargs: Any) -> None:
+            super().init_poolmanager(*args, **kwargs)
+            self.poolmanager.pool_classes_by_scheme = {"http": _HTTPPool, "https": _HTTPSPool}
+
+    session = requests.Session()
+    session.mount("http://", _Adapter())
+    session.mount("https://", _Adapter())
+    return session
+
+
+def abortable_http_client() -> "httpx.Client":
+    """httpx client (for the OpenAI SDK) whose requests are aborted with the provider call that sent them."""
+    import httpcore
+    import httpx
+    from openai import DefaultHttpxClient
+
+    class _Stream(httpcore.NetworkStream):
+        def __init__(self, inner: httpcore.NetworkStream) -> None:
+            self._inner = inner
+
+        def read(self, max_bytes: int, timeout: Optional[float] = None) -> bytes:
+            return self._inner.read(max_bytes, timeout)
+
+        def write(self, buffer: bytes, timeout: Optional[float] = None) -> None:
+            _track(self._inner.get_extra_info("socket"))
+            self._inner.write(buffer, timeout)
+
+        def close(self) -> None:
+            self._inner.close()
+
+        def start_tls(self, *args: Any, **kwargs: Any) -> httpcore.NetworkStream:
+            return _Stream(self._inner.start_tls(*args, **kwargs))
+
+        def get_extra_info(self, info: str) -> Any:
+            return self._inner.get_extra_info(info)
+
+    class _Backend(httpcore.NetworkBackend):
+        def __init__(self, inner: httpcore.NetworkBackend) -> None:
+            self._inner = inner
+
+        def connect_tcp(self, *args: Any, **kwargs: Any) -> httpcore.NetworkStream:
+            return _Stream(self._inner.connect_tcp(*args, **kwargs))
+
+        def connect_unix_socket(self, *args: Any, **kwargs: Any) -> httpcore.NetworkStream:
+            return _Stream(self._inner.connect_unix_socket(*args, **kwargs))
+
+        def sleep(self, seconds: float) -> None:
+            self._inner.sleep(seconds)
+
+    # Same pool limits as the SDK's default client
+    transport = httpx.HTTPTransport(limits=httpx.Limits(max_connections=1000, max_keepalive_connections=100))
+    # httpx has no public hook for the network backend, so this wraps the pool's private one.
+    # Aborting is best-effort: if a future httpx / httpcore moves it, use the SDK's plain client.
+    pool = getattr(transport, "_pool", None)
+    backend = getattr(pool, "_network_backend", None)
+    if not isinstance(backend, httpcore.NetworkBackend):
+        warnings.warn("httpx internals changed: OpenAI requests will not be aborted on cancel", RuntimeWarning)
+        return DefaultHttpxClient()
+    pool._network_backend = _Backend(backend)
+    return DefaultHttpxClient(transport=transport)
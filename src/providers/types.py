@@ -1,7 +1,8 @@
 from __future__ import annotations
 
+import threading
 from dataclasses import dataclass
-from typing import Literal
+from typing import Dict, Literal, Optional
 
 ProviderName = Literal["openai", "gemini"]
 
@@ -20,3 +21,84 @@ class ModelConfig:
             raise ValueError("Missing model id.")
         if not self.api_key or not self.api_key.strip():
             raise ValueError("Missing API key.")
+
+
+REASONING_EFFORTS = ("none", "minimal", "low", "medium", "high")
+SERVICE_TIERS = ("auto", "default", "flex", "priority")
+# Output tokens a request may spend on reasoning before its answer, by effort
+_REASONING_ALLOWANCE = {None: 2048, "none": 0, "minimal": 256, "low": 1024, "medium": 4096, "high": 16384}
+_MIN_OUTPUT_TOKENS = 256
+
+
+@dataclass(frozen=True)
+class StageProfile:
+    """Latency knobs for one kind of model call; None leaves the provider default.
+
+    `max_output_tokens` is a ceiling. With `output_ratio`, each request is
+    capped lower, at `output_ratio` times its input tokens plus room for
+    reasoning, so a short chunk cannot run away. Providers map what they
+    support: OpenAI takes all four knobs; Gemini maps reasoning effort to a
+    thinking budget and has no service tier.
+    """
+
+    reasoning_effort: Optional[str] = None  # "none" | "minimal" | "low" | "medium" | "high"
+    max_output_tokens: Optional[int] = None
+    output_ratio: Optional[float] = None
+    temperature: Optional[float] = None
+    service_tier: Optional[str] = None  # OpenAI: "auto" | "default" | "flex" | "priority"
+
+    def validate(self) -> None:
+        if self.reasoning_effort not in (None,) + REASONING_EFFORTS:
+            raise ValueError(f"Invalid reasoning effort: {self.reasoning_effort}")
+        if self.service_tier not in (None,) + SERVICE_TIERS:
+            raise ValueError(f"Invalid service tier: {self.service_tier}")
+        if self.max_output_tokens is not None and self.max_output_tokens < _MIN_OUTPUT_TOKENS:
+            raise ValueError(f"max_output_tokens must be at least {_MIN_OUTPUT_TOKENS}.")
+        if self.temperature is not None and not 0.0 <= self.temperature <= 2.0:
+            raise ValueError("temperature must be between 0 and 2.")
+
+    def output_cap(self, input_chars: int) -> Optional[int]:
+        """Max output tokens for a request with `input_chars` characters of input."""
+        if self.max_output_tokens is None:
+            return None
+        if self.output_ratio is None:
+            return self.max_output_tokens
+        needed = int(input_chars / 4 * self.output_ratio) + _REASONING_ALLOWANCE.get(self.reasoning_effort, 2048)
+        return min(self.max_output_tokens, max(needed, _MIN_OUTPUT_TOKENS))
+
+
+# Chunk requests of one run record into the same usage dict from several threads
+_USAGE_LOCK = threading.Lock()
+
+
+_USAGE_KEYS = ("calls", "input_tokens", "cached_tokens", "output_tokens", "reasoning_tokens", "truncated")
+
+
+def new_usage() -> Dict[str, int]:
+    return {key: 0 for key in _USAGE_KEYS}
+
+
+def record_usage(
+    usage: Optional[Dict[str, int]],
+    input_tokens: int = 0,
+    cached_tokens: int = 0,
+    output_tokens: int = 0,
+    reasoning_tokens: int = 0,
+    truncated: bool = False,
+) -> None:
+    """Accumulate token counts into a usage dict (no-op when usage is None).
+
+    `reasoning_tokens` are part of `output_tokens`; `truncated` counts
+    responses cut off by the output cap.
+    """
+    if usage is None:
+        return
+    with _USAGE_LOCK:
+        for key in _USAGE_KEYS:
+            usage.setdefault(key, 0)
+        usage["calls"] += 1
+        usage["input_tokens"] += int(input_tokens or 0)
+        usage["cached_tokens"] += int(cached_tokens or 0)
+        usage["output_tokens"] += int(output_tokens or 0)
+        usage["reasoning_tokens"] += int(reasoning_tokens or 0)
+        usage["truncated"] += int(bool(truncated))
@@ -0,0 +1,46 @@
+"""Age / size caps for directories the app writes files into (run archives, profiles)."""
+
+from __future__ import annotations
+
+import os
+import time
+from typing import List, Tuple
+
+
+def env_limits(prefix: str, default_age_days: float, default_mb: float) -> Tuple[float, int]:
+    """(max age in days, max bytes) from `<prefix>_MAX_AGE_DAYS` / `<prefix>_MAX_MB`; 0 disables one."""
+    max_age_days = float(os.getenv(f"{prefix}_MAX_AGE_DAYS", default_age_days) or 0)
+    max_bytes = int(float(os.getenv(f"{prefix}_MAX_MB", default_mb) or 0) * 2**20)
+    return max_age_days, max_bytes
+
+
+def prune_files(paths: List[str], max_age_days: float, max_bytes: int) -> List[str]:
+    """Delete files older than `max_age_days`, then the oldest until the rest fit in `max_bytes`.
+
+    A limit of 0 is off. Files that vanish or cannot be removed are skipped.
+    Returns the deleted paths.
+    """
+    files = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        files.append((st.st_mtime, st.st_size, path))
+    files.sort()
+
+    now = time.time()
+    total = sum(size for _, size, _ in files)
+    deleted: List[str] = []
+    for mtime, size, path in files:
+        too_old = max_age_days > 0 and now - mtime > max_age_days * 86400
+        too_big = max_bytes > 0 and total > max_bytes
+        if not (too_old or too_big):
+            continue
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+        deleted.append(path)
+    return deleted
@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from .profiling import propagate
+
+# The provider call (see RunContext.run) running on this thread, if any
+_CALL = threading.local()
+
+
+class RunCancelled(RuntimeError):
+    """The run was cancelled (new run in the same session, user left, ...)."""
+
+
+class DeadlineExceeded(RunCancelled):
+    """The run's end-to-end deadline passed."""
+
+
+class _Call:
+    """One call made through RunContext.run; transports register how to abort it."""
+
+    def __init__(self) -> None:
+        self._hooks: Dict[Hashable, Callable[[], None]] = {}
+        self._lock = threading.Lock()
+        self.aborted = False
+
+    def on_abort(self, key: Hashable, fn: Callable[[], None]) -> None:
+        with self._lock:
+            if not self.aborted:
+                self._hooks[key] = fn
+                return
+        fn()
+
+    def abort(self) -> None:
+        with self._lock:
+            self.aborted = True
+            hooks, self._hooks = list(self._hooks.values()), {}
+        for fn in hooks:
+            try:
+                fn()
+            except Exception:
+                pass
+
+    def done(self) -> None:
+        with self._lock:
+            self._hooks.clear()
+
+
+def on_abort(key: Hashable, fn: Callable[[], None]) -> None:
+    """Run `fn` if the provider call on this thread is abandoned (cancel, deadline).
+
+    Transports call this with the socket a request is using, so an abandoned
+    call stops at once instead of running to its timeout. Outside
+    RunContext.run (no run context) it does nothing. Registering again under
+    the same `key` replaces the hook.
+    """
+    call = getattr(_CALL, "current", None)
+    if call is not None:
+        call.on_abort(key, fn)
+
+
+class RunContext:
+    """Deadline + cooperative cancellation for one translation run.
+
+    - `call_timeout()` turns the remaining run budget into a per-call timeout
+    - `run()` executes a blocking provider call on a worker thread and stops
+      waiting as soon as the run is cancelled or the deadline passes; the
+      call's in-flight request is then aborted (see `on_abort`)
+    - `heartbeat` (optional) is invoked from the waiting thread while a call is
+      in flight; the Streamlit app uses it to refresh a status line, which also
+      lets Streamlit interrupt a superseded script run
+    """
+
+    def __init__(
+        self,
+        deadline_s: Optional[float] = None,
+        call_timeout_s: float = 120.0,
+        heartbeat: Optional[Callable[["RunContext"], None]] = None,
+        heartbeat_interval_s: float = 0.5,
+    ) -> None:
+        self.started_at = time.monotonic()
+        self.deadline_at = self.started_at + deadline_s if deadline_s else None
+        self.call_timeout_s = call_timeout_s
+        self.heartbeat = heartbeat
+        self.heartbeat_interval_s = heartbeat_interval_s
+        self._last_beat = time.monotonic()
+        # Shared with worker views (see worker()): [reason]
+        self._reason = [""]
+        self._cancelled = threading.Event()
+
+    def worker(self) -> "RunContext":
+        """A view for worker threads: same deadline and cancellation, no heartbeat.
+
+        The heartbeat touches the UI, so only the thread that owns the run
+        calls it (see beat()); cancelling either context cancels both.
+        """
+        view = RunContext(call_timeout_s=self.call_timeout_s)
+        view.started_at = self.started_at
+        view.deadline_at = self.deadline_at
+        view._reason = self._reason
+        view._cancelled = self._cancelled
+        return view
+
+    # -------------------------
+    # State
+    # -------------------------
+    @property
+    def reason(self) -> str:
+        return self._reason[0]
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started_at
+
+    def remaining(self) -> Optional[float]:
+        if self.deadline_at is None:
+            return None
+        return self.deadline_at - time.monotonic()
+
+    def cancel(self, reason: str = "cancelled") -> None:
+        if not self._cancelled.is_set():
+            self._reason[0] = reason
+            self._cancelled.set()
+
+    def check(self) -> None:
+        """Raise if the run was cancelled or its deadline has passed."""
+        if self._cancelled.is_set():
+            raise RunCancelled(f"Run cancelled: {self.reason}")
+        remaining = self.remaining()
+        if remaining is not None and remaining <= 0:
+            self.cancel("deadline exceeded")
+            raise DeadlineExceeded(f"Run deadline exceeded after {self.elapsed():.1f}s")
+
+    def call_timeout(self, default: Optional[float] = None) -> float:
+        """Per-call timeout: the call default, capped by what is left of the run."""
+        self.check()
+        timeout = default if default is not None else self.call_timeout_s
+        remaining = self.remaining()
+        if remaining is not None:
+            timeout = min(timeout, remaining)
+        return max(timeout, 0.1)
+
+    def beat(self) -> None:
+        """Invoke the heartbeat if the interval has passed (call from the owning thread)."""
+        if self.heartbeat and time.monotonic() - self._last_beat >= self.heartbeat_interval_s:
+            self._last_beat = time.monotonic()
+            self.heartbeat(self)
+
+    # -------------------------
+    # Execution
+    # -------------------------
+    def run(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Call `fn(*args, **kwargs)` on a worker thread, aborting it on cancel/deadline."""
+        self.check()
+
+        box: dict = {}
+        done = threading.Event()
+        call = _Call()
+
+        def _worker() -> None:
+            _CALL.current = call
+            try:
+                box["value"] = fn(*args, **kwargs)
+            except BaseException as e:  # re-raised in the caller thread
+                box["error"] = e
+            finally:
+                call.done()
+                done.set()
+
+        threading.Thread(target=propagate(_worker), name="ytali-provider-call", daemon=True).start()
+
+        while not done.wait(0.1):
+            try:
+                self.check()
+                self.beat()
+            except BaseException:
+                # Cancelled, deadline, or the host (e.g. Streamlit) interrupted us
+                self.cancel(self.reason or "interrupted")
+                call.abort()
+                raise
+
+        if "error" in box:
+            if self._cancelled.is_set():
+                # Most likely the abort of a cancelled run (another thread's call.abort()
+                # or cancel) surfacing as a connection error: report the cancel instead
+                self.check()
+            raise box["error"]
+        return box.get("value")
+
+
+def call_with_context(ctx: Optional[RunContext], fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """Run `fn` directly, or through `ctx.run` when a run context is given."""
+    if ctx is None:
+        return fn(*args, **kwargs)
+    return ctx.run(fn, *args, **kwargs)
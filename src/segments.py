@@ -0,0 +1,238 @@
+from __future__ import annotations
+
+import csv
+import io
+import json
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Literal, Optional
+
+SegmentKind = Literal["srt", "json", "csv"]
+
+STRUCTURED_EXTENSIONS = ("srt", "json", "csv")
+
+_MARKER_RE = re.compile(r"^[ \t]*\[\[(\d+)\]\][ \t]*$", re.MULTILINE)
+_TEXT_FIELDS = ("text", "source", "value", "content")
+
+
+@dataclass(frozen=True)
+class Segment:
+    key: str
+    text: str
+    timing: str = ""  # SRT only: "00:00:01,000 --> 00:00:02,500"
+
+
+@dataclass
+class SegmentDocument:
+    """Parsed structured input, with enough of the original shape to render it back."""
+
+    kind: SegmentKind
+    segments: List[Segment]
+    # JSON: the decoded object; CSV: the list of row dicts
+    source: Any = None
+    text_field: str = ""
+    fieldnames: List[str] = field(default_factory=list)
+
+
+def is_structured_filename(name: Optional[str]) -> bool:
+    ext = (name or "").rsplit(".", 1)[-1].lower() if "." in (name or "") else ""
+    return ext in STRUCTURED_EXTENSIONS
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate (~4 chars per token for IT/EN prose)."""
+    return max(1, (len(text or "") + 3) // 4)
+
+
+# -------------------------
+# Parsing / rendering
+# -------------------------
+def parse_srt(text: str) -> List[Segment]:
+    text = (text or "").lstrip("﻿").replace("\r\n", "\n").replace("\r", "\n")
+
+    segments: List[Segment] = []
+    for block in re.split(r"\n\s*\n", text.strip()):
+        lines = block.split("\n")
+        if not lines or not lines[0].strip():
+            continue
+
+        key = str(len(segments) + 1)
+        if lines[0].strip().isdigit():
+            key = lines[0].strip()
+            lines = lines[1:]
+
+        timing = ""
+        if lines and "-->" in lines[0]:
+            timing = lines[0].strip()
+            lines = lines[1:]
+
+        segments.append(Segment(key=key, text="\n".join(lines).strip(), timing=timing))
+
+    return segments
+
+
+def render_srt(segments: List[Segment], texts: List[str]) -> str:
+    blocks: List[str] = []
+    for seg, t in zip(segments, texts):
+        lines = [seg.key]
+        if seg.timing:
+            lines.append(seg.timing)
+        lines.append((t or "").strip())
+        blocks.append("\n".join(lines))
+    return "\n\n".join(blocks) + "\n"
+
+
+def _json_text_field(item: Dict[str, Any]) -> str:
+    for name in _TEXT_FIELDS:
+        if isinstance(item.get(name), str):
+            return name
+    raise ValueError(f"JSON segment has no text field (expected one of {', '.join(_TEXT_FIELDS)})")
+
+
+def parse_segments(filename: str, raw_text: str) -> SegmentDocument:
+    """Parse an SRT file or a JSON/CSV segment list into a SegmentDocument.
+
+    JSON accepts a list of strings, a list of objects with a text field
+    (``text``/``source``/``value``/``content``, optional ``id``) or an
+    ``{id: text}`` mapping. CSV needs a header row; the text column is the
+    first of the names above, or the last column.
+    """
+    ext = filename.rsplit(".", 1)[-1].lower()
+    raw_text = (raw_text or "").lstrip("﻿")
+
+    if ext == "srt":
+        return SegmentDocument(kind="srt", segments=parse_srt(raw_text))
+
+    if ext == "json":
+        data = json.loads(raw_text)
+        segments: List[Segment] = []
+
+        if isinstance(data, dict):
+            for k, v in data.items():
+                segments.append(Segment(key=str(k), text=v if isinstance(v, str) else str(v)))
+            return SegmentDocument(kind="json", segments=segments, source=data)
+
+        if not isinstance(data, list):
+            raise ValueError("JSON input must be a list or an object of segments")
+
+        text_field = ""
+        for i, item in enumerate(data):
+            if isinstance(item, str):
+                segments.append(Segment(key=str(i), text=item))
+            elif isinstance(item, dict):
+                text_field = text_field or _json_text_field(item)
+                segments.append(Segment(key=str(item.get("id", i)), text=str(item.get(text_field, ""))))
+            else:
+                raise ValueError(f"Unsupported JSON segment at index {i}: {type(item).__name__}")
+
+        return SegmentDocument(kind="json", segments=segments, source=data, text_field=text_field)
+
+    if ext == "csv":
+        reader = csv.DictReader(io.StringIO(raw_text))
+        fieldnames = list(reader.fieldnames or [])
+        if not fieldnames:
+            raise ValueError("CSV input needs a header row")
+
+        text_field = next((f for f in _TEXT_FIELDS if f in fieldnames), fieldnames[-1])
+        key_field = "id" if "id" in fieldnames else ""
+
+        rows = list(reader)
+        segments = [
+            Segment(key=str(row.get(key_field) if key_field else i), text=row.get(text_field) or "")
+            for i, row in enumerate(rows)
+        ]
+        return SegmentDocument(
+            kind="csv",
+            segments=segments,
+            source=rows,
+            text_field=text_field,
+            fieldnames=fieldnames,
+        )
+
+    raise ValueError(f"Unsupported structured input: .{ext}")
+
+
+def render_segments(doc: SegmentDocument, texts: List[str]) -> str:
+    """Render translated segment texts back into the document's original format."""
+    if len(texts) != len(doc.segments):
+        raise ValueError(f"Expected {len(doc.segments)} segment texts, got {len(texts)}")
+
+    if doc.kind == "srt":
+        return render_srt(doc.segments, texts)
+
+    if doc.kind == "json":
+        if isinstance(doc.source, dict):
+            out: Any = {seg.key: t for seg, t in zip(doc.segments, texts)}
+        else:
+            out = []
+            for item, t in zip(doc.source, texts):
+                if isinstance(item, dict):
+                    out.append({**item, doc.text_field: t})
+                else:
+                    out.append(t)
+        return json.dumps(out, ensure_ascii=False, indent=2)
+
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=doc.fieldnames)
+    writer.writeheader()
+    for row, t in zip(doc.source, texts):
+        writer.writerow({**row, doc.text_field: t})
+    return buf.getvalue()
+
+
+# -------------------------
+# Packing
+# -------------------------
+def pack_segments(texts: List[str], max_tokens: int = 1500) -> List[List[int]]:
+    """Group segment indices into batches whose packed size stays under max_tokens.
+
+    Order is preserved. A single segment larger than the budget gets a batch of
+    its own. Empty segments are skipped (they are passed through untranslated).
+    """
+    batches: List[List[int]] = []
+    buf: List[int] = []
+    buf_tokens = 0
+
+    for i, t in enumerate(texts):
+        if not (t or "").strip():
+            continue
+
+        # marker line + blank line separator
+        cost = estimate_tokens(t) + 4
+        if buf and buf_tokens + cost > max_tokens:
+            batches.append(buf)
+            buf, buf_tokens = [], 0
+
+        buf.append(i)
+        buf_tokens += cost
+
+    if buf:
+        batches.append(buf)
+
+    return batches
+
+
+def build_packed_text(texts: List[str]) -> str:
+    """Join segments with numbered marker lines: [[1]], [[2]], ..."""
+    return "\n\n".join(f"[[{n}]]\n{t.strip()}" for n, t in enumerate(texts, start=1))
+
+
+def unpack_text(packed: str, expected: int) -> Dict[int, str]:
+    """Parse a packed model output back into {marker_number: text}.
+
+    Only markers in 1..expected are kept; duplicates keep the first occurrence.
+    Missing numbers are simply absent from the result so callers can fall back.
+    """
+    out: Dict[int, str] = {}
+    matches = list(_MARKER_RE.finditer(packed or ""))
+
+    for m, nxt in zip(matches, matches[1:] + [None]):
+        n = int(m.group(1))
+        if n < 1 or n > expected or n in out:
+            continue
+        end = nxt.start() if nxt else len(packed)
+        body = packed[m.end() : end].strip()
+        if body:
+            out[n] = body
+
+    return out
@@ -0,0 +1,245 @@
+from __future__ import annotations
+
+import getpass
+import os
+import re
+import sqlite3
+import stat
+import tempfile
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from typing import List, Optional
+
+DEFAULT_SESSION_CAP_BYTES = 32 * 1024 * 1024
+DEFAULT_GLOBAL_CAP_BYTES = 512 * 1024 * 1024
+# Sessions not read or written for this long are dropped (0: never)
+DEFAULT_SESSION_TTL_S = 24 * 3600.0
+# Expired sessions are looked for at most this often, on put
+EXPIRE_EVERY_S = 300.0
+# Paragraphs per stored page (see ResultStore.put_paged)
+PAGE_PARAGRAPHS = 25
+
+
+@dataclass(frozen=True)
+class TextHandle:
+    """What session state keeps instead of the text itself."""
+
+    session: str
+    key: str
+    chars: int = 0
+    pages: int = 0  # > 0: stored as pages of paragraphs, see ResultStore.put_paged
+
+
+class ResultStore:
+    """Disk-backed, size-capped text store shared by all sessions (SQLite).
+
+    Texts are zlib-compressed. Caps apply to compressed bytes, per session and
+    globally; when a put goes over a cap, least-recently-used entries are
+    evicted (other sessions first for the global cap). Sessions idle for more
+    than `session_ttl_s` are dropped whole. Evicted handles simply load as None.
+
+    The database file is created readable by its owner only (0600); SQLite
+    gives its -wal / -shm files the same mode.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        session_cap_bytes: int = DEFAULT_SESSION_CAP_BYTES,
+        global_cap_bytes: int = DEFAULT_GLOBAL_CAP_BYTES,
+        session_ttl_s: float = DEFAULT_SESSION_TTL_S,
+    ) -> None:
+        self.path = path
+        self.session_cap_bytes = session_cap_bytes
+        self.global_cap_bytes = global_cap_bytes
+        self.session_ttl_s = session_ttl_s
+        self._lock = threading.Lock()
+        self._next_expiry = 0.0
+        # Create the file 0600 before SQLite opens it (sqlite3 would use the umask)
+        os.close(os.open(path, os.O_RDWR | os.O_CREAT, 0o600))
+        os.chmod(path, 0o600)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS texts (
+                session TEXT NOT NULL,
+                key TEXT NOT NULL,
+                data BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                accessed REAL NOT NULL,
+                PRIMARY KEY (session, key)
+            )
+            """
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS texts_accessed ON texts (accessed)")
+        with self._lock:
+            self._expire_sessions()
+
+    def put(self, session: str, key: str, text: str) -> TextHandle:
+        data = zlib.compress((text or "").encode("utf-8"), 6)
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO texts (session, key, data, size, accessed) VALUES (?, ?, ?, ?, ?)",
+                (session, key, data, len(data), time.time()),
+            )
+            self._evict(session)
+        return TextHandle(session=session, key=key, chars=len(text or ""))
+
+    def put_paged(self, session: str, key: str, text: str, page_paragraphs: int = PAGE_PARAGRAPHS) -> TextHandle:
+        """Store `text` as pages of `page_paragraphs` paragraphs, each loadable on its own.
+
+        get() still returns the whole text (paragraphs separated by one blank line).
+        """
+        paras = [p for p in re.split(r"\n{2,}", (text or "").strip()) if p.strip()]
+        pages = ["\n\n".join(paras[i : i + page_paragraphs]) for i in range(0, len(paras), page_paragraphs)] or [""]
+        rows = []
+        now = time.time()
+        for n, page in enumerate(pages):
+            data = zlib.compress(page.encode("utf-8"), 6)
+            rows.append((session, _page_key(key, n), data, len(data), now))
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO texts (session, key, data, size, accessed) VALUES (?, ?, ?, ?, ?)", rows
+            )
+            self._evict(session)
+        return TextHandle(session=session, key=key, chars=len(text or ""), pages=len(pages))
+
+    def get_page(self, handle: TextHandle, page: int) -> Optional[List[str]]:
+        """Paragraphs of one page (the whole text is page 0 of an unpaged handle)."""
+        if not handle.pages:
+            text = self.get(handle)
+            return None if text is None else [p for p in re.split(r"\n{2,}", text) if p.strip()]
+        if not 0 <= page < handle.pages:
+            return []
+        text = self._get_row(handle.session, _page_key(handle.key, page))
+        return None if text is None else [p for p in text.split("\n\n") if p]
+
+    def get(self, handle: TextHandle) -> Optional[str]:
+        if handle.pages:
+            pages = [self._get_row(handle.session, _page_key(handle.key, n)) for n in range(handle.pages)]
+            if any(p is None for p in pages):
+                return None
+            return "\n\n".join(p for p in pages if p)
+        return self._get_row(handle.session, handle.key)
+
+    def _get_row(self, session: str, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT data FROM texts WHERE session = ? AND key = ?",
+                (session, key),
+            ).fetchone()
+            if row is None:
+                return None
+            self._db.execute(
+                "UPDATE texts SET accessed = ? WHERE session = ? AND key = ?",
+                (time.time(), session, key),
+            )
+        return zlib.decompress(row[0]).decode("utf-8")
+
+    def drop_session(self, session: str) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM texts WHERE session = ?", (session,))
+
+    def usage(self, session: Optional[str] = None) -> int:
+        """Stored (compressed) bytes for one session, or overall."""
+        with self._lock:
+            if session is None:
+                row = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM texts").fetchone()
+            else:
+                row = self._db.execute(
+                    "SELECT COALESCE(SUM(size), 0) FROM texts WHERE session = ?", (session,)
+                ).fetchone()
+        return int(row[0])
+
+    def expire_sessions(self) -> int:
+        """Drop every session idle for more than session_ttl_s; returns the rows deleted."""
+        with self._lock:
+            return self._expire_sessions()
+
+    def _expire_sessions(self) -> int:
+        # Caller holds the lock
+        self._next_expiry = time.time() + EXPIRE_EVERY_S
+        if self.session_ttl_s <= 0:
+            return 0
+        cur = self._db.execute(
+            """
+            DELETE FROM texts WHERE session IN (
+                SELECT session FROM texts GROUP BY session HAVING MAX(accessed) < ?
+            )
+            """,
+            (time.time() - self.session_ttl_s,),
+        )
+        return cur.rowcount
+
+    def _evict(self, session: str) -> None:
+        # Caller holds the lock
+        if time.time() >= self._next_expiry:
+            self._expire_sessions()
+        self._evict_over(self.session_cap_bytes, "WHERE session = ?", (session,))
+
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM texts").fetchone()[0]
+        if total > self.global_cap_bytes:
+            # Other sessions' least recently used entries go first
+            total = self._evict_over(
+                self.global_cap_bytes, "WHERE session != ?", (session,), total=total
+            )
+            self._evict_over(self.global_cap_bytes, "", (), total=total)
+
+    def _evict_over(self, cap: int, where: str, params: tuple, total: Optional[int] = None) -> int:
+        if total is None:
+            total = self._db.execute(f"SELECT COALESCE(SUM(size), 0) FROM texts {where}", params).fetchone()[0]
+        if total <= cap:
+            return total
+
+        rows = self._db.execute(
+            f"SELECT session, key, size FROM texts {where} ORDER BY accessed ASC", params
+        ).fetchall()
+        for s, k, size in rows:
+            if total <= cap:
+                break
+            self._db.execute("DELETE FROM texts WHERE session = ? AND key = ?", (s, k))
+            total -= size
+        return total
+
+
+def _page_key(key: str, page: int) -> str:
+    return f"{key}#{page:05d}"
+
+
+_STORE: Optional[ResultStore] = None
+_STORE_LOCK = threading.Lock()
+
+
+def _private_dir() -> str:
+    """Per-user directory in the temp dir, mode 0700 (the temp dir itself is shared)."""
+    uid = os.getuid() if hasattr(os, "getuid") else None
+    path = os.path.join(tempfile.gettempdir(), f"ytali-{uid if uid is not None else getpass.getuser()}")
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    if uid is not None:
+        st = os.lstat(path)
+        if not stat.S_ISDIR(st.st_mode) or st.st_uid != uid:
+            raise RuntimeError(f"{path} is not a directory owned by this user; set YTALI_STORE_PATH")
+        os.chmod(path, 0o700)
+    return path
+
+
+def get_result_store() -> ResultStore:
+    """Process-wide store; settings come from YTALI_STORE_PATH / YTALI_STORE_*_MB / YTALI_STORE_SESSION_TTL_H."""
+    global _STORE
+    with _STORE_LOCK:
+        if _STORE is None:
+            path = os.getenv("YTALI_STORE_PATH") or os.path.join(_private_dir(), "results.sqlite3")
+            session_mb = float(os.getenv("YTALI_STORE_SESSION_MB", DEFAULT_SESSION_CAP_BYTES / 2**20))
+            global_mb = float(os.getenv("YTALI_STORE_GLOBAL_MB", DEFAULT_GLOBAL_CAP_BYTES / 2**20))
+            ttl_h = float(os.getenv("YTALI_STORE_SESSION_TTL_H", DEFAULT_SESSION_TTL_S / 3600) or 0)
+            _STORE = ResultStore(
+                path,
+                session_cap_bytes=int(session_mb * 2**20),
+                global_cap_bytes=int(global_mb * 2**20),
+                session_ttl_s=ttl_h * 3600,
+            )
+        return _STORE
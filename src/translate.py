@@ -1,88 +1,522 @@
 from __future__ import annotations
 
-from typing import Dict, List, Optional, Tuple
+import os
+import re
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import asdict, replace
+from typing import Callable, Dict, List, Optional, Tuple
 
+from .archive import RunArchive, record_failure
+from .chunking import ChunkPlan, ParagraphDedup, dedupe_paragraphs, paragraphs, plan_chunks
 from .config import AppSettings
+from .glossary import Glossary, get_glossary
 from .lang import decide_direction
-from .prompts import literal_prompt, neutral_prompt
-from .providers import ModelConfig, translate_any
+from .memory import TranslationMemory, get_translation_memory, split_sentences, tm_namespace
+from .prompts import (
+    glossary_block,
+    keep_paragraphs_rule,
+    shared_context_block,
+    literal_prompt,
+    neutral_prompt,
+    output_retry_note,
+    packed_segments_rule,
+    tm_hints_block,
+)
+from .profiling import propagate, span
+from .providers import (
+    ModelConfig,
+    ProviderUnavailable,
+    StageProfile,
+    get_breaker,
+    get_router,
+    is_outage_error,
+    new_usage,
+    standin_profile,
+    translate_any,
+)
+from .run_context import RunCancelled, RunContext
+from .segments import build_packed_text, pack_segments, unpack_text
 from .text_utils import join_parts
+from .validation import TOO_SHORT, TRUNCATED, OutputChecks, new_check_stats
+
+
+# call(instructions, text, context="", profile=None) -> translation; binds model, usage, run context, failover
+TranslateCall = Callable[..., str]
+
+
+AUTO_MODE = "Auto (fastest)"
+# Model id of the Auto task: calls are routed per chunk, see _bind_auto_call
+_AUTO_MODEL = "auto"
+_MAX_ROUTING_DECISIONS = 200
 
 
 def _runtime_badge(cfg: ModelConfig) -> str:
+    if cfg.model == _AUTO_MODEL:
+        return "fastest provider per chunk"
     return f"{cfg.provider} | {cfg.model}"
 
 
+def _bind_call(
+    cfg: ModelConfig,
+    usage: Optional[Dict[str, int]] = None,
+    ctx: Optional[RunContext] = None,
+    fallback: Optional[ModelConfig] = None,
+    failover_log: Optional[List[Dict[str, str]]] = None,
+) -> TranslateCall:
+    """Bind a model (and its failover target) into a plain translate call.
+
+    When the primary's circuit breaker is open — or a call fails and trips it —
+    the request goes to `fallback` instead and the substitution is logged.
+    """
+
+    def call(instructions: str, text: str, context: str = "", profile: Optional[StageProfile] = None) -> str:
+        try:
+            return translate_any(cfg, instructions, text, context=context, usage=usage, ctx=ctx, profile=profile)
+        except RunCancelled:
+            raise
+        except ProviderUnavailable as e:
+            if fallback is None:
+                raise
+            reason = str(e)
+        except Exception as e:
+            if fallback is None or not get_breaker(cfg.provider).is_open():
+                raise
+            reason = f"{type(e).__name__}: {str(e)[:200]}"
+
+        if failover_log is not None:
+            failover_log.append(
+                {
+                    "label": cfg.label,
+                    "from": _runtime_badge(cfg),
+                    "to": _runtime_badge(fallback),
+                    "reason": reason,
+                }
+            )
+        return translate_any(fallback, instructions, text, context=context, usage=usage, ctx=ctx, profile=profile)
+
+    return call
+
+
+def _bind_auto_call(
+    settings: AppSettings,
+    candidates: List[ModelConfig],
+    usage: Optional[Dict[str, int]] = None,
+    ctx: Optional[RunContext] = None,
+    routing_log: Optional[List[Dict[str, object]]] = None,
+) -> TranslateCall:
+    """Route each request to the model currently expected to be fastest.
+
+    The ranking comes from the process-wide latency router; if the chosen
+    provider is unavailable or has an outage error, the next one is tried.
+    Each decision (and who actually served the request) goes to `routing_log`.
+    """
+
+    def call(instructions: str, text: str, context: str = "", profile: Optional[StageProfile] = None) -> str:
+        ranked, decision = get_router().rank(
+            candidates,
+            len(text),
+            max_error_rate=settings.auto_max_error_rate,
+            prefer=settings.auto_prefer_provider or None,
+            prefer_margin=settings.auto_prefer_margin,
+        )
+        if routing_log is not None and len(routing_log) < _MAX_ROUTING_DECISIONS:
+            routing_log.append(decision)
+
+        for n, cfg in enumerate(ranked):
+            last = n == len(ranked) - 1
+            try:
+                out = translate_any(cfg, instructions, text, context=context, usage=usage, ctx=ctx, profile=profile)
+            except RunCancelled:
+                raise
+            except ProviderUnavailable as e:
+                if last:
+                    raise
+                decision.setdefault("skipped", []).append(f"{_runtime_badge(cfg)}: {e}")
+                continue
+            except Exception as e:
+                if last or not is_outage_error(e):
+                    raise
+                decision.setdefault("skipped", []).append(f"{_runtime_badge(cfg)}: {type(e).__name__}: {str(e)[:200]}")
+                continue
+            decision["served_by"] = _runtime_badge(cfg)
+            return out
+
+        raise RuntimeError("No provider available for Auto mode.")
+
+    return call
+
+
+_MAX_TM_HINTS = 20
+_MAX_REPORTED_VIOLATIONS = 50
+
+
+def _new_tm_stats() -> Dict[str, int]:
+    return {"exact_chunks": 0, "hinted_chunks": 0, "hint_count": 0, "learned_pairs": 0}
+
+
+def _translate_chunk(
+    call: TranslateCall,
+    instructions: str,
+    chunk: str,
+    context: str = "",
+    tm: Optional[TranslationMemory] = None,
+    namespace: str = "",
+    min_score: float = 0.75,
+    stats: Optional[Dict[str, int]] = None,
+    profile: Optional[StageProfile] = None,
+    checks: Optional[OutputChecks] = None,
+    check_retries: int = 0,
+    check_stats: Optional[Dict] = None,
+    target_lang: str = "",
+) -> str:
+    """Translate one chunk, consulting the translation memory when given.
+
+    - every sentence has an exact TM hit: rebuild the chunk locally, no call
+    - some sentences have (near) hits: pass them to the model as hints
+    - the output goes through `checks`; a failing one is re-requested up to
+      `check_retries` times (see _checked_call)
+    - afterwards, learn sentence pairs from paragraphs that line up, unless
+      the output still fails a check
+    """
+    if tm is None:
+        out, _ = _checked_call(call, instructions, chunk, context, profile, checks, check_retries, check_stats, target_lang)
+        return out
+
+    stats = stats if stats is not None else _new_tm_stats()
+    paras = [split_sentences(p) for p in paragraphs(chunk)]
+    matches = [[tm.lookup(namespace, sent, min_score) for sent in p] for p in paras]
+
+    flat = [m for p in matches for m in p]
+    if flat and all(m is not None and m.exact for m in flat):
+        stats["exact_chunks"] += 1
+        return "\n\n".join(" ".join(m.target for m in p) for p in matches)
+
+    hints = [(m.source, m.target, m.exact) for m in flat if m is not None][:_MAX_TM_HINTS]
+    if hints:
+        stats["hinted_chunks"] += 1
+        stats["hint_count"] += len(hints)
+        context = context + tm_hints_block(hints)
+
+    out, ok = _checked_call(call, instructions, chunk, context, profile, checks, check_retries, check_stats, target_lang)
+
+    src_paras, out_paras = paragraphs(chunk), paragraphs(out)
+    if ok and len(src_paras) == len(out_paras):
+        for sp, op in zip(src_paras, out_paras):
+            stats["learned_pairs"] += tm.add_aligned(namespace, sp, op)
+
+    return out
+
+
+def _checked_call(
+    call: TranslateCall,
+    instructions: str,
+    chunk: str,
+    context: str,
+    profile: Optional[StageProfile],
+    checks: Optional[OutputChecks],
+    retries: int,
+    stats: Optional[Dict],
+    target_lang: str,
+) -> Tuple[str, bool]:
+    """Call, then re-request while the output fails `checks`; returns (output, passed).
+
+    A retry tells the model what was wrong, and lifts the per-request output
+    cap when the output came back short. The last attempt is kept either way.
+    """
+    out = call(instructions, chunk, context=context, profile=profile)
+    if checks is None:
+        return out, True
+
+    stats = stats if stats is not None else new_check_stats()
+    stats["checked"] += 1
+    reason = checks.problem(chunk, out)
+    if reason is None:
+        return out, True
+
+    stats["failed"] += 1
+    stats["reasons"][reason] += 1
+    stats["failures"].append(reason)
+    for _ in range(retries):
+        stats["retried"] += 1
+        if profile is not None and profile.output_ratio is not None and reason in (TOO_SHORT, TRUNCATED):
+            profile = replace(profile, output_ratio=None)
+        out = call(instructions, chunk, context=context + output_retry_note(reason, target_lang), profile=profile)
+        reason = checks.problem(chunk, out)
+        if reason is None:
+            stats["recovered"] += 1
+            return out, True
+        stats["failures"].append(reason)
+
+    stats["unresolved"] += 1
+    return out, False
+
+
+def _new_check_totals() -> Dict:
+    totals = new_check_stats()
+    del totals["failures"]
+    totals["chunks"] = []
+    return totals
+
+
+def _merge_check_stats(totals: Dict, job_stats: Dict[Tuple[int, str], Dict]) -> None:
+    """Sum per-request check counters into `totals` and list the chunks that failed a check."""
+    for (i, style), stats in sorted(job_stats.items()):
+        for key in ("checked", "failed", "retried", "recovered", "unresolved"):
+            totals[key] += stats[key]
+        for reason, count in stats["reasons"].items():
+            totals["reasons"][reason] += count
+        if stats["failures"] and len(totals["chunks"]) < _MAX_REPORTED_VIOLATIONS:
+            totals["chunks"].append(
+                {"chunk": i + 1, "style": style, "failures": stats["failures"], "resolved": stats["unresolved"] == 0}
+            )
+
+
+def _stable_instructions(instructions: str, shared_context: str = "") -> str:
+    if shared_context and shared_context.strip():
+        return instructions + shared_context_block(shared_context)
+    return instructions
+
+
+def _new_glossary_stats() -> Dict:
+    return {"terms_matched": 0, "violation_count": 0, "violations": []}
+
+
 def _translate_for_model(
     cfg: ModelConfig,
+    call: TranslateCall,
     chunks: List[str],
     progress,
     source_lang: str,
     target_lang: str,
     progress_prefix: str = "",
+    tm: Optional[TranslationMemory] = None,
+    tm_min_similarity: float = 0.75,
+    tm_stats: Optional[Dict[str, int]] = None,
+    glossary: Optional[Glossary] = None,
+    glossary_stats: Optional[Dict] = None,
+    shared_context: str = "",
+    parallel: int = 1,
+    ctx: Optional[RunContext] = None,
+    keep_paragraphs: bool = False,
+    pack_budget: int = 1500,
+    realigned: Optional[List[Tuple[int, str]]] = None,
+    profiles: Optional[Dict[str, StageProfile]] = None,
+    checks: Optional[OutputChecks] = None,
+    check_retries: int = 1,
+    check_stats: Optional[Dict] = None,
+    archive: Optional[RunArchive] = None,
 ) -> Tuple[str, str]:
-    lit_parts: List[str] = []
-    neu_parts: List[str] = []
+    """Translate every (chunk, style) pair, up to `parallel` requests at a time.
+
+    `call` must be bound to a worker view of `ctx` (RunContext.worker()):
+    this thread keeps the heartbeat, progress and glossary checks, and
+    watches for cancellation while the requests run.
+
+    With `keep_paragraphs`, every output has exactly the input's paragraphs:
+    a chunk whose translation merged or split paragraphs is re-sent as
+    packed segments, one per paragraph, and logged in `realigned`.
+    Each style's requests use its latency profile from `profiles`.
+    With `checks`, a chunk whose output fails a local check is re-requested
+    on its own (up to `check_retries` times); counts go to `check_stats`.
+    Each finished (chunk, style) is appended to `archive` right away.
+    """
+    profiles = profiles or {}
+    parts: Dict[str, List[str]] = {"literal": [""] * len(chunks), "neutral": [""] * len(chunks)}
 
     n = max(len(chunks), 1)
     badge = _runtime_badge(cfg)
 
-    lit_inst = literal_prompt(source_lang, target_lang)
-    neu_inst = neutral_prompt(source_lang, target_lang)
+    # Stable per-run prefix: identical for every chunk so provider prompt caching applies
+    inst = {
+        "literal": _stable_instructions(literal_prompt(source_lang, target_lang), shared_context),
+        "neutral": _stable_instructions(neutral_prompt(source_lang, target_lang), shared_context),
+    }
+    if keep_paragraphs:
+        inst = {style: text + keep_paragraphs_rule() for style, text in inst.items()}
+
+    hits = [glossary.find_terms(c, source_lang) if glossary is not None else [] for c in chunks]
+    jobs = [(i, style) for i in range(len(chunks)) for style in ("literal", "neutral")]
+    job_tm_stats = {job: _new_tm_stats() for job in jobs}
+    job_check_stats = {job: new_check_stats() for job in jobs}
+    job_elapsed: Dict[Tuple[int, str], float] = {}
 
-    for i, c in enumerate(chunks, start=1):
-        progress.progress(
-            int((i - 1) / n * 100),
-            text=f"{progress_prefix} {cfg.label} — {badge} — chunk {i}/{n} (literal)…",
+    def _job(i: int, style: str) -> str:
+        started = time.perf_counter()
+        try:
+            with span(f"chunk[{i + 1}:{style}]"):
+                return _realigned_job(i, style)
+        finally:
+            job_elapsed[(i, style)] = round(time.perf_counter() - started, 3)
+
+    def _realigned_job(i: int, style: str) -> str:
+        out = _translate_chunk(
+            call,
+            inst[style],
+            chunks[i],
+            context=glossary_block(hits[i]) if hits[i] else "",
+            tm=tm,
+            namespace=tm_namespace(source_lang, target_lang, style, cfg.model),
+            min_score=tm_min_similarity,
+            stats=job_tm_stats[(i, style)],
+            profile=profiles.get(style),
+            checks=checks,
+            check_retries=check_retries,
+            check_stats=job_check_stats[(i, style)],
+            target_lang=target_lang,
         )
-        lit_parts.append(translate_any(cfg, lit_inst, c))
+        src_paras = paragraphs(chunks[i])
+        if not keep_paragraphs or len(paragraphs(out)) == len(src_paras):
+            return out
 
-        progress.progress(
-            int((i - 1) / n * 100),
-            text=f"{progress_prefix} {cfg.label} — {badge} — chunk {i}/{n} (neutral)…",
+        if realigned is not None:
+            realigned.append((i + 1, style))
+        outs, _ = _translate_packed(
+            call,
+            inst[style],
+            src_paras,
+            pack_segments(src_paras, max_tokens=pack_budget),
+            glossary=glossary,
+            source_lang=source_lang,
+            profile=profiles.get(style),
         )
-        neu_parts.append(translate_any(cfg, neu_inst, c))
+        # One paragraph per segment, whatever the model did inside it
+        return "\n\n".join(re.sub(r"\n\s*\n", "\n", o.strip()) or p for o, p in zip(outs, src_paras))
+
+    progress.progress(0, text=f"{progress_prefix} {cfg.label} — {badge} — {n} chunk(s), {min(parallel, len(jobs))} at a time…")
+
+    pool = ThreadPoolExecutor(max_workers=max(1, min(parallel, len(jobs))), thread_name_prefix="ytali-chunk")
+    futures: Dict = {}
+    job_fn = propagate(_job)  # chunk workers report into the run's profiler
+    try:
+        for i, style in jobs:
+            futures[pool.submit(job_fn, i, style)] = (i, style)
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+            if ctx is not None:
+                ctx.check()
+                ctx.beat()
+            for f in done:
+                i, style = futures[f]
+                out = f.result()
+                parts[style][i] = out
+                if archive is not None:
+                    archive.append(
+                        "chunk",
+                        label=cfg.label,
+                        provider=cfg.provider,
+                        model=cfg.model,
+                        chunk=i + 1,
+                        style=style,
+                        source=chunks[i],
+                        output=out,
+                        elapsed_s=job_elapsed.get((i, style)),
+                        failed_checks=job_check_stats[(i, style)]["failures"],
+                        unresolved=job_check_stats[(i, style)]["unresolved"] > 0,
+                    )
+
+                if hits[i] and glossary_stats is not None:
+                    glossary_stats["terms_matched"] += len(hits[i])
+                    for v in glossary.violations(hits[i], out, source_lang):
+                        glossary_stats["violation_count"] += 1
+                        if len(glossary_stats["violations"]) < _MAX_REPORTED_VIOLATIONS:
+                            glossary_stats["violations"].append(
+                                {"chunk": i + 1, "style": style, "source": v.source, "expected": v.target}
+                            )
+            if done:
+                finished = len(jobs) - len(pending)
+                progress.progress(
+                    int(finished / len(jobs) * 100),
+                    text=f"{progress_prefix} {cfg.label} — {badge} — {finished}/{len(jobs)} requests done…",
+                )
+    except BaseException as e:
+        # Failed request, cancel/deadline, or the host interrupted us: stop the rest
+        for f in futures:
+            f.cancel()
+        if ctx is not None:
+            ctx.cancel(ctx.reason or ("chunk request failed" if isinstance(e, Exception) else "interrupted"))
+        raise
+    finally:
+        pool.shutdown(wait=False)
+
+    if tm_stats is not None:
+        for stats in job_tm_stats.values():
+            for key, value in stats.items():
+                tm_stats[key] = tm_stats.get(key, 0) + value
+    if check_stats is not None:
+        _merge_check_stats(check_stats, job_check_stats)
 
     progress.progress(100, text=f"{progress_prefix} {cfg.label} — done.")
 
-    return join_parts(lit_parts), join_parts(neu_parts)
+    return join_parts(parts["literal"]), join_parts(parts["neutral"])
 
 
-def run_translation(
-    settings: AppSettings,
-    chunks: List[str],
-    progress,
-) -> Dict[str, Dict[str, str]]:
-    """Run translation according to settings.
+def new_run_context(settings: AppSettings, heartbeat=None) -> RunContext:
+    return RunContext(
+        deadline_s=settings.run_deadline_s,
+        call_timeout_s=settings.call_timeout_s,
+        heartbeat=heartbeat,
+    )
 
-    Returns:
-      {
-        "_meta": {"detected_language": "it", "direction": "Italian → English", ...},
-        "Gemini 2.5 Flash": {"literal": "...", "neutral": "..."},
-        "GPT-5.2": {"literal": "...", "neutral": "..."},
-      }
-    """
 
-    settings.validate()
+def _failover_config(settings: AppSettings, cfg: ModelConfig) -> Optional[ModelConfig]:
+    """The other provider, for single-provider modes when its key is configured."""
+    if not settings.failover or settings.run_mode == "Compare (Gemini vs OpenAI)":
+        return None
 
-    # Language decision based on full input (re-join chunks for detection)
-    joined = "\n\n".join(chunks)
-    lang_decision = decide_direction(joined)
-    direction_str = f"{lang_decision.source} → {lang_decision.target}"
+    if cfg.provider == "openai":
+        key = settings.gemini_api_key or os.getenv("GEMINI_API_KEY", "")
+        return ModelConfig(provider="gemini", model=settings.gemini_model, api_key=key, label=cfg.label) if key else None
 
-    work_chunks = chunks
-    if settings.compare_first_n_chunks and settings.compare_first_n_chunks > 0:
-        work_chunks = chunks[: settings.compare_first_n_chunks]
+    key = settings.openai_api_key or os.getenv("OPENAI_API_KEY", "")
+    return ModelConfig(provider="openai", model=settings.openai_model, api_key=key, label=cfg.label) if key else None
 
-    results: Dict[str, Dict[str, str]] = {
-        "_meta": {
-            "detected_language": lang_decision.detected,
-            "direction": direction_str,
-            "chunk_count_total": len(chunks),
-            "chunk_count_used": len(work_chunks),
-            "run_mode": settings.run_mode,
-        }
-    }
+
+def _auto_candidates(settings: AppSettings) -> List[ModelConfig]:
+    """Models Auto mode may route to: every provider with a key."""
+    candidates: List[ModelConfig] = []
+    gemini_key = settings.gemini_api_key or os.getenv("GEMINI_API_KEY", "")
+    openai_key = settings.openai_api_key or os.getenv("OPENAI_API_KEY", "")
+    if gemini_key:
+        candidates.append(ModelConfig(provider="gemini", model=settings.gemini_model, api_key=gemini_key, label=AUTO_MODE))
+    if openai_key:
+        candidates.append(ModelConfig(provider="openai", model=settings.openai_model, api_key=openai_key, label=AUTO_MODE))
+    return candidates
+
+
+def _task_call(
+    settings: AppSettings,
+    cfg: ModelConfig,
+    usage: Optional[Dict[str, int]],
+    ctx: Optional[RunContext],
+    meta: Dict,
+) -> TranslateCall:
+    if cfg.model == _AUTO_MODEL:
+        return _bind_auto_call(
+            settings,
+            _auto_candidates(settings),
+            usage=usage,
+            ctx=ctx,
+            routing_log=meta.setdefault("routing", []),
+        )
+    return _bind_call(
+        cfg,
+        usage=usage,
+        ctx=ctx,
+        fallback=_failover_config(settings, cfg),
+        failover_log=meta["failover"],
+    )
+
+
+def model_tasks(settings: AppSettings) -> List[ModelConfig]:
+    """One ModelConfig per output the run mode produces (labelled as in the results)."""
+    if settings.run_mode == AUTO_MODE:
+        candidates = _auto_candidates(settings)
+        if not candidates:
+            raise ValueError("Nothing to run — check Run mode and API keys.")
+        # One output; the provider is picked per request
+        return [ModelConfig(provider=candidates[0].provider, model=_AUTO_MODEL, api_key="", label=AUTO_MODE)]
 
     want_gemini = settings.run_mode in ("Compare (Gemini vs OpenAI)", "Gemini only")
     want_openai = settings.run_mode in ("Compare (Gemini vs OpenAI)", "OpenAI only")
@@ -112,20 +546,356 @@ def run_translation(
     if not tasks:
         raise ValueError("Nothing to run — check Run mode and API keys.")
 
-    # Run sequentially (clear progress in Streamlit)
-    for idx, cfg in enumerate(tasks, start=1):
-        prefix = f"{idx}/{len(tasks)}"
-        lit, neu = _translate_for_model(
-            cfg,
-            work_chunks,
-            progress,
+    return tasks
+
+
+class _NoProgress:
+    def progress(self, value: int, text: str = "") -> None:
+        pass
+
+
+def _chunk_plan(settings: AppSettings, cfg: ModelConfig, text: str) -> ChunkPlan:
+    """Split `text` for the lowest expected wall time on this model's measured latency."""
+    router = get_router()
+    if cfg.model == _AUTO_MODEL:
+        # Requests go to whichever candidate is fastest, so plan for that one
+        kchars = len(text) / 1000
+        estimates = [router.estimate(c.provider, c.model) for c in _auto_candidates(settings)]
+        overhead_s, s_per_kchar = min(estimates, key=lambda e: e[0] + e[1] * kchars)
+    else:
+        overhead_s, s_per_kchar = router.estimate(cfg.provider, cfg.model)
+
+    return plan_chunks(
+        text,
+        overhead_s=overhead_s,
+        s_per_kchar=s_per_kchar,
+        max_parallel=settings.max_parallel_requests,
+        max_chunk_chars=settings.chunk_chars,
+        min_chunk_chars=settings.min_chunk_chars,
+    )
+
+
+def run_translation(
+    settings: AppSettings,
+    chunks: Optional[List[str]] = None,
+    progress=None,
+    ctx: Optional[RunContext] = None,
+    text: Optional[str] = None,
+    archive: Optional[RunArchive] = None,
+) -> Dict[str, Dict[str, str]]:
+    """Run translation according to settings.
+
+    Pass the whole document as `text` to have it split per model by the
+    chunk planner (paragraph boundaries, sized from measured provider
+    latency), or pre-split `chunks` to use them as given. Chunks are
+    translated up to settings.max_parallel_requests at a time.
+
+    `ctx` carries the run deadline and cancellation; without one, a context is
+    created from settings.run_deadline_s / settings.call_timeout_s.
+
+    With settings.save_local (or an explicit `archive`), every finished chunk
+    is appended to the run archive (src/archive.py) as it completes; its path
+    is `_meta["archive"]`, and the caller closes it with `archive.finish()`.
+
+    Returns:
+      {
+        "_meta": {"detected_language": "it", "direction": "Italian → English", ...},
+        "Gemini 2.5 Flash": {"literal": "...", "neutral": "..."},
+        "GPT-5.2": {"literal": "...", "neutral": "..."},
+      }
+    """
+
+    settings.validate()
+    if (chunks is None) == (text is None):
+        raise ValueError("Pass either `chunks` or `text`.")
+    ctx = ctx or new_run_context(settings)
+    progress = progress or _NoProgress()
+
+    # Language decision based on full input (re-join chunks for detection)
+    joined = text if text is not None else "\n\n".join(chunks)
+    with span("detect_language"):
+        lang_decision = decide_direction(joined)
+    direction_str = f"{lang_decision.source} → {lang_decision.target}"
+
+    results: Dict[str, Dict[str, str]] = {
+        "_meta": {
+            "detected_language": lang_decision.detected,
+            "direction": direction_str,
+            "chunk_count_total": len(chunks) if chunks is not None else 0,
+            "chunk_count_used": 0,
+            "run_mode": settings.run_mode,
+            "usage": {},
+            "failover": [],
+        }
+    }
+    dedup: Optional[ParagraphDedup] = None
+    if text is not None:
+        results["_meta"]["chunk_plan"] = {}
+        # Translate each distinct paragraph once, then restore document order.
+        # Not with compare_first_n_chunks: a partial translation cannot be rebuilt.
+        if not settings.compare_first_n_chunks:
+            dedup = dedupe_paragraphs(text)
+            results["_meta"]["dedup"] = {
+                "paragraphs": len(dedup.order),
+                "unique": len(dedup.unique),
+                "deduplicated": dedup.duplicates,
+            }
+            if dedup.duplicates:
+                results["_meta"]["dedup"]["realigned_chunks"] = {}
+            else:
+                dedup = None
+
+    tm = get_translation_memory() if settings.translation_memory else None
+    if tm is not None:
+        results["_meta"]["translation_memory"] = {}
+
+    glossary = get_glossary(settings.glossary_path or os.getenv("YTALI_GLOSSARY"))
+    if glossary is not None:
+        results["_meta"]["glossary"] = {"entries": len(glossary)}
+
+    checks = None
+    if settings.output_checks:
+        checks = OutputChecks(
             source_lang=lang_decision.source,
-            target_lang=lang_decision.target,
-            progress_prefix=prefix,
+            min_ratio=settings.output_min_ratio,
+            max_ratio=settings.output_max_ratio,
+            # The stand-in echoes its input: every output would look untranslated
+            check_language=standin_profile() is None,
         )
+        results["_meta"]["output_checks"] = {}
+
+    tasks = model_tasks(settings)
+    archive = _open_run_archive(settings, archive, results["_meta"], tasks, len(joined))
+
+    # Models run one after another (clear progress in Streamlit); chunks within a model in parallel
+    for idx, cfg in enumerate(tasks, start=1):
+        prefix = f"{idx}/{len(tasks)}"
+        plan = None
+        model_chunks = chunks
+        if text is not None:
+            with span("plan_chunks"):
+                plan = _chunk_plan(settings, cfg, dedup.text() if dedup is not None else text)
+            model_chunks = plan.chunks
+            results["_meta"]["chunk_count_total"] = max(results["_meta"]["chunk_count_total"], len(model_chunks))
+
+        work_chunks = model_chunks
+        if settings.compare_first_n_chunks and settings.compare_first_n_chunks > 0:
+            work_chunks = model_chunks[: settings.compare_first_n_chunks]
+        results["_meta"]["chunk_count_used"] = max(results["_meta"]["chunk_count_used"], len(work_chunks))
+
+        tm_stats = _new_tm_stats()
+        glossary_stats = _new_glossary_stats()
+        usage = new_usage()
+        realigned: List[Tuple[int, str]] = []
+        check_stats = _new_check_totals()
+        call = _task_call(settings, cfg, usage, ctx.worker(), results["_meta"])
+        if archive is not None:
+            archive.append(
+                "plan",
+                label=cfg.label,
+                chunks=len(work_chunks),
+                dedup_order=dedup.order if dedup is not None else None,
+            )
+        t0 = time.perf_counter()
+        with span(f"translate[{cfg.label}]"), record_failure(archive):
+            lit, neu = _translate_for_model(
+                cfg,
+                call,
+                work_chunks,
+                progress,
+                source_lang=lang_decision.source,
+                target_lang=lang_decision.target,
+                progress_prefix=prefix,
+                tm=tm,
+                tm_min_similarity=settings.tm_min_similarity,
+                tm_stats=tm_stats,
+                glossary=glossary,
+                glossary_stats=glossary_stats,
+                shared_context=settings.shared_context,
+                parallel=settings.max_parallel_requests,
+                ctx=ctx,
+                keep_paragraphs=dedup is not None,
+                pack_budget=settings.segment_token_budget,
+                realigned=realigned,
+                profiles=settings.stage_profiles,
+                checks=checks,
+                check_retries=settings.output_check_retries,
+                check_stats=check_stats,
+                archive=archive,
+            )
+        if dedup is not None:
+            lit, neu = dedup.rebuild(paragraphs(lit)), dedup.rebuild(paragraphs(neu))
+            results["_meta"]["dedup"]["realigned_chunks"][cfg.label] = len(realigned)
         results[cfg.label] = {
             "literal": lit,
             "neutral": neu,
         }
+        if plan is not None:
+            results["_meta"]["chunk_plan"][cfg.label] = {
+                **plan.to_meta(),
+                "elapsed_s": round(time.perf_counter() - t0, 2),
+            }
+        if tm is not None:
+            results["_meta"]["translation_memory"][cfg.label] = tm_stats
+        if glossary is not None:
+            results["_meta"]["glossary"][cfg.label] = glossary_stats
+        if checks is not None:
+            results["_meta"]["output_checks"][cfg.label] = check_stats
+        results["_meta"]["usage"][cfg.label] = usage
+
+    return results
+
+
+def _open_run_archive(
+    settings: AppSettings,
+    archive: Optional[RunArchive],
+    meta: Dict,
+    tasks: List[ModelConfig],
+    input_chars: int,
+) -> Optional[RunArchive]:
+    """The run's archive (new one with settings.save_local), opened with a "run" record."""
+    if archive is None and settings.save_local:
+        archive = RunArchive.create()
+    if archive is None:
+        return None
+    meta["archive"] = archive.path
+    archive.append(
+        "run",
+        direction=meta["direction"],
+        run_mode=settings.run_mode,
+        models=[{"label": cfg.label, "provider": cfg.provider, "model": cfg.model} for cfg in tasks],
+        input_chars=input_chars,
+        stage_profiles={stage: asdict(profile) for stage, profile in settings.stage_profiles.items()},
+    )
+    return archive
+
+
+def _translate_packed(
+    call: TranslateCall,
+    instructions: str,
+    texts: List[str],
+    batches: List[List[int]],
+    on_batch=None,
+    glossary: Optional[Glossary] = None,
+    source_lang: str = "",
+    profile: Optional[StageProfile] = None,
+) -> Tuple[List[str], int]:
+    """Translate segments batch by batch; returns (translations, fallback_count).
+
+    Each batch goes out as one request with numbered markers. Segments whose
+    marker did not survive in the output are re-sent one by one.
+    """
+    packed_inst = instructions + packed_segments_rule()
+    out = list(texts)  # empty segments pass through unchanged
+    fallbacks = 0
+
+    for b, batch in enumerate(batches, start=1):
+        if on_batch:
+            on_batch(b, len(batches))
+
+        batch_texts = [texts[i] for i in batch]
+
+        context = ""
+        if glossary is not None:
+            hits = glossary.find_terms("\n".join(batch_texts), source_lang)
+            if hits:
+                context = glossary_block(hits)
+
+        if len(batch) > 1:
+            packed = call(packed_inst, build_packed_text(batch_texts), context=context, profile=profile)
+            parsed = unpack_text(packed, len(batch))
+        else:
+            parsed = {1: call(instructions, batch_texts[0], context=context, profile=profile)}
+
+        for n, i in enumerate(batch, start=1):
+            if n in parsed:
+                out[i] = parsed[n]
+            else:
+                fallbacks += 1
+                out[i] = call(instructions, texts[i], context=context, profile=profile)
+
+    return out, fallbacks
+
+
+def run_segment_translation(
+    settings: AppSettings,
+    texts: List[str],
+    progress,
+    ctx: Optional[RunContext] = None,
+    archive: Optional[RunArchive] = None,
+) -> Dict[str, Dict]:
+    """Translate many small segments (subtitles, CMS strings) packed into few requests.
+
+    Returns the same shape as run_translation, but "literal"/"neutral" are lists
+    aligned with `texts`:
+      {
+        "_meta": {..., "segment_count": 1200, "batch_count": 14, "fallback_segments": {...}},
+        "GPT-5.2": {"literal": [...], "neutral": [...]},
+      }
+    """
+
+    settings.validate()
+    ctx = ctx or new_run_context(settings)
+
+    with span("detect_language"):
+        lang_decision = decide_direction("\n\n".join(texts))
+    batches = pack_segments(texts, max_tokens=settings.segment_token_budget)
+
+    results: Dict[str, Dict] = {
+        "_meta": {
+            "detected_language": lang_decision.detected,
+            "direction": f"{lang_decision.source} → {lang_decision.target}",
+            "segment_count": len(texts),
+            "batch_count": len(batches),
+            "segment_token_budget": settings.segment_token_budget,
+            "run_mode": settings.run_mode,
+            "fallback_segments": {},
+            "usage": {},
+            "failover": [],
+        }
+    }
+
+    lit_inst = _stable_instructions(literal_prompt(lang_decision.source, lang_decision.target), settings.shared_context)
+    neu_inst = _stable_instructions(neutral_prompt(lang_decision.source, lang_decision.target), settings.shared_context)
+
+    glossary = get_glossary(settings.glossary_path or os.getenv("YTALI_GLOSSARY"))
+
+    tasks = model_tasks(settings)
+    archive = _open_run_archive(settings, archive, results["_meta"], tasks, sum(len(t) for t in texts))
+    for idx, cfg in enumerate(tasks, start=1):
+        prefix = f"{idx}/{len(tasks)}"
+        badge = _runtime_badge(cfg)
+        out: Dict[str, List[str]] = {}
+        fallbacks: Dict[str, int] = {}
+        usage = new_usage()
+        call = _task_call(settings, cfg, usage, ctx, results["_meta"])
+
+        for style, inst in (("literal", lit_inst), ("neutral", neu_inst)):
+
+            def _on_batch(b: int, n: int, style: str = style) -> None:
+                progress.progress(
+                    int((b - 1) / max(n, 1) * 100),
+                    text=f"{prefix} {cfg.label} — {badge} — batch {b}/{n} ({style})…",
+                )
+
+            with span(f"translate[{cfg.label}/{style}]"), record_failure(archive):
+                out[style], fallbacks[style] = _translate_packed(
+                    call,
+                    inst,
+                    texts,
+                    batches,
+                    on_batch=_on_batch,
+                    glossary=glossary,
+                    source_lang=lang_decision.source,
+                    profile=settings.stage_profiles.get(style),
+                )
+
+        progress.progress(100, text=f"{prefix} {cfg.label} — done.")
+        if archive is not None:
+            archive.append("segments", label=cfg.label, model=cfg.model, sources=texts, **out)
+
+        results[cfg.label] = out
+        results["_meta"]["fallback_segments"][cfg.label] = fallbacks
+        results["_meta"]["usage"][cfg.label] = usage
 
     return results
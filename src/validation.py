@@ -0,0 +1,76 @@
+"""Cheap local checks on a chunk's translation, run right after the call.
+
+A chunk that fails one is re-requested on its own (see
+translate._translate_chunk), instead of the user spotting the problem and
+rerunning the whole document:
+
+- length ratio: output much shorter or longer than the source
+- language: output still in the source language (the model echoed it)
+- truncation: the source ends a sentence, the output stops mid-sentence
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from .lang import detect_lang_it_en
+
+TOO_SHORT = "too_short"
+TOO_LONG = "too_long"
+WRONG_LANGUAGE = "wrong_language"
+TRUNCATED = "truncated"
+REASONS = (TOO_SHORT, TOO_LONG, WRONG_LANGUAGE, TRUNCATED)
+
+_LANG_CODES = {"Italian": "it", "English": "en"}
+# Closing punctuation a complete text may end with (quotes / brackets after the stop included)
+_SENTENCE_END = re.compile(r"[.!?…:;][\"'”’»)\]]*$|[\"'”’»)\]]$")
+
+
+@dataclass(frozen=True)
+class OutputChecks:
+    """Bounds for one translation direction; `problem()` names the first check a chunk fails.
+
+    Ratio and language are only judged from `min_chars` source characters up:
+    on a headline or a one-line chunk both are too noisy to act on.
+    """
+
+    source_lang: str  # "Italian" | "English"
+    min_ratio: float = 0.5
+    max_ratio: float = 2.0
+    check_language: bool = True
+    min_chars: int = 200
+
+    def problem(self, source: str, output: str) -> Optional[str]:
+        src, out = (source or "").strip(), (output or "").strip()
+        if not src:
+            return None
+        if not out:
+            return TOO_SHORT
+
+        if len(src) >= self.min_chars:
+            ratio = len(out) / len(src)
+            if ratio < self.min_ratio:
+                return TOO_SHORT
+            if ratio > self.max_ratio:
+                return TOO_LONG
+            if self.check_language and detect_lang_it_en(out) == _LANG_CODES.get(self.source_lang):
+                return WRONG_LANGUAGE
+
+        if _SENTENCE_END.search(src) and not _SENTENCE_END.search(out):
+            return TRUNCATED
+        return None
+
+
+def new_check_stats() -> Dict:
+    """Counters for one chunk request; `failures` lists the failed check of each attempt."""
+    return {
+        "checked": 0,
+        "failed": 0,
+        "retried": 0,
+        "recovered": 0,
+        "unresolved": 0,
+        "reasons": {reason: 0 for reason in REASONS},
+        "failures": [],
+    }
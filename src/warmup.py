@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import importlib
+import os
+import sys
+import time
+from typing import Callable, Dict, Optional
+
+from .archive import list_archives, seed_translation_memory
+from .glossary import get_glossary
+from .lang import detect_lang_it_en
+from .memory import get_translation_memory
+from .providers.standin import standin_profile
+from .store import get_result_store
+
+_DETECTOR_SAMPLE = "Questo è un breve testo di prova, scritto per caricare il rilevatore di lingua."
+
+
+def _timed(timings: Dict[str, object], name: str, fn: Callable[[], object]) -> None:
+    t0 = time.perf_counter()
+    try:
+        fn()
+    except Exception as e:
+        # Warm-up is best effort: the real call will surface the error properly
+        timings[f"{name}_error"] = f"{type(e).__name__}: {e}"[:200]
+    timings[f"{name}_s"] = round(time.perf_counter() - t0, 4)
+
+
+def _connect_openai(api_key: str) -> None:
+    from .providers.openai_provider import get_client
+
+    # Any cheap authenticated request opens (and pools) the TLS connection
+    get_client(api_key).with_options(timeout=10).models.list()
+
+
+def _connect_gemini() -> None:
+    from .providers.gemini_provider import _API_BASE, get_session
+
+    get_session().head(_API_BASE, timeout=10)
+
+
+def warm_up(
+    openai_key: Optional[str] = None,
+    gemini_key: Optional[str] = None,
+    glossary_path: Optional[str] = None,
+    connect: bool = True,
+) -> Dict[str, object]:
+    """Pay the one-off startup costs before the first request does.
+
+    Imports the provider SDKs, loads the language detector profiles, opens
+    pooled connections to the providers whose keys are set, and primes the
+    process-wide caches (result store, translation memory, glossary); with
+    YTALI_SEED_TM_FROM_ARCHIVE=1 the memory is seeded from the run archives.
+    Returns per-step timings in seconds; failures are recorded, not raised.
+    """
+    timings: Dict[str, object] = {}
+    t0 = time.perf_counter()
+
+    _timed(timings, "import_openai", lambda: importlib.import_module("openai"))
+    _timed(timings, "import_requests", lambda: importlib.import_module("requests"))
+    _timed(timings, "language_detector", lambda: detect_lang_it_en(_DETECTOR_SAMPLE))
+    _timed(timings, "result_store", get_result_store)
+    _timed(timings, "translation_memory", get_translation_memory)
+    _timed(timings, "glossary", lambda: get_glossary(glossary_path or os.getenv("YTALI_GLOSSARY")))
+    if os.getenv("YTALI_SEED_TM_FROM_ARCHIVE", "").strip().lower() in ("1", "true", "yes", "on"):
+        # Re-learn sentence pairs from past runs (the memory itself is per process)
+        _timed(timings, "seed_tm", lambda: timings.__setitem__("seed_tm_pairs", seed_translation_memory(list_archives())))
+
+    connect = connect and standin_profile() is None
+    if connect and openai_key:
+        _timed(timings, "connect_openai", lambda: _connect_openai(openai_key))
+    if connect and gemini_key:
+        _timed(timings, "connect_gemini", _connect_gemini)
+
+    timings["total_s"] = round(time.perf_counter() - t0, 4)
+    return timings
+
+
+def main() -> None:
+    """`python -m src.warmup`: print cold-start timings for this machine."""
+    t0 = time.perf_counter()
+    importlib.import_module("src.translate")
+    importlib.import_module("src.editor")
+    app_import_s = time.perf_counter() - t0
+
+    timings = warm_up(
+        openai_key=os.getenv("OPENAI_API_KEY"),
+        gemini_key=os.getenv("GEMINI_API_KEY"),
+        connect="--no-connect" not in sys.argv[1:],
+    )
+
+    print(f"{'import app modules':<24} {app_import_s:8.3f}s")
+    for name, value in timings.items():
+        if name.endswith("_s"):
+            print(f"{name[:-2].replace('_', ' '):<24} {value:8.3f}s")
+        else:
+            print(f"  {name}: {value}")
+
+
+if __name__ == "__main__":
+    main()
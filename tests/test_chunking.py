@@ -0,0 +1,97 @@
+import random
+
+import pytest
+
+from src.chunking import dedupe_paragraphs, paragraphs, plan_chunks, split_balanced
+
+
+def _text(sizes, ch="x"):
+    return "\n\n".join(ch * n for n in sizes)
+
+
+def test_split_balanced_respects_cap():
+    # A balanced cut here used to close a 9,000+ character chunk
+    paras = ["x" * n for n in (7730, 552, 1838, 5056, 5650, 8405, 8518)]
+    chunks = split_balanced(paras, 5, max_chars=9000)
+    assert len(chunks) <= 5
+    assert max(len(c) for c in chunks) <= 9000
+    assert "\n\n".join(chunks) == "\n\n".join(paras)
+
+
+def test_plan_chunks_cap_and_order_random():
+    rng = random.Random(1)
+    for _ in range(300):
+        paras = [f"{i}:" + "y" * rng.randint(50, 8900) for i in range(rng.randint(1, 30))]
+        text = "\n\n".join(paras)
+        cap = max(rng.choice([3000, 9000, 12000]), max(len(p) for p in paras))
+        plan = plan_chunks(
+            text,
+            rng.uniform(0.2, 3),
+            rng.uniform(0.1, 2),
+            rng.randint(1, 8),
+            max_chunk_chars=cap,
+            min_chunk_chars=100,
+        )
+        assert max(plan.sizes) <= cap
+        assert plan.sizes == [len(c) for c in plan.chunks]
+        assert "\n\n".join(plan.chunks) == text
+
+
+def test_paragraph_longer_than_cap_gets_its_own_chunk():
+    text = _text([500, 12000, 500])
+    plan = plan_chunks(text, 1.0, 0.5, 4, max_chunk_chars=9000, min_chunk_chars=100)
+    assert plan.sizes == [500, 12000, 500]
+    assert "\n\n".join(plan.chunks) == text
+
+
+def test_single_paragraph_over_cap():
+    plan = plan_chunks("z" * 20000, 1.0, 0.5, 4, max_chunk_chars=9000)
+    assert plan.chunks == ["z" * 20000]
+
+
+@pytest.mark.parametrize("text", ["", "   ", "\n\n\n\n"])
+def test_empty_input(text):
+    plan = plan_chunks(text, 1.0, 0.5, 4)
+    assert plan.chunks == []
+    assert plan.estimated_s == 0.0
+    assert split_balanced([], 3) == []
+
+
+def test_more_chunks_than_paragraphs():
+    paras = ["a" * 100, "b" * 100]
+    assert split_balanced(paras, 10) == paras
+
+
+def test_dedupe_rebuilds_document_order():
+    text = "Di Mario Rossi\n\nUno.\n\nLeggi anche.\n\nDue.\n\nLeggi anche.\n\nDi  Mario Rossi"
+    dedup = dedupe_paragraphs(text)
+    assert dedup.unique == ["Di Mario Rossi", "Uno.", "Leggi anche.", "Due."]
+    assert dedup.order == [0, 1, 2, 3, 2, 0]
+    assert dedup.duplicates == 2
+    assert dedup.rebuild([p.upper() for p in dedup.unique]).split("\n\n") == [
+        "DI MARIO ROSSI",
+        "UNO.",
+        "LEGGI ANCHE.",
+        "DUE.",
+        "LEGGI ANCHE.",
+        "DI MARIO ROSSI",
+    ]
+
+
+def test_dedupe_normalizes_unicode_but_not_case():
+    composed, decomposed = "Citt\u00e0 chiusa.", "Citta\u0300 chiusa."
+    dedup = dedupe_paragraphs(f"{composed}\n\n{decomposed}\n\n{composed.lower()}")
+    assert dedup.order == [0, 0, 1]
+
+
+def test_dedupe_without_duplicates_keeps_text():
+    text = "Uno.\n\nDue.\n\nTre."
+    dedup = dedupe_paragraphs(text)
+    assert dedup.duplicates == 0
+    assert dedup.text() == "\n\n".join(paragraphs(text))
+
+
+def test_rebuild_rejects_wrong_paragraph_count():
+    dedup = dedupe_paragraphs("Uno.\n\nDue.\n\nUno.")
+    with pytest.raises(ValueError):
+        dedup.rebuild(["One."])
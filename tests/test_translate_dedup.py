@@ -0,0 +1,71 @@
+import pytest
+
+import src.providers as providers
+from src.chunking import paragraphs
+from src.config import AppSettings
+from src.providers import StandInProfile, use_standin
+from src.translate import run_translation
+
+BYLINE = "Di Mario Rossi\n— Roma"
+LEGGI = "Leggi anche: la manovra in dieci punti."
+BODY = [f"Paragrafo numero {i}. Il governo ha approvato la legge sulla scuola." for i in range(12)]
+
+
+def _document():
+    doc = [BYLINE]
+    for i, p in enumerate(BODY):
+        doc.append(p)
+        if i % 3 == 0:
+            doc.append(LEGGI)
+    return doc + [BYLINE]
+
+
+def _settings():
+    settings = AppSettings(
+        header_logo_path=None,
+        watermark_logo_path=None,
+        watermark_size_px=190,
+        watermark_opacity=0.1,
+        openai_api_key="standin",
+        gemini_api_key="standin",
+        run_mode="OpenAI only",
+        save_local=False,
+    )
+    settings.translation_memory = False
+    return settings
+
+
+@pytest.fixture(autouse=True)
+def standin():
+    use_standin(StandInProfile(time_scale=0.01))
+    yield
+    use_standin(None)
+
+
+def test_duplicates_are_sent_once_and_rebuilt():
+    doc = _document()
+    results = run_translation(_settings(), text="\n\n".join(doc))
+    meta = results["_meta"]["dedup"]
+    assert meta["paragraphs"] == len(doc)
+    assert meta["unique"] == len(doc) - meta["deduplicated"]
+    out = paragraphs(results["GPT-5.2"]["literal"])
+    assert len(out) == len(doc)
+    assert out[0] == out[-1]
+
+
+def test_merged_paragraphs_are_realigned(monkeypatch):
+    translate = providers.translate_standin
+
+    def merging(*args, **kwargs):
+        # A model that joins paragraphs, except when they come as packed segments
+        out = translate(*args, **kwargs)
+        return out if "[[" in args[3] else out.replace("\n\n", " ")
+
+    monkeypatch.setattr(providers, "translate_standin", merging)
+    doc = _document()
+    results = run_translation(_settings(), text="\n\n".join(doc))
+    assert results["_meta"]["dedup"]["realigned_chunks"]["GPT-5.2"] > 0
+    for style in ("literal", "neutral"):
+        out = paragraphs(results["GPT-5.2"][style])
+        assert len(out) == len(doc)
+        assert out[0] == out[-1]